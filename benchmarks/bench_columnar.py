@@ -0,0 +1,47 @@
+"""
+Compares the list-of-dicts transactions with ColumnarTransactions:
+memory per row, validation time and aggregation time.
+
+    python -m benchmarks.bench_columnar --rows 10000000
+"""
+import argparse
+import gc
+import tracemalloc
+
+from benchmarks.common import make_transactions, to_lines, timed
+from utils.file_handler import parse_transactions, validate_and_filter
+from utils.data_processor import aggregate_sales
+
+
+def measure_parse(lines, columnar):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    transactions = parse_transactions(lines, columnar=columnar)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return transactions, used
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    lines = to_lines(make_transactions(args.rows))
+
+    print(f"{args.rows:,} rows")
+    print(f"{'Layout':10} {'Bytes/row':>10} {'Validate s':>11} {'Aggregate s':>12}")
+
+    for label, columnar in (("dicts", False), ("columnar", True)):
+        transactions, used = measure_parse(lines, columnar)
+        validate_s, (valid, _, _) = timed(validate_and_filter, transactions)
+        aggregate_s, _ = timed(aggregate_sales, valid)
+
+        print(f"{label:10} {used / args.rows:>10.0f} {validate_s:>11.2f} {aggregate_s:>12.2f}")
+
+        del transactions, valid
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Measures enrich_sales_data throughput against a local stub API
+as the thread-pool size grows, then with the paginated bulk catalog
+as the source (per-id calls only for ids missing from it).
+
+    python -m benchmarks.bench_enrichment --rows 1000000 --products 500 --latency 0.02
+"""
+import argparse
+
+from benchmarks.common import make_transactions, timed
+from benchmarks.stub_server import start_stub_server
+from utils.api_handler import (
+    create_product_mapping,
+    enrich_sales_data,
+    fetch_all_products,
+    new_api_client
+)
+
+
+def enrich_from_catalog(transactions, base_url, workers):
+    with new_api_client(workers, base_url) as client:
+        product_map = create_product_mapping(fetch_all_products(client))
+        return enrich_sales_data(transactions, product_map, client=client)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    transactions = make_transactions(args.rows, products=args.products)
+    server, base_url = start_stub_server(latency=args.latency, catalog_size=args.products + 100)
+
+    print(f"{args.rows:,} rows, {args.products} distinct products, {args.latency * 1000:.0f}ms latency")
+    print(f"{'Workers':>8} {'Seconds':>9} {'Rows/s':>12} {'HTTP calls':>11}")
+
+    try:
+        for workers in args.workers:
+            server.request_count = 0
+            seconds, enriched = timed(
+                enrich_sales_data, transactions, max_workers=workers, base_url=base_url
+            )
+            assert all(tx["API_Match"] for tx in enriched)
+            print(f"{workers:>8} {seconds:>9.2f} {args.rows / seconds:>12,.0f} {server.request_count:>11}")
+
+        # The stub catalog holds every product, so only its pages are fetched
+        workers = max(args.workers)
+        server.request_count = 0
+        seconds, enriched = timed(enrich_from_catalog, transactions, base_url, workers)
+        assert all(tx["API_Match"] for tx in enriched)
+        print(f"{'catalog':>8} {seconds:>9.2f} {args.rows / seconds:>12,.0f} {server.request_count:>11}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
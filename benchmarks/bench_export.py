@@ -0,0 +1,103 @@
+"""
+Compares the enriched text file with the binary columnar export:
+file size, write time, full read time and single-column read time.
+
+    python -m benchmarks.bench_export --rows 1000000
+"""
+import argparse
+import os
+import tempfile
+
+from benchmarks.common import make_transactions, timed
+from utils.api_handler import save_enriched_data
+from utils.binary_export import (
+    ENRICHED_SCHEMA,
+    default_binary_path,
+    open_binary_reader,
+    save_enriched_binary
+)
+
+
+def make_enriched(rows):
+    enriched = make_transactions(rows)
+    for i, tx in enumerate(enriched):
+        matched = i % 10 != 0
+        tx["API_Category"] = f"category-{i % 7}" if matched else None
+        tx["API_Brand"] = f"brand-{i % 23}" if matched else None
+        tx["API_Rating"] = 3.0 + (i % 20) / 10 if matched else None
+        tx["API_Match"] = matched
+    return enriched
+
+
+def _typed(kind, value):
+    if value == "None":
+        return None
+    if kind == "int64":
+        return int(value)
+    if kind == "float64":
+        return float(value)
+    if kind == "bool":
+        return value == "True"
+    return value
+
+
+def read_text(path):
+    """
+    Reads the pipe-delimited file back into typed row dicts.
+    """
+    kinds = [kind for _, kind in ENRICHED_SCHEMA]
+    with open(path, "r", encoding="utf-8") as f:
+        names = f.readline().rstrip("\n").split("|")
+        return [
+            {name: _typed(kind, value) for name, kind, value in zip(names, kinds, line.rstrip("\n").split("|"))}
+            for line in f
+        ]
+
+
+def read_text_column(path, name):
+    with open(path, "r", encoding="utf-8") as f:
+        names = f.readline().rstrip("\n").split("|")
+        i = names.index(name)
+        return [float(line.rstrip("\n").split("|")[i]) for line in f]
+
+
+def read_binary(path):
+    with open_binary_reader(path) as reader:
+        return list(reader.rows())
+
+
+def read_binary_column(path, name):
+    with open_binary_reader(path) as reader:
+        return reader.column(name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    enriched = make_enriched(args.rows)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        text_path = os.path.join(tmp, "enriched.txt")
+        binary_path = default_binary_path(os.path.join(tmp, "enriched"))
+
+        print(f"{args.rows:,} rows ({os.path.splitext(binary_path)[1]} export)")
+        print(f"{'Format':8} {'MB':>8} {'Write s':>8} {'Read s':>8} {'Column s':>9}")
+
+        for label, path, write, read, read_column in (
+            ("text", text_path, save_enriched_data, read_text, read_text_column),
+            ("binary", binary_path, save_enriched_binary, read_binary, read_binary_column),
+        ):
+            write_s, _ = timed(write, enriched, path)
+            read_s, rows = timed(read, path)
+            column_s, _ = timed(read_column, path, "UnitPrice")
+            assert len(rows) == args.rows
+            del rows
+
+            print(f"{label:8} {os.path.getsize(path) / 1e6:>8.1f} {write_s:>8.2f} "
+                  f"{read_s:>8.2f} {column_s:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
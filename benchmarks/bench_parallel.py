@@ -0,0 +1,57 @@
+"""
+Measures parse + validate + aggregate scaling from 1 to N worker processes
+on a generated sales file.
+
+    python -m benchmarks.bench_parallel --rows 5000000
+"""
+import argparse
+import os
+import tempfile
+
+from benchmarks.common import make_transactions, to_lines, timed
+from utils.data_processor import aggregate_sales
+from utils.file_handler import read_sales_data, parse_transactions, validate_and_filter
+from utils.parallel import aggregate_file_parallel
+
+
+def sequential(filename):
+    valid, _, summary = validate_and_filter(parse_transactions(read_sales_data(filename)))
+    return aggregate_sales(valid), summary
+
+
+def write_file(rows, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n")
+        # Generate in blocks to keep memory flat for large row counts
+        block = 500_000
+        for offset in range(0, rows, block):
+            batch = make_transactions(min(block, rows - offset), seed=offset)
+            f.write("\n".join(to_lines(batch)) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sales_data.txt")
+        write_file(args.rows, path)
+        size_mb = os.path.getsize(path) / 1e6
+
+        print(f"{args.rows:,} rows, {size_mb:,.0f} MB")
+
+        base, (_, expected) = timed(sequential, path)
+        print(f"{'sequential':>10} {base:8.2f}s")
+
+        workers = 1
+        while workers <= args.max_workers:
+            seconds, (_, summary) = timed(aggregate_file_parallel, path, workers=workers)
+            assert summary == expected
+            print(f"{workers:>10} {seconds:8.2f}s  {base / seconds:5.2f}x")
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Measures partitioned-input throughput (one file per store, day and region)
+from 1 to N worker processes, and the effect of skipping partitions by region.
+
+    python -m benchmarks.bench_partitions --rows 2000000 --stores 20 --gzip
+"""
+import argparse
+import os
+import tempfile
+
+from benchmarks.common import timed
+from benchmarks.generate_data import write_partitions
+from utils.parallel import aggregate_partitions_parallel
+from utils.partitions import find_partitions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--stores", type=int, default=10)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--gzip", action="store_true", help="gzip the partition files")
+    parser.add_argument("--keep-rows", action="store_true",
+                        help="also send the valid rows back to the parent (as main.py does)")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files, size = write_partitions(tmp, args.rows, stores=args.stores, compress=args.gzip,
+                                       days=args.days)
+        print(f"{args.rows:,} rows in {files:,} files, {size / 1e6:,.0f} MB"
+              f"{' (gzip)' if args.gzip else ''}")
+
+        seconds, (partitions, _) = timed(find_partitions, tmp)
+        print(f"{'listing':>10} {seconds:8.2f}s")
+
+        expected = base = None
+        workers = 1
+        while workers <= args.max_workers:
+            seconds, (_, _, _, summary) = timed(
+                aggregate_partitions_parallel, partitions, workers=workers, keep_rows=args.keep_rows
+            )
+            if expected is None:
+                expected, base = summary, seconds
+            assert summary == expected
+            print(f"{workers:>10} {seconds:8.2f}s  {summary['total_input'] / seconds:>12,.0f} rows/s  "
+                  f"{base / seconds:5.2f}x")
+            workers *= 2
+
+        # Region filter: other regions' directories are never opened
+        seconds, (partitions, skipped) = timed(find_partitions, tmp, region="North")
+        seconds_read, (_, _, _, summary) = timed(
+            aggregate_partitions_parallel, partitions, workers=args.max_workers,
+            region="North", keep_rows=args.keep_rows
+        )
+        print(f"\nregion=North: {len(partitions):,} files read, {skipped:,} skipped, "
+              f"{seconds + seconds_read:.2f}s ({summary['final_count']:,} rows kept)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Times report generation from precomputed aggregates for growing row
+counts, with a share of rows failing enrichment, in each output format.
+
+    python -m benchmarks.bench_report --rows 10000 100000 1000000 --failed 0.2
+"""
+import argparse
+import os
+import tempfile
+
+from benchmarks.common import make_transactions, timed
+from utils.data_processor import aggregate_sales
+from utils.api_handler import summarize_enrichment
+from utils.report import REPORT_FORMATS, write_report
+
+
+def enrichment_for(transactions, failed):
+    """
+    Summarizes enrichment as if every `1 / failed`-th product were missing from the API.
+    """
+    step = max(1, round(1 / failed)) if failed else 0
+    for tx in transactions:
+        tx["API_Match"] = not (step and int(tx["ProductID"][1:]) % step == 0)
+    return summarize_enrichment(transactions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--failed", type=float, default=0.2, help="share of products that fail enrichment")
+    args = parser.parse_args()
+
+    print(f"{'Rows':>10} {'Format':6} {'Seconds':>8} {'KB':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            transactions = make_transactions(rows)
+            aggregates = aggregate_sales(transactions)
+            enrichment = enrichment_for(transactions, args.failed)
+            del transactions
+
+            for fmt in REPORT_FORMATS:
+                path = os.path.join(tmp, "report.txt")
+                seconds, (written,) = timed(write_report, aggregates, enrichment, path, (fmt,))
+                print(f"{rows:>10,} {fmt:6} {seconds:>8.4f} {os.path.getsize(written) / 1e3:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
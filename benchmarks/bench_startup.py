@@ -0,0 +1,193 @@
+"""
+Measures cold-start time of main.py in fresh interpreters with -X importtime
+and saves it as JSON, to track startup latency across commits.
+
+    python -m benchmarks.bench_startup --runs 20
+    python -m benchmarks.bench_startup --compare benchmarks/results/startup_old.json --max-ratio 1.2
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.generate_data import write_sales_file
+from benchmarks.run_suite import DEFAULT_RESULTS_DIR, _git_revision
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Repo modules are reported separately from the standard library and packages
+OWN_MODULES = ("main", "utils")
+
+
+def scenarios(input_file):
+    """
+    Interpreter arguments per scenario. "query" is a short analytics-only
+    run: it indexes a small file and exits on end of input, never enriching.
+    """
+    return {
+        "import": ["-c", "import main"],
+        "help": ["main.py", "--help"],
+        "query": ["main.py", "--query", "--input", input_file, "--no-parse-cache"],
+    }
+
+
+def parse_importtime(stderr):
+    """
+    Parses -X importtime output into ({module: self µs}, total µs), where
+    the total is the sum of the top-level imports' cumulative times.
+    """
+
+    modules = {}
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(self_us)
+        # Nesting is shown by indentation after the "|"
+        if not name[1:].startswith(" "):
+            total += int(cumulative_us)
+    return modules, total
+
+
+def run_once(args, env):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE, text=True
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} exited with {result.returncode}:\n{result.stderr[-2000:]}")
+    modules, total = parse_importtime(result.stderr)
+    return wall, total, modules
+
+
+def measure(args, runs, env, top):
+    walls, imports, self_times = [], [], {}
+    for _ in range(runs):
+        wall, total, modules = run_once(args, env)
+        walls.append(wall * 1000)
+        imports.append(total / 1000)
+        for name, us in modules.items():
+            self_times.setdefault(name, []).append(us / 1000)
+
+    # Median self time per module (0 in runs that did not import it)
+    medians = {
+        name: statistics.median(values + [0.0] * (runs - len(values)))
+        for name, values in self_times.items()
+    }
+    slowest = sorted(medians.items(), key=lambda x: x[1], reverse=True)
+
+    return {
+        "runs": runs,
+        "wall_ms": round(statistics.median(walls), 2),
+        "wall_ms_min": round(min(walls), 2),
+        "import_ms": round(statistics.median(imports), 2),
+        "modules": len(medians),
+        "own_import_ms": round(sum(
+            ms for name, ms in medians.items() if name.split(".")[0] in OWN_MODULES
+        ), 2),
+        "top_modules": [[name, round(ms, 3)] for name, ms in slowest[:top]],
+    }
+
+
+def compare(current, previous, max_ratio=None):
+    """
+    Prints median wall-time ratios against a previous results file.
+    Returns the scenarios slower than `max_ratio`.
+    """
+
+    print(f"\nCompared with {previous.get('revision') or 'previous run'} "
+          f"({previous.get('created', '?')}); ratio < 1 is faster")
+
+    regressions = []
+    for name, entry in current["scenarios"].items():
+        before = previous["scenarios"].get(name)
+        if not before or not before["wall_ms"]:
+            continue
+        ratio = entry["wall_ms"] / before["wall_ms"]
+        print(f"  {name:<8} {before['wall_ms']:>8.1f} ms -> {entry['wall_ms']:>8.1f} ms  {ratio:5.2f}x")
+        if max_ratio is not None and ratio > max_ratio:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="fresh interpreters per scenario")
+    parser.add_argument("--rows", type=int, default=1000, help="input rows for the query scenario")
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list")
+    parser.add_argument(
+        "--no-bytecode",
+        action="store_true",
+        help="measure without cached bytecode (default: warm up once so .pyc files exist, "
+             "as on an installed system)"
+    )
+    parser.add_argument("--output", help="results file (default: benchmarks/results/startup_<time>_<rev>.json)")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument("--max-ratio", type=float,
+                        help="with --compare, exit with status 1 if a scenario is slower than this")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.no_bytecode:
+        env["PYTHONDONTWRITEBYTECODE"] = "1"
+    else:
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+
+    revision = _git_revision()
+    created = datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+    results = {
+        "revision": revision,
+        "created": created,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare", "max_ratio")},
+        "scenarios": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sales.txt")
+        write_sales_file(path, args.rows)
+
+        print(f"{'Scenario':10} {'wall ms':>9} {'min ms':>9} {'import ms':>10} {'own ms':>8} {'modules':>8}")
+        for name, scenario_args in scenarios(path).items():
+            if not args.no_bytecode:
+                run_once(scenario_args, env)
+            entry = results["scenarios"][name] = measure(scenario_args, args.runs, env, args.top)
+            print(f"{name:10} {entry['wall_ms']:>9.1f} {entry['wall_ms_min']:>9.1f} "
+                  f"{entry['import_ms']:>10.1f} {entry['own_import_ms']:>8.1f} {entry['modules']:>8}")
+
+    slowest = results["scenarios"]["import"]["top_modules"]
+    print("\nSlowest modules for 'import main' (median self ms):")
+    for name, ms in slowest:
+        print(f"  {name:<40} {ms:>7.2f}")
+
+    output = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"startup_{created.replace(':', '')}_{revision or 'unknown'}.json"
+    )
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to: {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.max_ratio)
+        if regressions:
+            print(f"\nStartup regression (> {args.max_ratio:g}x): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
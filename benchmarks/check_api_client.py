@@ -0,0 +1,118 @@
+"""
+Runs enrich_sales_data against the local stub with injected faults and
+checks that the API client's retries, rate limit, deadline and circuit
+breaker keep enrichment correct and its run time bounded, and that ids
+found in the bulk catalog are not fetched again.
+
+    python -m benchmarks.check_api_client --products 200
+"""
+import argparse
+import sys
+import time
+
+from benchmarks.common import make_transactions
+from benchmarks.stub_server import start_stub_server
+from utils.api_client import CircuitBreaker, ProductAPIClient
+from utils.api_handler import create_product_mapping, enrich_sales_data
+
+
+def run(server, base_url, transactions, product_map=None, faults=None, **client_options):
+    """
+    Enriches the transactions with the given stub faults.
+    Returns (seconds, match share, requests seen by the stub, client).
+    """
+
+    faults = faults or {}
+    previous = {name: getattr(server, name) for name in faults}
+    for name, value in faults.items():
+        setattr(server, name, value)
+    server.request_count = 0
+
+    client_options.setdefault("timeout", (1, 1))
+    client_options.setdefault("backoff", 0.05)
+    client = ProductAPIClient(base_url, **client_options)
+
+    start = time.perf_counter()
+    try:
+        with client:
+            enriched = enrich_sales_data(transactions, product_map, client=client)
+    finally:
+        for name, value in previous.items():
+            setattr(server, name, value)
+    seconds = time.perf_counter() - start
+
+    matched = sum(tx["API_Match"] for tx in enriched) / len(enriched)
+    return seconds, matched, server.request_count, client
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    products = args.products
+    transactions = make_transactions(args.rows, products=products)
+    server, base_url = start_stub_server(catalog_size=products + 100, seed=args.seed)
+
+    # make_transactions uses P100..; list the first 100 + products/2 of them in
+    # bulk so about half of the products come from the catalog
+    with ProductAPIClient(base_url) as client:
+        bulk = client.get_json("/products", params={"limit": 100 + products // 2})["products"]
+        catalog, _ = client.fetch_pages("/products", "products", page_size=50)
+    product_map = create_product_mapping(bulk)
+    full_map = create_product_mapping(catalog)
+    bulk_share = sum(1 for n in range(100, 100 + products) if n in product_map) / products
+
+    # name, stub faults, client options, product map, check(seconds, matched, requests, client)
+    scenarios = [
+        ("healthy", {}, {}, None,
+         lambda s, m, r, c: m == 1 and r == products),
+        ("healthy, full catalog", {}, {}, full_map,
+         lambda s, m, r, c: m == 1 and r == 0),
+        ("healthy, half catalog", {}, {}, product_map,
+         lambda s, m, r, c: m == 1 and r == round(products * (1 - bulk_share))),
+        ("30% HTTP 503", {"fail_rate": 0.3}, {"retries": 5}, None,
+         lambda s, m, r, c: m == 1 and c.stats["retries"] > 0),
+        ("10% dropped connections", {"drop_rate": 0.1}, {"retries": 5}, None,
+         lambda s, m, r, c: m == 1),
+        ("20% HTTP 429 (Retry-After)", {"fail_rate": 0.2, "fail_status": 429}, {"retries": 5}, None,
+         lambda s, m, r, c: m == 1),
+        ("10% slow (3s > 1s timeout)", {"slow_rate": 0.1, "slow_latency": 3.0}, {"retries": 5}, None,
+         lambda s, m, r, c: m == 1 and s < 10),
+        ("outage, half catalog", {"fail_rate": 1.0},
+         {"breaker": CircuitBreaker(failure_threshold=5, reset_timeout=60)}, product_map,
+         lambda s, m, r, c: c.breaker.trips >= 1 and r < products and abs(m - bulk_share) < 0.02),
+        ("0.5s latency, 2s deadline", {"latency": 0.5}, {"deadline": 2.0, "max_workers": 4}, product_map,
+         lambda s, m, r, c: s < 3.5 and c.stats["unavailable"] > 0 and m >= bulk_share - 0.02),
+        ("rate limit 100 req/s", {}, {"rate_limit": 100.0}, None,
+         lambda s, m, r, c: m == 1 and s >= (products - 100) / 100 * 0.9),
+    ]
+
+    print(f"{args.rows:,} rows, {products} distinct products, {len(bulk)} in the bulk list")
+    print(f"{'Scenario':30} {'Seconds':>8} {'Matched':>8} {'Requests':>9} {'Retries':>8} "
+          f"{'Gave up':>8} {'Trips':>6}  Result")
+
+    failures = 0
+    try:
+        for name, faults, options, mapping, check in scenarios:
+            seconds, matched, requests, client = run(
+                server, base_url, transactions, mapping, faults, **options
+            )
+            ok = check(seconds, matched, requests, client)
+            failures += not ok
+            print(f"{name:30} {seconds:>8.2f} {matched:>8.1%} {requests:>9} "
+                  f"{client.stats['retries']:>8} {client.stats['unavailable']:>8} "
+                  f"{client.breaker.trips:>6}  {'ok' if ok else 'FAIL'}")
+    finally:
+        server.shutdown()
+
+    if failures:
+        print(f"\n{failures} scenario(s) failed")
+        sys.exit(1)
+    print("\nAll scenarios passed")
+
+
+if __name__ == "__main__":
+    main()
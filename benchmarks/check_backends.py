@@ -0,0 +1,120 @@
+"""
+Differential check and timing for the NumPy backend: validates and aggregates
+the same data with the pure-Python and vectorized paths and fails on any difference.
+
+    python -m benchmarks.check_backends --rows 1000000
+"""
+import argparse
+import random
+import sys
+
+from benchmarks.common import make_transactions, timed
+from utils import numpy_backend
+from utils.columnar import ColumnarTransactions
+from utils.file_handler import validate_and_filter
+from utils.data_processor import (
+    aggregate_sales,
+    calculate_total_revenue,
+    region_wise_sales,
+    top_selling_products,
+    customer_analysis,
+    daily_sales_trend,
+    find_peak_sales_day,
+    low_performing_products
+)
+
+
+FILTERS = [
+    {},
+    {"region": "North"},
+    {"min_amount": 5000, "max_amount": 50000},
+    {"region": "West", "min_amount": 100000},
+    {"region": "Nowhere"},
+    {"from_date": "2024-03-01", "to_date": "2024-03-31"},
+    {"region": "East", "from_date": "2024-06-15", "min_amount": 5000},
+]
+
+
+def dirty(transactions, seed=7):
+    """
+    Mixes in rows that each break one validation rule.
+    """
+    rng = random.Random(seed)
+    breakers = [
+        ("Quantity", 0), ("Quantity", -3), ("UnitPrice", 0.0), ("UnitPrice", float("nan")),
+        ("TransactionID", "X001"), ("ProductID", "Q100"), ("CustomerID", "Z9"), ("Region", "")
+    ]
+    for tx in transactions:
+        if rng.random() < 0.05:
+            field, value = rng.choice(breakers)
+            tx[field] = value
+    return transactions
+
+
+def compute(columns, filters):
+    valid, invalid, summary = validate_and_filter(columns, **filters)
+    return valid, invalid, summary, aggregate_sales(valid)
+
+
+def snapshot(valid, invalid, summary, agg):
+    customers = customer_analysis(agg)
+    for stats in customers.values():
+        stats["products_bought"] = sorted(stats["products_bought"])
+
+    return {
+        "rows": list(valid),
+        "invalid": invalid,
+        "summary": summary,
+        "total": calculate_total_revenue(agg),
+        "regions": list(region_wise_sales(agg).items()),
+        "top": top_selling_products(agg),
+        "customers": list(customers.items()),
+        "daily": list(daily_sales_trend(agg).items()),
+        "peak": find_peak_sales_day(agg) if agg["daily"] else None,
+        "low": low_performing_products(agg),
+    }
+
+
+def run(columns, filters, use_numpy):
+    numpy_backend.ENABLED = use_numpy
+    try:
+        seconds, result = timed(compute, columns, filters)
+        return seconds, snapshot(*result)
+    finally:
+        numpy_backend.ENABLED = True
+
+
+def same(a, b):
+    # NaN never equals itself, so compare through repr
+    return repr(a) == repr(b)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    if not numpy_backend.available():
+        print("NumPy is not installed; nothing to compare.")
+        return 0
+
+    columns = ColumnarTransactions.from_transactions(dirty(make_transactions(args.rows)))
+
+    failures = 0
+    print(f"{'Filters':66} {'Python s':>9} {'NumPy s':>9}  Result")
+
+    for filters in FILTERS:
+        py_s, expected = run(columns, filters, use_numpy=False)
+        np_s, actual = run(columns, filters, use_numpy=True)
+
+        mismatched = [key for key in expected if not same(expected[key], actual[key])]
+        failures += bool(mismatched)
+
+        result = "OK" if not mismatched else "MISMATCH: " + ", ".join(mismatched)
+        print(f"{str(filters):66} {py_s:>9.2f} {np_s:>9.2f}  {result}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
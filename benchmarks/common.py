@@ -0,0 +1,50 @@
+import random
+import time
+
+
+REGIONS = ["North", "South", "East", "West"]
+
+
+def make_transactions(rows, products=200, customers=5000, days=365, seed=42):
+    """
+    Builds an in-memory list of already-parsed transaction dicts.
+    """
+
+    rng = random.Random(seed)
+    dates = [f"2024-{1 + d // 31 % 12:02d}-{1 + d % 28:02d}" for d in range(days)]
+
+    transactions = []
+    for i in range(rows):
+        p = rng.randrange(products)
+        transactions.append({
+            "TransactionID": f"T{i:07d}",
+            "Date": dates[rng.randrange(days)],
+            "ProductID": f"P{100 + p}",
+            "ProductName": f"Product {p}",
+            "Quantity": rng.randint(1, 20),
+            "UnitPrice": float(rng.randint(50, 50000)),
+            "CustomerID": f"C{rng.randrange(customers):05d}",
+            "Region": REGIONS[rng.randrange(len(REGIONS))]
+        })
+
+    return transactions
+
+
+def timed(func, *args, **kwargs):
+    """
+    Returns (seconds, result) for a single call.
+    """
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def to_lines(transactions):
+    """
+    Formats parsed transactions back into raw pipe-delimited lines.
+    """
+    return [
+        f"{t['TransactionID']}|{t['Date']}|{t['ProductID']}|{t['ProductName']}|"
+        f"{t['Quantity']}|{t['UnitPrice']:.0f}|{t['CustomerID']}|{t['Region']}"
+        for t in transactions
+    ]
@@ -0,0 +1,198 @@
+"""
+Writes a synthetic sales file in the read_sales_data format, including the
+dirty rows parse_transactions and validate_and_filter have to deal with.
+
+    python -m benchmarks.generate_data output/sales_10m.txt --rows 10000000 --products 500
+    python -m benchmarks.generate_data output/sales_parts --rows 1000000 --stores 20 --gzip
+"""
+import argparse
+import datetime
+import gzip
+import os
+import random
+
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region"
+
+REGIONS = ["North", "South", "East", "West", "Central", "Northeast", "Northwest", "Southeast"]
+
+# Each kind appears in roughly the same share of the dirty rows
+DIRTY_KINDS = (
+    "comma_price",      # "1,916"   -> parsed, valid
+    "comma_name",       # "Mouse,Wireless" -> parsed, valid
+    "extra_field",      # 9 fields  -> dropped by the parser
+    "missing_field",    # 7 fields  -> dropped by the parser
+    "bad_number",       # "abc"     -> dropped by the parser
+    "zero_quantity",    # 0         -> invalid
+    "bad_id",           # X/Q/Z ids -> invalid
+    "missing_region",   # ""        -> invalid
+    "blank_line",       # skipped by the reader
+)
+
+
+def _catalog(products, missing_products):
+    """
+    Product ids start at P101 like the sample data. With missing_products > 0
+    the last ids are outside the stub catalog so enrichment has misses.
+    """
+    names = [f"Product {p}" for p in range(products)]
+    ids = [f"P{101 + p}" for p in range(products)]
+    for p in range(products - missing_products, products):
+        ids[p] = f"P{900000 + p}"
+    return ids, names
+
+
+def _dates(days, start=datetime.date(2024, 1, 1)):
+    return [(start + datetime.timedelta(days=d)).isoformat() for d in range(days)]
+
+
+def _dirty_line(rng, kind, tid, date, pid, pname, qty, price, cid, region):
+    if kind == "comma_price":
+        price = f"{price:,}"
+    elif kind == "comma_name":
+        pname = pname.replace(" ", ",", 1)
+    elif kind == "extra_field":
+        return f"{tid}|{date}|{pid}|{pname}|{qty}|{price}|{cid}|{region}|extra"
+    elif kind == "missing_field":
+        return f"{tid}|{date}|{pid}|{qty}|{price}|{cid}|{region}"
+    elif kind == "bad_number":
+        qty = "abc"
+    elif kind == "zero_quantity":
+        qty = 0
+    elif kind == "bad_id":
+        field = rng.randrange(3)
+        if field == 0:
+            tid = "X" + tid[1:]
+        elif field == 1:
+            pid = "Q" + pid[1:]
+        else:
+            cid = "Z" + cid[1:]
+    elif kind == "missing_region":
+        region = ""
+    elif kind == "blank_line":
+        return ""
+
+    return f"{tid}|{date}|{pid}|{pname}|{qty}|{price}|{cid}|{region}"
+
+
+def iter_lines(rows, products=200, customers=5000, days=365, regions=4,
+               dirty=0.05, missing_products=0, seed=42):
+    """
+    Yields `rows` data lines (no header). Output is fully determined by the
+    arguments, so the same seed always gives the same file.
+    """
+
+    rng = random.Random(seed)
+    randrange = rng.randrange
+    random_ = rng.random
+
+    ids, names = _catalog(products, missing_products)
+    dates = _dates(days)
+    region_names = REGIONS[:regions]
+    customer_ids = [f"C{c:06d}" for c in range(customers)]
+
+    for i in range(rows):
+        p = randrange(products)
+        tid = f"T{i:09d}"
+        date = dates[randrange(days)]
+        qty = 1 + randrange(20)
+        price = 50 + randrange(50000)
+        cid = customer_ids[randrange(customers)]
+        region = region_names[randrange(regions)]
+
+        if dirty and random_() < dirty:
+            kind = DIRTY_KINDS[randrange(len(DIRTY_KINDS))]
+            yield _dirty_line(rng, kind, tid, date, ids[p], names[p], qty, price, cid, region)
+        else:
+            yield f"{tid}|{date}|{ids[p]}|{names[p]}|{qty}|{price}|{cid}|{region}"
+
+
+def write_sales_file(path, rows, block=100_000, **options):
+    """
+    Writes the header and `rows` lines to `path` in blocks so memory stays flat.
+    Options are passed to iter_lines. Returns the number of bytes written.
+    """
+
+    lines = iter_lines(rows, **options)
+    written = 0
+
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        written += f.write(HEADER + "\n")
+        remaining = rows
+        while remaining:
+            n = min(block, remaining)
+            written += f.write("\n".join(next(lines) for _ in range(n)) + "\n")
+            remaining -= n
+
+    return written
+
+
+def write_partitions(root, rows, stores=10, compress=False, **options):
+    """
+    Writes the same rows as write_sales_file as one file per store, day and
+    region: root/date=YYYY-MM-DD/region=<name>/store_NN.txt (.txt.gz with
+    compress). Rows are held in memory until written.
+    Returns (number of files, bytes written).
+    """
+
+    partitions = {}
+    for i, line in enumerate(iter_lines(rows, **options)):
+        parts = line.split("|")
+        if len(parts) < 7:
+            continue  # blank line
+        # Rows with a field missing or extra still have the region 7th or 8th
+        region = parts[7] if len(parts) > 7 else parts[-1]
+        key = (parts[1], region or "Unknown", i % stores)
+        partitions.setdefault(key, []).append(line)
+
+    written = 0
+    for (date, region, store), lines in partitions.items():
+        folder = os.path.join(root, f"date={date}", f"region={region}")
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"store_{store:02d}.txt" + (".gz" if compress else ""))
+        data = (HEADER + "\n" + "\n".join(lines) + "\n").encode("utf-8")
+        with (gzip.open if compress else open)(path, "wb") as f:
+            f.write(data)
+        written += os.path.getsize(path)
+
+    return len(partitions), written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--customers", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--regions", type=int, default=4, choices=range(1, len(REGIONS) + 1))
+    parser.add_argument("--dirty", type=float, default=0.05, help="share of dirty rows (0-1)")
+    parser.add_argument("--missing-products", type=int, default=0,
+                        help="number of product ids the API does not know")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--stores", type=int,
+                        help="write a directory with one file per store, day and region instead")
+    parser.add_argument("--gzip", action="store_true", help="with --stores, gzip the files")
+    args = parser.parse_args()
+
+    if args.stores:
+        files, size = write_partitions(
+            args.path, args.rows, stores=args.stores, compress=args.gzip,
+            products=args.products, customers=args.customers, days=args.days,
+            regions=args.regions, dirty=args.dirty,
+            missing_products=args.missing_products, seed=args.seed
+        )
+        print(f"Wrote {args.rows:,} rows ({size / 1e6:,.1f} MB) to {files:,} files in {args.path}")
+        return
+
+    size = write_sales_file(
+        args.path, args.rows,
+        products=args.products, customers=args.customers, days=args.days,
+        regions=args.regions, dirty=args.dirty,
+        missing_products=args.missing_products, seed=args.seed
+    )
+    print(f"Wrote {args.rows:,} rows ({size / 1e6:,.1f} MB) to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
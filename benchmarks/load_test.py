@@ -0,0 +1,144 @@
+"""
+Load-tests the analytics service (main.py --serve) with concurrent
+clients and reports latency percentiles per endpoint.
+
+Without --url a file is generated and a service is started in-process.
+
+    python -m benchmarks.load_test --rows 1000000 --clients 16 --requests 5000
+    python -m benchmarks.load_test --url http://127.0.0.1:8080 --clients 32
+"""
+import argparse
+import http.client
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from benchmarks.generate_data import write_sales_file
+from utils.service import AnalyticsService, start_service
+
+
+REGIONS = ["North", "South", "East", "West"]
+
+
+def make_requests(count, products, seed):
+    """
+    A mix of unfiltered and filtered analytics requests, as (label, path).
+    Filters repeat, as dashboards' queries do.
+    """
+
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(count):
+        region = rng.choice(REGIONS)
+        low = rng.choice((0, 1000, 10000, 50000))
+        product = f"P{100 + rng.randrange(products)}"
+        paths.append(rng.choice((
+            ("/regions", "/regions"),
+            ("/products/top", "/products/top?n=5"),
+            ("/customers", "/customers?limit=20"),
+            ("/daily", "/daily"),
+            ("/regions filtered", f"/regions?min={low}"),
+            ("/query region+min", f"/query?region={region}&min={low}"),
+            ("/query product", f"/query?product={product}"),
+            ("/daily filtered", f"/daily?region={region}"),
+        )))
+    return paths
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1)))
+    return sorted_values[i]
+
+
+def run(base_url, paths, clients):
+    """
+    Sends the (label, path) requests from `clients` threads, one keep-alive
+    connection each (http.client: a heavier client would dominate the timings).
+    Returns ({endpoint: [latency ms]}, error count, seconds).
+    """
+
+    url = urlparse(base_url)
+    local = threading.local()
+    latencies = {}
+    errors = [0]
+    lock = threading.Lock()
+
+    def send(request):
+        label, path = request
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            conn = local.conn = http.client.HTTPConnection(url.hostname, url.port, timeout=30)
+        start = time.perf_counter()
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            ok = False
+        elapsed = (time.perf_counter() - start) * 1000
+
+        with lock:
+            latencies.setdefault(label, []).append(elapsed)
+            errors[0] += not ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(send, paths))
+    return latencies, errors[0], time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="running service; default: start one on a generated file")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    server = None
+    with tempfile.TemporaryDirectory() as tmp:
+        base_url = args.url
+        if base_url is None:
+            path = os.path.join(tmp, "sales.txt")
+            write_sales_file(path, args.rows, products=args.products, seed=args.seed)
+            start = time.perf_counter()
+            service = AnalyticsService(path, reload_interval=0)
+            print(f"Loaded and indexed {len(service.dataset.valid):,} rows in "
+                  f"{time.perf_counter() - start:.1f}s")
+            server, base_url = start_service(service, port=0)
+
+        try:
+            paths = make_requests(args.requests, args.products, args.seed)
+            latencies, errors, seconds = run(base_url, paths, args.clients)
+        finally:
+            if server is not None:
+                server.shutdown()
+
+    print(f"{args.requests:,} requests, {args.clients} clients: {args.requests / seconds:,.0f} req/s, "
+          f"{errors} errors\n")
+    print(f"{'Endpoint':22} {'Count':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+
+    everything = []
+    for endpoint, values in sorted(latencies.items()):
+        values.sort()
+        everything.extend(values)
+        print(f"{endpoint:22} {len(values):>6} {percentile(values, 50):>8.2f} "
+              f"{percentile(values, 90):>8.2f} {percentile(values, 99):>8.2f} {values[-1]:>8.2f}")
+
+    everything.sort()
+    print(f"{'all':22} {len(everything):>6} {percentile(everything, 50):>8.2f} "
+          f"{percentile(everything, 90):>8.2f} {percentile(everything, 99):>8.2f} {everything[-1]:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
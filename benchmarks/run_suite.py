@@ -0,0 +1,215 @@
+"""
+Runs the batch pipeline on generated files of growing size and saves
+per-stage and per-function timings as JSON for comparison across commits.
+
+    python -m benchmarks.run_suite --rows 10000 100000 1000000
+    python -m benchmarks.run_suite --rows 1000000 --compare benchmarks/results/old.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import tempfile
+
+from benchmarks.generate_data import write_sales_file
+from benchmarks.stub_server import start_stub_server
+from utils import api_handler, metrics, numpy_backend
+from utils.metrics import stage
+from utils.file_handler import read_sales_data, parse_transactions, validate_and_filter
+from utils.data_processor import (
+    aggregate_sales,
+    calculate_total_revenue,
+    region_wise_sales,
+    top_selling_products,
+    customer_analysis,
+    daily_sales_trend,
+    find_peak_sales_day,
+    low_performing_products
+)
+
+
+DEFAULT_RESULTS_DIR = "benchmarks/results"
+
+
+def run_pipeline(path, report_path, base_url, workers, columnar=False):
+    """
+    The same stages main.py runs in batch mode, with enrichment pointed at the stub.
+    """
+
+    with stage("read") as record:
+        raw_lines = read_sales_data(path)
+        record["rows_out"] = len(raw_lines)
+
+    with stage("parse", rows_in=len(raw_lines)) as record:
+        transactions = parse_transactions(raw_lines, columnar=columnar)
+        record["rows_out"] = len(transactions)
+    del raw_lines
+
+    with stage("validate", rows_in=len(transactions)) as record:
+        valid, _, _ = validate_and_filter(transactions)
+        record["rows_out"] = len(valid)
+    del transactions
+
+    with stage("analyze", rows_in=len(valid)):
+        aggregates = aggregate_sales(valid)
+        for func in (calculate_total_revenue, region_wise_sales, top_selling_products,
+                     customer_analysis, daily_sales_trend, find_peak_sales_day,
+                     low_performing_products):
+            func(aggregates)
+
+    if base_url is None:
+        return
+
+    with stage("enrich", rows_in=len(valid)) as record:
+        product_map = api_handler.create_product_mapping(api_handler.fetch_all_products())
+        enriched = api_handler.enrich_sales_data(valid, product_map, max_workers=workers,
+                                                 base_url=base_url)
+        record["rows_out"] = len(enriched)
+
+    with stage("report", rows_in=len(valid)):
+        api_handler.generate_sales_report(valid, enriched, output_file=report_path,
+                                          aggregates=aggregates)
+
+
+def summarize_records(records):
+    """
+    Groups metric records by kind and name, summing time over repeated calls.
+    """
+
+    grouped = {"stage": {}, "function": {}}
+    for r in records:
+        entry = grouped[r["kind"]].setdefault(r["name"], {
+            "calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0,
+            "rows_in": r["rows_in"], "rows_out": r["rows_out"],
+            "http_calls": 0, "peak_rss_bytes": None,
+        })
+        entry["calls"] += 1
+        entry["wall_seconds"] = round(entry["wall_seconds"] + r["wall_seconds"], 6)
+        entry["cpu_seconds"] = round(entry["cpu_seconds"] + r["cpu_seconds"], 6)
+        entry["http_calls"] += r["http_calls"]
+        entry["peak_rss_bytes"] = r["peak_rss_bytes"]
+    return grouped
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, previous):
+    """
+    Prints wall-time ratios against a previous results file
+    for every stage/function present in both.
+    """
+
+    old_runs = {run["rows"]: run for run in previous["runs"]}
+    print(f"\nCompared with {previous.get('revision') or 'previous run'} "
+          f"({previous.get('created', '?')}); ratio < 1 is faster")
+
+    for run in current["runs"]:
+        old = old_runs.get(run["rows"])
+        if old is None:
+            continue
+        print(f"\n{run['rows']:,} rows")
+        for kind in ("stage", "function"):
+            for name, entry in run[kind].items():
+                before = old[kind].get(name)
+                if not before or not before["wall_seconds"]:
+                    continue
+                ratio = entry["wall_seconds"] / before["wall_seconds"]
+                print(f"  {kind:<8} {name:<24} {before['wall_seconds']:>9.3f}s "
+                      f"-> {entry['wall_seconds']:>9.3f}s  {ratio:5.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--customers", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--regions", type=int, default=4)
+    parser.add_argument("--dirty", type=float, default=0.05)
+    parser.add_argument("--missing-products", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--columnar", action="store_true", help="parse into ColumnarTransactions")
+    parser.add_argument("--latency", type=float, default=0.0, help="stub API latency in seconds")
+    parser.add_argument("--workers", type=int, default=api_handler.DEFAULT_WORKERS)
+    parser.add_argument("--no-enrich", action="store_true", help="skip enrichment and report")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<time>_<rev>.json)")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    args = parser.parse_args()
+
+    revision = _git_revision()
+    created = datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+
+    results = {
+        "revision": revision,
+        "created": created,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": numpy_backend.enabled(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "runs": [],
+    }
+
+    server = base_url = None
+    if not args.no_enrich:
+        server, base_url = start_stub_server(latency=args.latency,
+                                             catalog_size=101 + args.products)
+        # fetch_all_products reads the module-level base URL
+        api_handler.API_BASE_URL = base_url
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for rows in args.rows:
+                path = os.path.join(tmp, f"sales_{rows}.txt")
+                size = write_sales_file(
+                    path, rows,
+                    products=args.products, customers=args.customers, days=args.days,
+                    regions=args.regions, dirty=args.dirty,
+                    missing_products=args.missing_products, seed=args.seed
+                )
+
+                collector = metrics.enable()
+                try:
+                    run_pipeline(path, os.path.join(tmp, "report.txt"), base_url,
+                                 args.workers, columnar=args.columnar)
+                finally:
+                    metrics.disable()
+                os.remove(path)
+
+                run = {"rows": rows, "file_bytes": size, "http_calls": collector.counters["http_calls"]}
+                run.update(summarize_records(collector.records))
+                results["runs"].append(run)
+
+                print(f"\n{rows:,} rows ({size / 1e6:,.1f} MB)")
+                for name, entry in run["stage"].items():
+                    print(f"  {name:<10} {entry['wall_seconds']:>9.3f}s  "
+                          f"{rows / max(entry['wall_seconds'], 1e-9):>12,.0f} rows/s")
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    output = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"{created.replace(':', '')}_{revision or 'unknown'}.json"
+    )
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to: {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
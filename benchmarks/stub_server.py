@@ -0,0 +1,175 @@
+"""
+Minimal local stand-in for the dummyjson products API used by benchmarks.
+Can inject faults (error statuses, slow responses, dropped connections)
+to exercise the API client's retries, deadline and circuit breaker.
+
+    python -m benchmarks.stub_server --port 8765 --latency 0.02
+    python -m benchmarks.stub_server --fail-rate 0.3 --slow-rate 0.05 --slow-latency 5
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+CATEGORIES = ["mobile-accessories", "laptops", "smartphones", "tablets"]
+BRANDS = ["Apple", "Beats", "TechGear", "GadgetMaster"]
+
+
+def make_product(num_id):
+    return {
+        "id": num_id,
+        "title": f"Product {num_id}",
+        "category": CATEGORIES[num_id % len(CATEGORIES)],
+        "brand": BRANDS[num_id % len(BRANDS)],
+        "rating": round(3 + (num_id % 20) / 10, 2),
+        "price": float(10 + num_id)
+    }
+
+
+class StubServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 overflows with 16+ concurrent clients,
+    # and every dropped SYN costs about a second before it is retried
+    request_queue_size = 128
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY every
+    # keep-alive request waits on a delayed ACK (~40ms)
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+            roll = server.rng.random()
+
+        if server.latency:
+            time.sleep(server.latency)
+
+        # Faults: [0, drop) drop, [drop, drop + fail) error, next slow_rate slow
+        if roll < server.drop_rate:
+            server.faults += 1
+            self.close_connection = True
+            self.connection.close()
+            return
+        roll -= server.drop_rate
+        if roll < server.fail_rate:
+            server.faults += 1
+            headers = {"Retry-After": "1"} if server.fail_status == 429 else {}
+            return self._send(server.fail_status, {"message": "injected failure"}, headers)
+        roll -= server.fail_rate
+        if roll < server.slow_rate:
+            server.faults += 1
+            time.sleep(server.slow_latency)
+
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+
+        if parts == ["products"]:
+            query = parse_qs(url.query)
+            limit = int(query.get("limit", ["30"])[0])
+            skip = int(query.get("skip", ["0"])[0])
+            ids = range(1 + skip, 1 + min(skip + limit, server.catalog_size))
+            products = [make_product(i) for i in ids]
+            if "select" in query:
+                fields = ["id"] + query["select"][0].split(",")
+                products = [{f: p[f] for f in fields if f in p} for p in products]
+            body = {
+                "products": products,
+                "total": server.catalog_size,
+                "skip": skip,
+                "limit": len(ids)
+            }
+            return self._send(200, body)
+
+        if len(parts) == 2 and parts[0] == "products" and parts[1].isdigit():
+            num_id = int(parts[1])
+            if 1 <= num_id <= server.catalog_size:
+                return self._send(200, make_product(num_id))
+
+        self._send(404, {"message": "not found"})
+
+    def _send(self, status, body, headers=None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (timeout or deadline) before the reply
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(port=0, latency=0.0, catalog_size=1000, fail_rate=0.0, fail_status=503,
+                      slow_rate=0.0, slow_latency=5.0, drop_rate=0.0, seed=None):
+    """
+    Starts the stub in a background thread.
+    Returns (server, base_url); call server.shutdown() when done.
+
+    Each request independently fails with `fail_status` (fail_rate), is
+    answered after an extra `slow_latency` seconds (slow_rate), or has its
+    connection closed without a response (drop_rate). The rates can be
+    changed on the running server, e.g. server.fail_rate = 1.0 for an outage.
+    """
+
+    server = StubServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.catalog_size = catalog_size
+    server.fail_rate = fail_rate
+    server.fail_status = fail_status
+    server.slow_rate = slow_rate
+    server.slow_latency = slow_latency
+    server.drop_rate = drop_rate
+    server.rng = random.Random(seed)
+    server.request_count = 0
+    server.faults = 0
+    server.lock = threading.Lock()
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--catalog-size", type=int, default=1000)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered with --fail-status")
+    parser.add_argument("--fail-status", type=int, default=503)
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="share of requests delayed by --slow-latency")
+    parser.add_argument("--slow-latency", type=float, default=5.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="share of connections closed without a response")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(
+        args.port, args.latency, args.catalog_size,
+        fail_rate=args.fail_rate, fail_status=args.fail_status,
+        slow_rate=args.slow_rate, slow_latency=args.slow_latency,
+        drop_rate=args.drop_rate, seed=args.seed
+    )
+    print(f"Serving stub API at {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,69 @@
+import os
 import sys
+import time
+import argparse
+from contextlib import nullcontext
 from utils.file_handler import (
     read_sales_data,
     parse_transactions,
-    validate_and_filter
+    validate_and_filter,
+    iter_transactions_mmap,
+    iter_valid_transactions,
+    new_validation_summary,
+    merge_validation_summaries
 )
 from utils.api_handler import (
     fetch_all_products,
     create_product_mapping,
     enrich_sales_data,
+    iter_enriched_sales_data,
+    new_api_client,
+    new_enrichment_summary,
+    summarize_enrichment,
     save_enriched_data,
     generate_sales_report
 )
+from utils.api_client import DEFAULT_DEADLINE, DEFAULT_RETRIES
+from utils.binary_export import open_binary_writer, parquet_available
+from utils.report import REPORT_FORMATS
+from utils.product_cache import ProductCache
+from utils.parse_cache import (
+    DEFAULT_PARSE_CACHE_FILE,
+    input_key,
+    unchanged_since,
+    load_parse_cache,
+    save_parse_cache,
+    new_parse_cache_entry,
+    filter_valid
+)
+from utils import metrics
+from utils.metrics import stage
+from utils.columnar import ColumnarTransactions
+from utils.cube import SalesCube, DEFAULT_CUBE_FILE, PERIODS
+from utils.indexes import TransactionIndex, parse_query
+from utils.service import DEFAULT_HOST, DEFAULT_PORT, DEFAULT_RELOAD_INTERVAL
+from utils.partitions import is_partitioned_input, parse_date
+from utils.filter_sets import (
+    load_config,
+    normalize_filters,
+    normalize_filter_set,
+    new_filter_set_states,
+    tap_filter_sets,
+    finish_filter_set_states
+)
+from utils.checkpoint import (
+    DEFAULT_CHECKPOINT_FILE,
+    load_checkpoint,
+    resume_offset,
+    save_checkpoint,
+    file_layout,
+    aggregates_from_json,
+    enrichment_from_json
+)
 from utils.data_processor import (
+    new_aggregates,
+    tap_aggregates,
+    aggregate_sales,
     calculate_total_revenue,
     region_wise_sales,
     top_selling_products,
@@ -22,131 +74,1075 @@ from utils.data_processor import (
 )
 
 
-def main():
+DEFAULT_INPUT = "data/sales_data.txt"
+DEFAULT_ENRICHED_OUTPUT = "data/enriched_sales_data.txt"
+DEFAULT_REPORT = "output/sales_report.txt"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Sales Analytics System")
+    parser.add_argument("--config", help="JSON file with paths, filters and filter_sets")
+    parser.add_argument(
+        "--input",
+        help=f"sales data file, or a directory or glob of partition files (.txt or .gz) "
+             f"(default: {DEFAULT_INPUT})"
+    )
+    parser.add_argument(
+        "--enriched-output",
+        help=f"enriched data file (default: {DEFAULT_ENRICHED_OUTPUT})"
+    )
+    parser.add_argument(
+        "--binary-output",
+        help="also write the enriched data as a columnar binary file "
+             "(.parquet needs pyarrow, otherwise use .sacol)"
+    )
+    parser.add_argument("--report", help=f"report file (default: {DEFAULT_REPORT})")
+    parser.add_argument(
+        "--report-format",
+        nargs="+",
+        choices=REPORT_FORMATS,
+        help="report formats; the first is written to --report, the others next to it "
+             "with their own extension (default: text)"
+    )
+    parser.add_argument("--region", help="only keep transactions from this region")
+    parser.add_argument("--min-amount", type=float, help="only keep transactions >= amount")
+    parser.add_argument("--max-amount", type=float, help="only keep transactions <= amount")
+    parser.add_argument(
+        "--from-date",
+        type=parse_date,
+        metavar="YYYY-MM-DD",
+        help="only keep transactions on or after this date (with partitioned input, "
+             "files whose path has an earlier date are not read)"
+    )
+    parser.add_argument(
+        "--to-date",
+        type=parse_date,
+        metavar="YYYY-MM-DD",
+        help="only keep transactions on or before this date (with partitioned input, "
+             "files whose path has a later date are not read)"
+    )
+    parser.add_argument(
+        "--interactive",
+        action="store_true",
+        help="ask for region/amount filters on the terminal"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="process rows as a chained generator pipeline with bounded memory"
+    )
+    parser.add_argument(
+        "--overlap",
+        action="store_true",
+        help="look up products in the background (asyncio) while the input is "
+             "parsed, validated and aggregated"
+    )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="hold parsed transactions in a compact columnar store instead of dicts"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="parse the input file in N processes by byte range (implies --columnar); "
+             "partitioned input uses one process per CPU core unless set"
+    )
+    parser.add_argument(
+        "--mmap",
+        action="store_true",
+        help="read and parse the input through a memory-mapped byte reader"
+    )
+    parser.add_argument(
+        "--approx-top",
+        type=float,
+        metavar="EPSILON",
+        help="track top products/customers with fixed-memory sketches "
+             "(error <= EPSILON x total, e.g. 0.001)"
+    )
+    parser.add_argument(
+        "--distinct-precision",
+        type=int,
+        choices=range(4, 17),
+        metavar="P",
+        help="count unique customers/products with HyperLogLog (2^P registers, "
+             "about 1.04/sqrt(2^P) error) instead of exact sets"
+    )
+    parser.add_argument(
+        "--api-deadline",
+        type=float,
+        default=DEFAULT_DEADLINE,
+        metavar="SECONDS",
+        help=f"stop calling the products API after this many seconds of request time "
+             f"and use cached/bulk data "
+             f"(default: {DEFAULT_DEADLINE:.0f}, 0 = no deadline)"
+    )
+    parser.add_argument(
+        "--api-rate-limit",
+        type=float,
+        metavar="REQ_PER_S",
+        help="cap products API requests per second across all workers"
+    )
+    parser.add_argument(
+        "--api-retries",
+        type=int,
+        default=DEFAULT_RETRIES,
+        help=f"retries per API request on timeouts, 429 and 5xx (default: {DEFAULT_RETRIES})"
+    )
+    parser.add_argument("--metrics", help="write per-stage timing/memory metrics as JSON")
+    parser.add_argument("--metrics-prom", help="write the same metrics in Prometheus text format")
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="record tracemalloc peaks per stage (slower; needs --metrics or --metrics-prom)"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only process rows appended since the last checkpoint"
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=DEFAULT_CHECKPOINT_FILE,
+        help=f"checkpoint file for --incremental (default: {DEFAULT_CHECKPOINT_FILE})"
+    )
+    parser.add_argument(
+        "--cube",
+        help=f"aggregate cube saved after each run (default: {DEFAULT_CUBE_FILE})"
+    )
+    parser.add_argument("--no-cube", action="store_true", help="do not build or save the cube")
+    parser.add_argument(
+        "--parse-cache",
+        help=f"validated rows of the last input, reused while it is unchanged "
+             f"(default: {DEFAULT_PARSE_CACHE_FILE})"
+    )
+    parser.add_argument(
+        "--no-parse-cache",
+        action="store_true",
+        help="always read and parse the input (the cache is neither read nor written)"
+    )
+    parser.add_argument(
+        "--query",
+        action="store_true",
+        help="validate once, index the rows, then answer filter queries read from stdin"
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="keep the validated data in memory and answer analytics queries over HTTP/JSON"
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"--serve address (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"--serve port (default: {DEFAULT_PORT})")
+    parser.add_argument(
+        "--reload-interval",
+        type=float,
+        default=DEFAULT_RELOAD_INTERVAL,
+        metavar="SECONDS",
+        help=f"how often --serve checks the input for changes "
+             f"(default: {DEFAULT_RELOAD_INTERVAL:g}, 0 = never)"
+    )
+    parser.add_argument(
+        "--cube-report",
+        choices=PERIODS,
+        help="print period-over-period revenue from the saved cube and exit"
+    )
+    return resolve_options(parser.parse_args(argv))
+
+
+def resolve_options(args):
+    """
+    Fills options not given on the command line from --config, then defaults.
+    Adds args.filters (top-level filters) and args.filter_sets.
+    """
+
+    config = load_config(args.config) if args.config else {}
+
+    args.input = args.input or config.get("input") or DEFAULT_INPUT
+    args.enriched_output = (
+        args.enriched_output or config.get("enriched_output") or DEFAULT_ENRICHED_OUTPUT
+    )
+    args.binary_output = args.binary_output or config.get("binary_output")
+    args.report = args.report or config.get("report") or DEFAULT_REPORT
+    args.report_format = args.report_format or config.get("report_formats") or ["text"]
+    args.cube = args.cube or config.get("cube") or DEFAULT_CUBE_FILE
+    args.parse_cache = args.parse_cache or config.get("parse_cache") or DEFAULT_PARSE_CACHE_FILE
+
+    filters = normalize_filters(config.get("filters"))
+    cli = normalize_filters({
+        "region": args.region,
+        "min_amount": args.min_amount,
+        "max_amount": args.max_amount,
+        "from_date": args.from_date,
+        "to_date": args.to_date
+    })
+    for key, value in cli.items():
+        if value is not None:
+            filters[key] = value
+    args.filters = filters
+
+    report_dir = os.path.dirname(args.report)
+    args.filter_sets = [
+        normalize_filter_set(entry, i, report_dir)
+        for i, entry in enumerate(config.get("filter_sets", []))
+    ]
+
+    return args
+
+
+def write_filter_set_reports(states, formats):
+    """
+    Writes one report per filter set. A set that matched nothing gets an
+    empty report, so no report from an earlier run is left behind.
+    """
+    for state in states:
+        fs = state["filter"]
+        if not state["aggregates"]["transaction_count"]:
+            print(f"⚠ Filter set '{fs['name']}' matched no transactions; its report will be empty")
+        generate_sales_report(
+            None, None, output_file=fs["report"],
+            aggregates=state["aggregates"], enrichment=state["enrichment"], formats=formats
+        )
+
+
+def save_enriched(enriched, args, append=False):
+    """
+    Writes the enriched text file and, with --binary-output, the binary
+    file in the same pass.
+    """
+    binary = open_binary_writer(args.binary_output, append=append) if args.binary_output else nullcontext()
+    with binary as writer:
+        if writer is not None:
+            enriched = writer.tap(enriched)
+        save_enriched_data(enriched, filename=args.enriched_output, append=append)
+
+
+def print_no_matches(summary):
+    """
+    Warns when the filters left no transactions; the report is still
+    written, with zero totals.
+    """
+    if not summary["final_count"]:
+        print("⚠ No transactions match the active filters; the report will be empty")
+
+
+def print_saved(args):
+    print(f"✓ Saved to: {args.enriched_output}")
+    if args.binary_output:
+        print(f"✓ Binary copy saved to: {args.binary_output}")
+
+
+def api_client(args):
+    return new_api_client(
+        deadline=args.api_deadline or None,
+        rate_limit=args.api_rate_limit,
+        retries=args.api_retries
+    )
+
+
+def print_api_problems(client):
+    """
+    Warns when some product lookups gave up (only printed if any did).
+    """
+    stats = client.stats
+    if stats["unavailable"]:
+        print(f"⚠ Products API: {stats['unavailable']} requests gave up "
+              f"({stats['failures']} failed attempts, circuit breaker opened {client.breaker.trips}x); "
+              f"products that could not be looked up are reported as not enriched")
+
+
+def cube_meta(args, **extra):
+    """
+    What the saved cube was built from (shown by --cube-report,
+    checked by incremental mode).
+    """
+    return dict(source=os.path.abspath(args.input), **extra)
+
+
+def cube_enabled(args, filters):
+    """
+    The cube covers every valid row, whatever the filters. Modes that only
+    see the filtered rows (stream, partitioned, incremental) therefore do
+    not build or replace it while a filter is active.
+    """
+    if args.no_cube:
+        return False
+    if any(value is not None for value in filters.values()):
+        print("Note: filters are active, so the cube (which covers every valid row) is not updated.")
+        return False
+    return True
+
+
+def save_cube(cube, args, **extra):
+    with stage("save_cube"):
+        cube.save(args.cube, cube_meta(args, **extra))
+    print(f"✓ Cube saved to: {args.cube} ({len(cube)} cells)")
+
+
+def run_cube_report(args):
+    """
+    Prints revenue per period with the change against the previous period,
+    and per-region totals, from the saved cube (no rows are read).
+    """
+
+    cube, meta = SalesCube.load(args.cube, detail=False)
+    if cube is None:
+        print(f"No cube found at '{args.cube}'. Run the pipeline first.")
+        return
+
+    region = args.filters["region"]
+    period = args.cube_report
+
+    print(f"Cube: {args.cube} (built from {meta.get('source')})")
+    if region:
+        print(f"Region: {region}")
+    print()
+
+    print(f"{period.upper():12} {'Revenue':>16} {'Transactions':>13} {'Change':>9}")
+    for label, revenue, count, change in cube.period_over_period(period, region=region):
+        change = f"{change:+.1f}%" if change is not None else "-"
+        print(f"{label:12} {'₹' + format(revenue, ',.0f'):>16} {count:>13} {change:>9}")
+
+    print(f"\n{'REGION':12} {'Revenue':>16} {'Transactions':>13}")
+    for (name,), stats in cube.rollup(by=("region",), region=region).items():
+        print(f"{name:12} {'₹' + format(stats['revenue'], ',.0f'):>16} {stats['count']:>13}")
+    print()
+
+
+def run_query(args):
+    """
+    Query mode: validates the file once, builds secondary indexes, then
+    answers one filter query per input line until EOF or 'quit'.
+    """
+
+    print("[1/3] Reading and validating sales data...")
+    cache_key, cached = load_cached_input(args)
+    with stage("load"):
+        if cached is not None:
+            valid_tx = cached["valid"]
+            invalid_count = cached["summary"]["invalid"]
+        else:
+            raw_lines = read_sales_data(args.input)
+            transactions = parse_transactions(raw_lines, columnar=args.columnar)
+            valid_tx, invalid_count, summary = validate_and_filter(transactions)
+            if cache_key is not None and unchanged_since(args.input, cache_key):
+                regions, amount_range = filter_options(transactions)
+                save_parse_cache(args.parse_cache, cache_key, new_parse_cache_entry(
+                    valid_tx, summary, len(raw_lines), len(transactions), regions, amount_range
+                ))
+    source = " (from parse cache)" if cached is not None else ""
+    print(f"✓ Valid: {len(valid_tx)} | Invalid: {invalid_count}{source}\n")
+
+    print("[2/3] Building indexes...")
+    with stage("index", rows_in=len(valid_tx)):
+        index = TransactionIndex(valid_tx)
+    print("✓ Indexed Region, CustomerID, ProductID, Date and amount\n")
+
+    print("[3/3] Ready. One query per line, e.g. 'region=North min=5000 max=50000'")
+    print("      (also customer=, product=, from=YYYY-MM-DD, to=YYYY-MM-DD; 'quit' to exit)\n")
+
+    for line in sys.stdin:
+        line = line.strip()
+        if line in ("quit", "exit"):
+            break
+        if not line:
+            continue
+
+        try:
+            query = parse_query(line)
+        except ValueError as e:
+            print(f"⚠ {e}")
+            continue
+
+        start = time.perf_counter()
+        matches = index.select(**query)
+        aggregates = aggregate_sales(matches)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        top = top_selling_products(aggregates, n=1)
+        top = f"{top[0][0]} ({top[0][1]} units)" if top else "-"
+        print(
+            f"{len(matches)} transactions | Revenue ₹{aggregates['total_revenue']:,.2f} | "
+            f"Top product: {top} | {elapsed:.1f} ms"
+        )
+
+
+def run_serve(args):
+    """
+    Service mode: loads and indexes the validated rows once, then serves
+    analytics over HTTP until interrupted, reloading when the input changes.
+    """
+
+    from utils.service import AnalyticsService, start_service
+
+    print("[1/2] Loading and indexing sales data...")
+    with stage("load"):
+        service = AnalyticsService(
+            args.input,
+            parse_cache=None if args.no_parse_cache else args.parse_cache,
+            reload_interval=args.reload_interval
+        )
+    dataset = service.dataset
+    print(f"✓ Valid: {len(dataset.valid)} | Invalid: {dataset.invalid_count} "
+          f"(from {dataset.source})\n")
+
+    server, base_url = start_service(service, args.host, args.port)
+    service.start_watching()
+
+    print(f"[2/2] Serving at {base_url} (Ctrl+C to stop)")
+    print("      GET /status /regions /products/top /customers/top /customers /daily /query")
+    print("      filters: ?region=&min=&max=&customer=&product=&from=&to=  |  POST /reload\n")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print("Stopping...")
+    finally:
+        service.stop()
+        server.shutdown()
+
+
+def run_stream(args):
+    """
+    Streaming mode: read → parse → validate → aggregate → enrich → save
+    are chained generators, so only one batch of rows is held in memory.
+    """
+
+    print("[1/4] Fetching product data from API...")
+    client = api_client(args)
+    with stage("fetch_products"):
+        api_products = fetch_all_products(client)
+    print(f"✓ Fetched {len(api_products)} products\n")
+
+    print("[2/4] Streaming sales data (read → parse → validate → enrich → save)...")
+
+    summary = new_validation_summary()
+    aggregates = new_aggregates(epsilon=args.approx_top, distinct_precision=args.distinct_precision)
+    enrichment = new_enrichment_summary()
+    states = new_filter_set_states(
+        args.filter_sets, epsilon=args.approx_top, distinct_precision=args.distinct_precision
+    )
+    cube = SalesCube() if cube_enabled(args, args.filters) else None
+
+    with stage("stream_pipeline") as record, ProductCache() as cache, client:
+        product_map = create_product_mapping(api_products, cache=cache)
+
+        transactions = iter_transactions_mmap(args.input)
+        valid_tx = iter_valid_transactions(transactions, summary=summary, **args.filters)
+        analysed = tap_aggregates(valid_tx, aggregates)
+        if cube is not None:
+            analysed = cube.tap(analysed)
+        enriched = iter_enriched_sales_data(
+            analysed, cache=cache, summary=enrichment, product_mapping=product_map, client=client
+        )
+        enriched = tap_filter_sets(enriched, states)
+
+        save_enriched(enriched, args)
+        record["rows_in"] = summary["total_input"]
+        record["rows_out"] = enrichment["total"]
+
+    finish_filter_set_states(states, summary)
+
+    total = enrichment["total"]
+    pct = (enrichment["matched"] / total * 100) if total else 0
+
+    print(f"✓ Parsed {summary['total_input']} records")
+    print(f"✓ Valid: {summary['final_count']} | Invalid: {summary['invalid']}")
+    print_no_matches(summary)
+    print(f"✓ Enriched {enrichment['matched']}/{total} transactions ({pct:.1f}%)")
+    print_api_problems(client)
+    print_saved(args)
+    if cube is not None:
+        save_cube(cube, args)
+    print()
+
+    print("[3/4] Generating report...")
+    with stage("report"):
+        generate_sales_report(None, None, output_file=args.report, aggregates=aggregates,
+                              enrichment=enrichment, formats=args.report_format)
+        write_filter_set_reports(states, args.report_format)
+    print(f"✓ Report saved to: {args.report}\n")
+
+    print("[4/4] Process Complete!")
+    print("========================================")
+
+
+def analyse_input(args, tap):
+    """
+    The CPU side of overlapped mode: reads, parses, validates and
+    aggregates the input like batch mode, passing parsed rows through
+    `tap` on the way. Returns (line count, valid rows, invalid count,
+    validation summary, aggregates, cube or None).
+    """
+
+    read_stats = {}
+    parsed = tap(iter_transactions_mmap(args.input, stats=read_stats))
+    transactions = ColumnarTransactions.from_transactions(parsed) if args.columnar else list(parsed)
+
+    cube = None
+    if args.no_cube:
+        valid_tx, invalid_count, summary = validate_and_filter(transactions, **args.filters)
+    else:
+        # The cube covers every valid row; the filters are applied afterwards
+        valid, _, unfiltered = validate_and_filter(transactions)
+        cube = SalesCube().update(valid)
+        valid_tx, invalid_count, summary = filter_valid(valid, unfiltered, **args.filters)
+        del valid
+    del transactions
+
+    aggregates = aggregate_sales(
+        valid_tx,
+        new_aggregates(epsilon=args.approx_top, distinct_precision=args.distinct_precision)
+    )
+
+    return read_stats.get("lines", 0), valid_tx, invalid_count, summary, aggregates, cube
+
+
+async def overlapped_pipeline(args):
+    """
+    Runs analyse_input on a worker thread while ProductPrefetcher, on the
+    event loop, looks up every product id as soon as it is parsed; then
+    joins the product data onto the valid rows.
+    Returns analyse_input's result plus (enriched rows, client, seconds
+    spent waiting for lookups after analysis).
+    """
+
+    import asyncio
+    from utils.async_enrichment import ProductPrefetcher
+
+    loop = asyncio.get_running_loop()
+
+    with ProductCache() as cache, api_client(args) as client:
+        async with ProductPrefetcher(client, cache) as prefetcher:
+            with stage("read_parse_analyze") as record:
+                result = await loop.run_in_executor(None, analyse_input, args, prefetcher.tap)
+                record["rows_out"] = len(result[1])
+
+            valid_tx = result[1]
+            with stage("enrich_join", rows_in=len(valid_tx)) as record:
+                start = time.perf_counter()
+                details = await prefetcher.details()
+                waited = time.perf_counter() - start
+                enriched = enrich_sales_data(valid_tx, details, client=client)
+                record["rows_out"] = len(enriched)
+
+    return result + (enriched, client, waited)
+
+
+def run_overlapped(args):
+    """
+    Overlapped mode: product data is fetched while rows are still being
+    parsed and aggregated, then joined at the end, so the network and the
+    CPU are busy at the same time instead of one after the other.
+    """
+
+    import asyncio
+
+    print("[1/5] Reading and analyzing sales data with background product lookups...")
+    (line_count, valid_tx, invalid_count, summary, aggregates, cube,
+     enriched, client, waited) = asyncio.run(overlapped_pipeline(args))
+    print(f"✓ Read {line_count} raw lines, parsed {summary['total_input']} records")
+    print(f"✓ Valid: {len(valid_tx)} | Invalid: {invalid_count}")
+    print_no_matches(summary)
+    print()
+
+    print("[2/5] Joining product data...")
+    enrichment = summarize_enrichment(enriched)
+    match_count = enrichment["matched"]
+    total = enrichment["total"]
+    pct = (match_count / total * 100) if total else 0
+    print(f"✓ Enriched {match_count}/{total} transactions ({pct:.1f}%)")
+    print(f"✓ Waited {waited:.2f}s for product lookups after analysis")
+    print_api_problems(client)
+    print()
+
+    print("[3/5] Saving enriched data...")
+    with stage("save_enriched", rows_in=len(enriched)):
+        states = new_filter_set_states(
+            args.filter_sets, epsilon=args.approx_top, distinct_precision=args.distinct_precision
+        )
+        save_enriched(tap_filter_sets(enriched, states), args)
+        finish_filter_set_states(states, summary)
+    print_saved(args)
+    if cube is not None:
+        save_cube(cube, args)
+    print()
+
+    print("[4/5] Generating report...")
+    with stage("report", rows_in=len(valid_tx)):
+        generate_sales_report(None, None, output_file=args.report, aggregates=aggregates,
+                              enrichment=enrichment, formats=args.report_format)
+        write_filter_set_reports(states, args.report_format)
+    print(f"✓ Report saved to: {args.report}\n")
+
+    print("[5/5] Process Complete!")
+    print("========================================")
+
+
+def run_partitioned(args):
+    """
+    Partitioned mode: the input is a directory or glob of partition files
+    (plain or gzip). Partitions ruled out by the region or date filters are
+    skipped by path; the rest are parsed, validated and aggregated in worker
+    processes, and the per-batch aggregates are merged.
+    """
+
+    # multiprocessing is only imported when worker processes are used
+    from utils.parallel import aggregate_partitions_parallel
+    from utils.partitions import find_partitions
+
+    filters = args.filters
+    workers = args.workers or os.cpu_count() or 1
+
+    print("[1/7] Finding input partitions...")
+    with stage("find_partitions") as record:
+        partitions, skipped = find_partitions(
+            args.input, region=filters["region"], from_date=filters["from_date"],
+            to_date=filters["to_date"]
+        )
+        record["rows_out"] = len(partitions)
+    size = sum(p["size"] for p in partitions)
+    print(f"✓ {len(partitions)} files ({size / 1e6:,.1f} MB) to read, "
+          f"{skipped} skipped by region/date\n")
+
+    print(f"[2/7] Reading, validating and analyzing partitions ({workers} worker processes)...")
+    with stage("read_parse_analyze_parallel") as record:
+        line_count, valid_tx, aggregates, summary = aggregate_partitions_parallel(
+            partitions, workers=workers, epsilon=args.approx_top,
+            distinct_precision=args.distinct_precision, **filters
+        )
+        record["rows_out"] = len(valid_tx)
+    print(f"✓ Read {line_count} raw lines, parsed {summary['total_input']} records")
+    print(f"✓ Valid: {len(valid_tx)} | Invalid: {summary['invalid']}")
+    print_no_matches(summary)
+
+    cube = None
+    if cube_enabled(args, filters):
+        with stage("cube", rows_in=len(valid_tx)):
+            cube = SalesCube().update(valid_tx)
+    print("✓ Analysis complete\n")
+
+    print("[3/7] Fetching product data from API...")
+    client = api_client(args)
+    with stage("fetch_products") as record:
+        api_products = fetch_all_products(client)
+        record["rows_out"] = len(api_products)
+    print(f"✓ Fetched {len(api_products)} products\n")
+
+    print("[4/7] Enriching sales data...")
+    with stage("enrich", rows_in=len(valid_tx)) as record, ProductCache() as cache, client:
+        product_map = create_product_mapping(api_products, cache=cache)
+        enriched = enrich_sales_data(valid_tx, product_map, cache=cache, client=client)
+        record["rows_out"] = len(enriched)
+    print_api_problems(client)
+
+    enrichment = summarize_enrichment(enriched)
+    total = enrichment["total"]
+    pct = (enrichment["matched"] / total * 100) if total else 0
+    print(f"✓ Enriched {enrichment['matched']}/{total} transactions ({pct:.1f}%)\n")
+
+    print("[5/7] Saving enriched data...")
+    with stage("save_enriched", rows_in=len(enriched)):
+        states = new_filter_set_states(
+            args.filter_sets, epsilon=args.approx_top, distinct_precision=args.distinct_precision
+        )
+        save_enriched(tap_filter_sets(enriched, states), args)
+        finish_filter_set_states(states, summary)
+    print_saved(args)
+    if cube is not None:
+        save_cube(cube, args)
+    print()
+
+    print("[6/7] Generating report...")
+    with stage("report", rows_in=len(valid_tx)):
+        generate_sales_report(None, None, output_file=args.report, aggregates=aggregates,
+                              enrichment=enrichment, formats=args.report_format)
+        write_filter_set_reports(states, args.report_format)
+    print(f"✓ Report saved to: {args.report}\n")
+
+    print("[7/7] Process Complete!")
+    print("========================================")
+
+
+def run_incremental(args):
+    """
+    Incremental mode: resumes from the saved byte offset, processes only the
+    rows appended since then, and merges them into the checkpointed aggregates.
+    Falls back to a full rebuild if the file was truncated or rewritten.
+    """
+
+    filename = args.input
+    filters = args.filters
+    checkpoint_path = args.checkpoint
+
+    print("[1/5] Loading checkpoint...")
+    state = load_checkpoint(checkpoint_path)
+    header_end, complete_end, _ = file_layout(filename)
+    offset = resume_offset(state, filename, filters, args.distinct_precision)
+
+    # The cube must have been saved at the same offset, or rows would be counted twice
+    cube = None
+    if cube_enabled(args, filters):
+        cube, meta = SalesCube.load(args.cube)
+        if offset is not None and (meta or {}) != cube_meta(args, offset=offset):
+            print("Note: the saved cube does not match the checkpoint.")
+            offset = None
+        if offset is None:
+            cube = SalesCube()
+
+    if offset is None:
+        print("✓ No usable checkpoint, rebuilding from the start\n")
+        offset = header_end
+        summary = new_validation_summary()
+        aggregates = new_aggregates(distinct_precision=args.distinct_precision)
+        enrichment = new_enrichment_summary()
+    else:
+        print(f"✓ Resuming at byte {offset:,} ({complete_end - offset:,} new bytes)\n")
+        summary = state["validation"]
+        aggregates = aggregates_from_json(state["aggregates"])
+        enrichment = enrichment_from_json(state["enrichment"])
+
+    resumed = offset != header_end
+
+    print("[2/5] Processing new rows...")
+    new_rows = new_validation_summary()
+
+    with stage("incremental_pipeline") as record, ProductCache() as cache, api_client(args) as client:
+        transactions = iter_transactions_mmap(filename, start=offset, end=complete_end)
+        valid_tx = iter_valid_transactions(transactions, summary=new_rows, **filters)
+        analysed = tap_aggregates(valid_tx, aggregates)
+        if cube is not None:
+            analysed = cube.tap(analysed)
+        enriched = iter_enriched_sales_data(analysed, cache=cache, summary=enrichment, client=client)
+
+        save_enriched(enriched, args, append=resumed)
+        record["rows_in"] = new_rows["total_input"]
+        record["rows_out"] = new_rows["final_count"]
+
+    merge_validation_summaries(summary, new_rows)
+    print(f"✓ New records: {new_rows['total_input']} | Valid: {new_rows['final_count']}")
+    print_no_matches(summary)
+    print_api_problems(client)
+    print()
+
+    print("[3/5] Saving checkpoint...")
+    if cube is not None:
+        save_cube(cube, args, offset=complete_end)
+    with stage("save_checkpoint"):
+        save_checkpoint(checkpoint_path, filename, complete_end, filters, aggregates, summary, enrichment)
+    print(f"✓ Saved to: {checkpoint_path}\n")
+
+    print("[4/5] Generating report...")
+    with stage("report"):
+        generate_sales_report(None, None, output_file=args.report, aggregates=aggregates,
+                              enrichment=enrichment, formats=args.report_format)
+    print(f"✓ Report saved to: {args.report}\n")
+
+    print("[5/5] Process Complete!")
+    print("========================================")
+
+
+def filter_options(transactions):
+    """
+    Returns (sorted regions, (min amount, max amount)) over parsed rows.
+    """
+    amounts = [t["Quantity"] * t["UnitPrice"] for t in transactions]
+    return sorted({t["Region"] for t in transactions}), (min(amounts), max(amounts))
+
+
+def load_cached_input(args):
+    """
+    Returns (cache key, cached entry) for the input; (None, None) with
+    --no-parse-cache or a missing input, (key, None) on a cache miss.
+    """
+    if args.no_parse_cache or not os.path.exists(args.input):
+        return None, None
+    with stage("parse_cache_load") as record:
+        key = input_key(args.input)
+        cached = load_parse_cache(args.parse_cache, key)
+        record["rows_out"] = len(cached["valid"]) if cached else 0
+    return key, cached
+
+
+def read_transactions(args):
+    """
+    Step 1 of batch mode: reads and parses the input with the selected
+    reader. Returns (raw line count, transactions).
+    """
+
+    if args.workers and args.workers > 1:
+        # multiprocessing is only imported when worker processes are used
+        from utils.parallel import parse_file_parallel
+
+        print(f"[1/10] Reading sales data ({args.workers} worker processes)...")
+        with stage("read_parse_parallel") as record:
+            line_count, transactions, _ = parse_file_parallel(
+                args.input, workers=args.workers
+            )
+            record["rows_out"] = len(transactions)
+        print(f"✓ Successfully read {line_count} raw lines\n")
+        return line_count, transactions
+
+    if args.mmap:
+        print("[1/10] Reading sales data (memory-mapped)...")
+        with stage("read_parse_mmap") as record:
+            read_stats = {}
+            parsed = iter_transactions_mmap(args.input, stats=read_stats)
+            transactions = ColumnarTransactions.from_transactions(parsed) if args.columnar else list(parsed)
+            record["rows_out"] = len(transactions)
+        print(f"✓ Successfully read {read_stats.get('lines', 0)} raw lines\n")
+        return read_stats.get("lines", 0), transactions
+
+    print("[1/10] Reading sales data...")
+    with stage("read") as record:
+        raw_data = read_sales_data(args.input)
+        record["rows_out"] = len(raw_data)
+    print(f"✓ Successfully read {len(raw_data)} raw lines\n")
+    with stage("parse", rows_in=len(raw_data)) as record:
+        transactions = parse_transactions(raw_data, columnar=args.columnar)
+        record["rows_out"] = len(transactions)
+
+    return len(raw_data), transactions
+
+
+def run_batch(args):
+    """
+    Default mode: the ten numbered stages over in-memory transactions.
+    """
+
+    # -----------------------------------------------------------
+    # [1/10] READ SALES DATA
+    # -----------------------------------------------------------
+    # An unchanged input (same size, mtime and content hash) is loaded from
+    # the parse cache instead of being read, parsed and validated again
+    cache_key, cached = load_cached_input(args)
+
+    if cached is not None:
+        print("[1/10] Reading sales data (parse cache)...")
+        print(f"✓ Input unchanged, loaded {len(cached['valid'])} validated records "
+              f"from {args.parse_cache}\n")
+        line_count = cached["lines"]
+        parsed_count = cached["parsed"]
+        regions = cached["regions"]
+        low, high = cached["amount_range"]
+    else:
+        line_count, transactions = read_transactions(args)
+        parsed_count = len(transactions)
+
+    # -----------------------------------------------------------
+    # [2/10] PARSE DATA
+    # -----------------------------------------------------------
+    print("[2/10] Parsing and cleaning data...")
+    print(f"✓ Parsed {parsed_count} records\n")
+
+    # -----------------------------------------------------------
+    # [3/10] FILTER OPTIONS
+    # -----------------------------------------------------------
+    print("[3/10] Filter Options Available:")
+
+    if cached is None:
+        regions, (low, high) = filter_options(transactions)
+
+    print("Regions:", ", ".join(regions))
+    print(f"Amount Range: ₹{low:,.0f} - ₹{high:,.0f}\n")
+
+    region_filter = args.filters["region"]
+    min_amt = args.filters["min_amount"]
+    max_amt = args.filters["max_amount"]
+
+    # Ask user (only with --interactive; batch runs never prompt)
+    if args.interactive and input("Do you want to filter data? (y/n): ").lower() == "y":
+        print("\n--- APPLY FILTERS ---")
+
+        r = input("Enter region to filter (or press Enter to skip): ").strip()
+        if r in regions:
+            region_filter = r
+
+        try:
+            m1 = input("Minimum amount (or press Enter to skip): ").strip()
+            min_amt = float(m1) if m1 else None
+
+            m2 = input("Maximum amount (or press Enter to skip): ").strip()
+            max_amt = float(m2) if m2 else None
+        except:
+            print("Invalid amount entered. Filters ignored.")
+            min_amt = max_amt = None
+
+    print(f"Active filters: region={region_filter or 'all'}, "
+          f"min={min_amt if min_amt is not None else '-'}, "
+          f"max={max_amt if max_amt is not None else '-'}, "
+          f"dates={args.filters['from_date'] or '-'} to {args.filters['to_date'] or '-'}")
+    if args.filter_sets:
+        print(f"Filter sets: {', '.join(fs['name'] for fs in args.filter_sets)}")
+    print()
+
+    # -----------------------------------------------------------
+    # [4/10] VALIDATE + APPLY FILTERS
+    # -----------------------------------------------------------
+    print("[4/10] Validating transactions...")
+
+    filters = dict(args.filters, region=region_filter, min_amount=min_amt, max_amount=max_amt)
+
+    with stage("validate", rows_in=parsed_count) as record:
+        if cached is not None:
+            # Cached rows are already valid (and columnar); only the filters are applied
+            valid_tx, invalid_count, summary = filter_valid(cached["valid"], cached["summary"], **filters)
+        elif cache_key is not None or not args.no_cube:
+            # Validate without filters so the cache serves any later filters
+            # and the cube covers every valid row
+            valid, _, unfiltered = validate_and_filter(transactions)
+            valid_tx, invalid_count, summary = filter_valid(valid, unfiltered, **filters)
+        else:
+            valid_tx, invalid_count, summary = validate_and_filter(transactions, **filters)
+        record["rows_out"] = len(valid_tx)
+
+    print(f"✓ Valid: {len(valid_tx)} | Invalid: {invalid_count}")
+    print_no_matches(summary)
+    print()
+
+    if cached is None and cache_key is not None and unchanged_since(args.input, cache_key):
+        with stage("parse_cache_save", rows_in=len(valid)):
+            save_parse_cache(args.parse_cache, cache_key, new_parse_cache_entry(
+                valid, unfiltered, line_count, parsed_count, regions, (low, high)
+            ))
+
+    # -----------------------------------------------------------
+    # [5/10] ANALYZE SALES DATA
+    # -----------------------------------------------------------
+    print("[5/10] Analyzing sales data...")
+
+    with stage("analyze", rows_in=len(valid_tx)):
+        # One pass over the data; every metric below reads from it
+        aggregates = aggregate_sales(
+            valid_tx,
+            new_aggregates(epsilon=args.approx_top, distinct_precision=args.distinct_precision)
+        )
+
+        calculate_total_revenue(aggregates)
+        region_wise_sales(aggregates)
+        top_selling_products(aggregates)
+        customer_analysis(aggregates)
+        daily_sales_trend(aggregates)
+        find_peak_sales_day(aggregates)
+        low_performing_products(aggregates)
+
+    cube = None
+    if not args.no_cube:
+        rows = cached["valid"] if cached is not None else valid
+        with stage("cube", rows_in=len(rows)):
+            cube = SalesCube().update(rows)
+
+    print("✓ Analysis complete\n")
+
+    # -----------------------------------------------------------
+    # [6/10] FETCH API PRODUCTS
+    # -----------------------------------------------------------
+    print("[6/10] Fetching product data from API...")
+    # One client for steps 6-7: the deadline and circuit breaker cover both
+    client = api_client(args)
+    with stage("fetch_products") as record:
+        api_products = fetch_all_products(client)
+        record["rows_out"] = len(api_products)
+    print(f"✓ Fetched {len(api_products)} products\n")
+
+    # -----------------------------------------------------------
+    # [7/10] ENRICH SALES DATA
+    # -----------------------------------------------------------
+    print("[7/10] Enriching sales data...")
+
+    # Cached products skip the network on repeat runs
+    with stage("enrich", rows_in=len(valid_tx)) as record, ProductCache() as cache, client:
+        product_map = create_product_mapping(api_products, cache=cache)
+        enriched = enrich_sales_data(valid_tx, product_map, cache=cache, client=client)
+        record["rows_out"] = len(enriched)
+    print_api_problems(client)
+
+    enrichment = summarize_enrichment(enriched)
+    match_count = enrichment["matched"]
+    total = enrichment["total"]
+    pct = (match_count / total * 100) if total else 0
+
+    print(f"✓ Enriched {match_count}/{total} transactions ({pct:.1f}%)\n")
+
+    # -----------------------------------------------------------
+    # [8/10] SAVE ENRICHED DATA
+    # -----------------------------------------------------------
+    print("[8/10] Saving enriched data...")
+
+    # Every filter set is accumulated during the same single write pass
+    with stage("save_enriched", rows_in=len(enriched)):
+        states = new_filter_set_states(
+            args.filter_sets, epsilon=args.approx_top, distinct_precision=args.distinct_precision
+        )
+        save_enriched(tap_filter_sets(enriched, states), args)
+        finish_filter_set_states(states, summary)
+
+    print_saved(args)
+    if cube is not None:
+        save_cube(cube, args)
+    print()
+
+    # -----------------------------------------------------------
+    # [9/10] GENERATE REPORT
+    # -----------------------------------------------------------
+    print("[9/10] Generating report...")
+    with stage("report", rows_in=len(valid_tx)):
+        generate_sales_report(None, None, output_file=args.report, aggregates=aggregates,
+                              enrichment=enrichment, formats=args.report_format)
+        write_filter_set_reports(states, args.report_format)
+    print(f"✓ Report saved to: {args.report}\n")
+
+    # -----------------------------------------------------------
+    # [10/10] COMPLETE
+    # -----------------------------------------------------------
+    print("[10/10] Process Complete!")
+    print("========================================")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.metrics or args.metrics_prom:
+        metrics.enable(trace_memory=args.trace_memory)
+
     print("========================================")
     print("        SALES ANALYTICS SYSTEM")
     print("========================================\n")
 
-    try:
-        # -----------------------------------------------------------
-        # [1/10] READ SALES DATA
-        # -----------------------------------------------------------
-        print("[1/10] Reading sales data...")
-        raw_data = read_sales_data("data/sales_data.txt")
-        print(f"✓ Successfully read {len(raw_data)} raw lines\n")
-
-        # -----------------------------------------------------------
-        # [2/10] PARSE DATA
-        # -----------------------------------------------------------
-        print("[2/10] Parsing and cleaning data...")
-        transactions = parse_transactions(raw_data)
-        print(f"✓ Parsed {len(transactions)} records\n")
-
-        # -----------------------------------------------------------
-        # [3/10] FILTER OPTIONS
-        # -----------------------------------------------------------
-        print("[3/10] Filter Options Available:")
-
-        regions = sorted({t["Region"] for t in transactions})
-        print("Regions:", ", ".join(regions))
-
-        amounts = [t["Quantity"] * t["UnitPrice"] for t in transactions]
-        print(f"Amount Range: ₹{min(amounts):,.0f} - ₹{max(amounts):,.0f}\n")
-
-        # Ask user
-        region_filter = None
-        min_amt = None
-        max_amt = None
-
-        if input("Do you want to filter data? (y/n): ").lower() == "y":
-            print("\n--- APPLY FILTERS ---")
-
-            r = input("Enter region to filter (or press Enter to skip): ").strip()
-            if r in regions:
-                region_filter = r
-
-            try:
-                m1 = input("Minimum amount (or press Enter to skip): ").strip()
-                min_amt = float(m1) if m1 else None
-
-                m2 = input("Maximum amount (or press Enter to skip): ").strip()
-                max_amt = float(m2) if m2 else None
-            except:
-                print("Invalid amount entered. Filters ignored.")
-                min_amt = max_amt = None
-
-        print()
-
-        # -----------------------------------------------------------
-        # [4/10] VALIDATE + APPLY FILTERS
-        # -----------------------------------------------------------
-        print("[4/10] Validating transactions...")
-
-        valid_tx, invalid_count, summary = validate_and_filter(
-            transactions,
-            region=region_filter,
-            min_amount=min_amt,
-            max_amount=max_amt
-        )
+    # Checked up front: the binary file is only written after the whole run
+    if args.binary_output and args.binary_output.endswith(".parquet") and not parquet_available():
+        args.binary_output = args.binary_output[:-len(".parquet")] + ".sacol"
+        print(f"Note: pyarrow is not installed; --binary-output is written as {args.binary_output}.\n")
 
-        print(f"✓ Valid: {len(valid_tx)} | Invalid: {invalid_count}\n")
-
-        # -----------------------------------------------------------
-        # [5/10] ANALYZE SALES DATA
-        # -----------------------------------------------------------
-        print("[5/10] Analyzing sales data...")
-
-        # These calls ensure preprocessing is done
-        calculate_total_revenue(valid_tx)
-        region_wise_sales(valid_tx)
-        top_selling_products(valid_tx)
-        customer_analysis(valid_tx)
-        daily_sales_trend(valid_tx)
-        find_peak_sales_day(valid_tx)
-        low_performing_products(valid_tx)
-
-        print("✓ Analysis complete\n")
-
-        # -----------------------------------------------------------
-        # [6/10] FETCH API PRODUCTS
-        # -----------------------------------------------------------
-        print("[6/10] Fetching product data from API...")
-        api_products = fetch_all_products()
-        print(f"✓ Fetched {len(api_products)} products\n")
-
-        # -----------------------------------------------------------
-        # [7/10] ENRICH SALES DATA
-        # -----------------------------------------------------------
-        print("[7/10] Enriching sales data...")
-
-        product_map = create_product_mapping(api_products)
-        enriched = enrich_sales_data(valid_tx, product_map)
-
-        match_count = sum(tx["API_Match"] for tx in enriched)
-        total = len(enriched)
-        pct = (match_count / total * 100) if total else 0
-
-        print(f"✓ Enriched {match_count}/{total} transactions ({pct:.1f}%)\n")
-
-        # -----------------------------------------------------------
-        # [8/10] SAVE ENRICHED DATA
-        # -----------------------------------------------------------
-        print("[8/10] Saving enriched data...")
-        save_enriched_data(enriched)
-        print("✓ Saved to: data/enriched_sales_data.txt\n")
-
-        # -----------------------------------------------------------
-        # [9/10] GENERATE REPORT
-        # -----------------------------------------------------------
-        print("[9/10] Generating report...")
-        generate_sales_report(valid_tx, enriched)
-        print("✓ Report saved to: output/sales_report.txt\n")
-
-        # -----------------------------------------------------------
-        # [10/10] COMPLETE
-        # -----------------------------------------------------------
-        print("[10/10] Process Complete!")
-        print("========================================")
+    try:
+        if args.cube_report:
+            run_cube_report(args)
+        elif is_partitioned_input(args.input):
+            if args.query or args.serve or args.stream or args.overlap or args.incremental:
+                raise ValueError("Query, serve, stream, overlap and incremental modes read a "
+                                 "single uncompressed file; partitioned input runs in batch mode.")
+            if args.interactive:
+                print("Note: --interactive is ignored with partitioned input.\n")
+            run_partitioned(args)
+        elif args.query:
+            run_query(args)
+        elif args.serve:
+            run_serve(args)
+        elif args.stream:
+            run_stream(args)
+        elif args.overlap:
+            run_overlapped(args)
+        elif args.incremental:
+            if args.filter_sets:
+                print("Note: filter_sets are ignored in incremental mode.\n")
+            if args.approx_top is not None:
+                print("Note: --approx-top is ignored in incremental mode.\n")
+            if args.binary_output and args.binary_output.endswith(".parquet"):
+                # Parquet files cannot be appended to between runs
+                print("Note: use a .sacol --binary-output in incremental mode; skipped.\n")
+                args.binary_output = None
+            run_incremental(args)
+        else:
+            run_batch(args)
 
     except Exception as e:
         print("\nAn error occurred:")
@@ -154,6 +1150,16 @@ def main():
         print("The program was unable to complete the process.\n")
         sys.exit(1)
 
+    finally:
+        collector = metrics.disable()
+        if collector is not None:
+            if args.metrics:
+                collector.write_json(args.metrics)
+                print(f"Metrics saved to: {args.metrics}")
+            if args.metrics_prom:
+                collector.write_prometheus(args.metrics_prom)
+                print(f"Prometheus metrics saved to: {args.metrics_prom}")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,340 @@
+import random
+import threading
+import time
+
+from utils.metrics import count_http
+
+
+DEFAULT_WORKERS = 16
+DEFAULT_TIMEOUT = (3.05, 8)  # (connect, read) seconds per attempt
+DEFAULT_RETRIES = 3
+DEFAULT_DEADLINE = 120.0
+
+# Worth retrying: rate limited or a transient server-side failure
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+
+class APIUnavailable(Exception):
+    """
+    Raised when a request gives up: retries exhausted, circuit open or
+    deadline reached. A 404 is an answer, not an outage, and never raises this.
+    """
+
+
+class RateLimiter:
+    """
+    Token bucket shared by all worker threads: at most `rate` requests
+    per second on average, with bursts of up to `burst`.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, deadline=None):
+        """
+        Waits for a token. Returns False (without taking one) if the wait
+        would end after `deadline` (a time.monotonic() value).
+        """
+
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            # Reserve the token now; callers queue up behind each other
+            wait = max(0.0, (1 - self.tokens) / self.rate)
+            if deadline is not None and now + wait > deadline:
+                return False
+            self.tokens -= 1
+
+        if wait:
+            time.sleep(wait)
+        return True
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing upstream.
+
+    closed: requests flow; `failure_threshold` consecutive failures open it.
+    open: requests are refused for `reset_timeout` seconds.
+    half-open: one probe request is let through; success closes the
+    circuit, failure opens it again.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, failure_threshold=10, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._probing = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probing = False
+
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+
+class ProductAPIClient:
+    """
+    HTTP client for the products API.
+
+    - one pooled keep-alive session sized to the worker count
+    - optional global rate limit shared by all threads (requests/second)
+    - retries on timeouts, connection errors, 429 and 5xx with jittered
+      exponential backoff (Retry-After is honoured)
+    - an overall deadline for every request made through the client,
+      counting only the time some request is in flight (parsing between
+      lookups does not use it up); per-attempt timeouts shrink to fit it
+    - a circuit breaker that fails fast after repeated failures
+
+    Requests that give up raise APIUnavailable so callers can fall back
+    to cached or bulk-listed data.
+    """
+
+    def __init__(self, base_url, max_workers=DEFAULT_WORKERS, timeout=DEFAULT_TIMEOUT,
+                 retries=DEFAULT_RETRIES, backoff=0.25, max_backoff=4.0, rate_limit=None,
+                 deadline=DEFAULT_DEADLINE, breaker=None):
+        self.base_url = base_url.rstrip("/")
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.deadline = deadline or None
+        self.breaker = breaker or CircuitBreaker()
+
+        # Imported here, not at module load: runs that never call the API skip it
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "unavailable": 0}
+        self._stats_lock = threading.Lock()
+
+        # Deadline clock: runs only while at least one get_json call is active
+        self._active = 0
+        self._active_since = 0.0
+        self._spent = 0.0
+        self._clock_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def time_left(self):
+        """
+        Seconds of request time left before the deadline (None without one).
+        """
+        if self.deadline is None:
+            return None
+        with self._clock_lock:
+            spent = self._spent
+            if self._active:
+                spent += time.monotonic() - self._active_since
+        return self.deadline - spent
+
+    def _enter_request(self):
+        with self._clock_lock:
+            if not self._active:
+                self._active_since = time.monotonic()
+            self._active += 1
+
+    def _exit_request(self):
+        with self._clock_lock:
+            self._active -= 1
+            if not self._active:
+                self._spent += time.monotonic() - self._active_since
+
+    def _backoff(self, attempt, response=None):
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        if response is not None:
+            try:
+                delay = max(delay, min(self.max_backoff, float(response.headers.get("Retry-After", 0))))
+            except ValueError:
+                pass
+        return delay
+
+    def get_json(self, path, params=None, timeout=None):
+        """
+        GETs base_url + path. Returns the decoded JSON, or None for a 404.
+        Raises APIUnavailable when the request cannot be completed.
+        """
+
+        self._enter_request()
+        try:
+            return self._get_json(path, params, timeout)
+        finally:
+            self._exit_request()
+
+    def _get_json(self, path, params, timeout):
+        import requests
+
+        connect_timeout, read_timeout = timeout or self.timeout
+        url = f"{self.base_url}{path}"
+
+        for attempt in range(self.retries + 1):
+            left = self.time_left()
+            if left is not None and left <= 0:
+                self._count("unavailable")
+                raise APIUnavailable("enrichment deadline reached")
+
+            if not self.breaker.allow():
+                self._count("unavailable")
+                raise APIUnavailable("circuit open")
+
+            deadline_at = None if left is None else time.monotonic() + left
+            if self.limiter is not None and not self.limiter.acquire(deadline_at):
+                self._count("unavailable")
+                raise APIUnavailable("enrichment deadline reached")
+
+            read = read_timeout if left is None else max(0.001, min(read_timeout, left))
+            response = None
+            try:
+                count_http()
+                self._count("requests")
+                response = self.session.get(url, params=params, timeout=(connect_timeout, read))
+                if response.status_code == 404:
+                    self.breaker.record_success()
+                    return None
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    data = response.json()
+                    self.breaker.record_success()
+                    return data
+                error = f"HTTP {response.status_code}"
+            except (requests.ConnectionError, requests.Timeout, ValueError) as e:
+                # ValueError: a truncated or non-JSON body
+                error = str(e) or type(e).__name__
+            except requests.RequestException as e:
+                # Other 4xx: retrying will not help
+                self.breaker.record_failure()
+                self._count("failures")
+                self._count("unavailable")
+                raise APIUnavailable(str(e)) from e
+
+            self.breaker.record_failure()
+            self._count("failures")
+
+            if attempt == self.retries:
+                break
+
+            delay = self._backoff(attempt, response)
+            left = self.time_left()
+            if left is not None and delay >= left:
+                break
+            self._count("retries")
+            time.sleep(delay)
+
+        self._count("unavailable")
+        raise APIUnavailable(f"{url}: {error}")
+
+    def fetch_products(self, product_ids):
+        """
+        Fetches /products/{id} once per distinct id using a bounded thread pool.
+        Returns {id: product_json or None (404)}; ids that could not be
+        fetched (APIUnavailable) are left out.
+        """
+
+        ids = list(dict.fromkeys(product_ids))
+        if not ids:
+            return {}
+
+        def fetch(num_id):
+            try:
+                return self.get_json(f"/products/{num_id}")
+            except APIUnavailable:
+                return APIUnavailable
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        workers = min(self.max_workers, len(ids))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(fetch, ids)
+            return {n: r for n, r in zip(ids, results) if r is not APIUnavailable}
+
+    def fetch_pages(self, path, key, page_size=100, params=None, timeout=None):
+        """
+        Fetches a paginated list endpoint (limit/skip, reporting "total").
+        The first page gives the total; the remaining pages are fetched
+        concurrently. Returns (items, complete): pages that could not be
+        fetched (APIUnavailable) are left out and make `complete` False.
+        Raises APIUnavailable if the first page cannot be fetched.
+        """
+
+        params = dict(params or {})
+
+        first = self.get_json(path, {**params, "limit": page_size, "skip": 0}, timeout) or {}
+        items = list(first.get(key, []))
+        total = first.get("total", len(items))
+
+        # The server may cap the page size; page by what it actually returned
+        step = len(items)
+
+        def fetch(skip):
+            try:
+                return self.get_json(path, {**params, "limit": step, "skip": skip}, timeout)
+            except APIUnavailable:
+                return None
+
+        skips = range(step, total, step) if step else ()
+        complete = True
+        if skips:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(skips))) as pool:
+                for page in pool.map(fetch, skips):
+                    if page is None:
+                        complete = False
+                    else:
+                        items.extend(page.get(key, []))
+
+        return items, complete
@@ -1,25 +1,51 @@
-import requests
-import datetime
 import os
-from utils.data_processor import *
+from contextlib import nullcontext
+from utils.api_client import ProductAPIClient, DEFAULT_WORKERS
+from utils.data_processor import aggregate_sales
+from utils.metrics import instrumented
+from utils.report import write_report
 
 
-def fetch_all_products():
+API_BASE_URL = "https://dummyjson.com"
+CATALOG_PAGE_SIZE = 100
+
+# The product fields enrichment keeps (requested with ?select= in bulk fetches)
+PRODUCT_FIELDS = ("title", "category", "brand", "rating", "price")
+
+
+def new_api_client(max_workers=DEFAULT_WORKERS, base_url=None, **options):
     """
-    Fetches first 100 products (limit=100).
-    Bulk list is NOT used for enrichment anymore,
-    but required by assignment to demonstrate a GET list call.
+    Returns a ProductAPIClient for API_BASE_URL (read at call time).
+    `options` are passed through: deadline, rate_limit, retries, timeout...
     """
+    return ProductAPIClient(base_url or API_BASE_URL, max_workers=max_workers, **options)
+
+
+def _open_client(client, base_url, max_workers):
+    # The caller's client is left open; a client made here is closed on exit
+    if client is not None:
+        return nullcontext(client)
+    return new_api_client(max_workers, base_url)
 
-    url = "https://dummyjson.com/products?limit=100"
+
+def fetch_all_products(client=None, page_size=CATALOG_PAGE_SIZE):
+    """
+    Fetches the whole catalog page by page (limit/skip, pages after the
+    first fetched concurrently), requesting only PRODUCT_FIELDS.
+    Enrichment reads products from this list first and only calls
+    /products/{id} for ids it does not contain.
+    """
 
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        products = data.get("products", [])
+        with _open_client(client, None, DEFAULT_WORKERS) as client:
+            products, complete = client.fetch_pages(
+                "/products", "products", page_size,
+                params={"select": ",".join(PRODUCT_FIELDS)}, timeout=(3.05, 10)
+            )
 
         print(f"Fetched {len(products)} products from API (bulk mode).")
+        if not complete:
+            print("Some catalog pages could not be fetched; those products are looked up by id.")
         return products
 
     except Exception as e:
@@ -27,9 +53,18 @@ def fetch_all_products():
         return []
 
 
-def create_product_mapping(api_products):
+def _product_info(product):
+    """
+    Extracts the fields we keep for a product.
+    """
+    return {name: product.get(name) for name in PRODUCT_FIELDS}
+
+
+def create_product_mapping(api_products, cache=None):
     """
     Creates a mapping of product IDs to product info.
+    If a ProductCache is given, entries it does not already hold (new,
+    changed or stale) are persisted to it.
     """
 
     product_map = {}
@@ -38,79 +73,187 @@ def create_product_mapping(api_products):
         pid = product.get("id")
 
         # Extract required fields only
-        info = {
-            "title": product.get("title"),
-            "category": product.get("category"),
-            "brand": product.get("brand"),
-            "rating": product.get("rating"),
-            "price": product.get("price")
-        }
+        product_map[pid] = _product_info(product)
 
-        product_map[pid] = info
+    if cache is not None:
+        cache.put_changed(product_map)
 
     return product_map
 
 
-def enrich_sales_data(transactions, product_mapping=None):
+def _product_number(pid_raw):
     """
-    New approach:
-      - Converts P101 → 101
-      - Makes direct API call:
-            https://dummyjson.com/products/101
+    Extracts the numeric API id: 'P101' → 101 (None if malformed).
     """
+    try:
+        return int(pid_raw[1:])
+    except (TypeError, ValueError):
+        return None
 
-    enriched_list = []
 
-    for tx in transactions:
-        new_tx = tx.copy()
+def _lookup_products(product_numbers, details, cache, client, catalog=None):
+    """
+    Adds info for every id in product_numbers that is not yet in `details`:
+    from `catalog` (the bulk product mapping) first, then the cache, and
+    only the rest is fetched by id, concurrently. Ids the API answers with
+    404 are cached as None, so they are not requested again until stale.
+    """
+
+    wanted = [n for n in dict.fromkeys(product_numbers) if n is not None and n not in details]
+    if not wanted:
+        return details
+
+    if catalog:
+        details.update((n, catalog[n]) for n in wanted if n in catalog)
 
-        # Extract numeric ID: 'P101' → 101
+    if cache is not None:
+        details.update(cache.get_many(n for n in wanted if n not in details))
+
+    missing = [n for n in wanted if n not in details]
+    if missing:
+        found = {n: _product_info(p) if p else None for n, p in client.fetch_products(missing).items()}
+        if cache is not None:
+            cache.put_many(found)
+        details.update(found)
+
+    # Remember failed lookups for this run so they are not retried per row
+    for n in wanted:
+        details.setdefault(n, None)
+
+    return details
+
+
+def _enrich_transaction(tx, pdata):
+    """
+    Returns a copy of tx with the API_* fields filled from pdata.
+    """
+
+    new_tx = tx.copy()
+
+    if pdata:
+        new_tx["API_Category"] = pdata.get("category")
+        new_tx["API_Brand"] = pdata.get("brand")
+        new_tx["API_Rating"] = pdata.get("rating")
+        new_tx["API_Match"] = True
+    else:
+        new_tx["API_Category"] = None
+        new_tx["API_Brand"] = None
+        new_tx["API_Rating"] = None
+        new_tx["API_Match"] = False
+
+    return new_tx
+
+
+@instrumented
+def enrich_sales_data(transactions, product_mapping=None, max_workers=DEFAULT_WORKERS,
+                      base_url=None, cache=None, client=None):
+    """
+    Collects the distinct product ids, looks each one up once,
+    then joins the results back onto copies of the transactions.
+
+    Ids are taken from product_mapping (create_product_mapping of the bulk
+    catalog) when it has them, then from the ProductCache if one is given.
+    Only the remaining ids are fetched individually
+    (https://dummyjson.com/products/101 for P101), concurrently, and
+    fresh results are written back to the cache.
+    """
+
+    transactions = list(transactions)
+
+    product_numbers = {}
+    for tx in transactions:
         pid_raw = tx.get("ProductID", "")
-        try:
-            num_id = int(pid_raw[1:])
-        except:
-            num_id = None
-
-        if num_id is None:
-            new_tx.update({
-                "API_Category": None,
-                "API_Brand": None,
-                "API_Rating": None,
-                "API_Match": False
-            })
-            enriched_list.append(new_tx)
-            continue
-
-        # Direct API product lookup
-        api_url = f"https://dummyjson.com/products/{num_id}"
-        try:
-            res = requests.get(api_url, timeout=8)
-            if res.status_code == 200:
-                pdata = res.json()
-            else:
-                pdata = None
-        except Exception:
-            pdata = None
-
-        if pdata:
-            new_tx["API_Category"] = pdata.get("category")
-            new_tx["API_Brand"] = pdata.get("brand")
-            new_tx["API_Rating"] = pdata.get("rating")
-            new_tx["API_Match"] = True
-        else:
-            new_tx["API_Category"] = None
-            new_tx["API_Brand"] = None
-            new_tx["API_Rating"] = None
-            new_tx["API_Match"] = False
-
-        enriched_list.append(new_tx)
+        if pid_raw not in product_numbers:
+            product_numbers[pid_raw] = _product_number(pid_raw)
+
+    with _open_client(client, base_url, max_workers) as client:
+        details = _lookup_products(product_numbers.values(), {}, cache, client, product_mapping)
+
+    enriched_list = []
+
+    for tx in transactions:
+        num_id = product_numbers[tx.get("ProductID", "")]
+        enriched_list.append(_enrich_transaction(tx, details.get(num_id)))
 
     return enriched_list
 
 
-def save_enriched_data(enriched_transactions, filename="data/enriched_sales_data.txt"):
+def new_enrichment_summary():
+    """
+    Returns empty enrichment counters (see summarize_enrichment).
+    """
+    return {"total": 0, "matched": 0, "failed": {}}
+
+
+def _count_enrichment(summary, tx):
+    summary["total"] += 1
+    if tx["API_Match"]:
+        summary["matched"] += 1
+    else:
+        key = (tx["ProductID"], tx["ProductName"])
+        summary["failed"][key] = summary["failed"].get(key, 0) + 1
+
+
+def summarize_enrichment(enriched_transactions, summary=None):
+    """
+    Counts enriched rows, matches, and failures per (ProductID, ProductName).
+    """
+
+    if summary is None:
+        summary = new_enrichment_summary()
+
+    for tx in enriched_transactions:
+        _count_enrichment(summary, tx)
+
+    return summary
+
+
+def iter_enriched_sales_data(transactions, max_workers=DEFAULT_WORKERS, base_url=None,
+                             cache=None, summary=None, batch_size=10000, product_mapping=None,
+                             client=None):
+    """
+    Streaming version of enrich_sales_data.
+    Buffers at most batch_size transactions, looks up any product ids not
+    seen before in one concurrent batch, then yields the enriched rows.
+    Product info is kept per distinct id only, so memory does not grow with row count.
+    product_mapping and client work as in enrich_sales_data.
+    """
+
+    details = {}
+    product_numbers = {}
+    batch = []
+
+    def flush(client):
+        _lookup_products(
+            (product_numbers[tx.get("ProductID", "")] for tx in batch),
+            details, cache, client, product_mapping
+        )
+        for tx in batch:
+            new_tx = _enrich_transaction(tx, details.get(product_numbers[tx.get("ProductID", "")]))
+            if summary is not None:
+                _count_enrichment(summary, new_tx)
+            yield new_tx
+        batch.clear()
+
+    # One client for the whole stream, so the deadline and breaker span every batch
+    with _open_client(client, base_url, max_workers) as client:
+        for tx in transactions:
+            pid_raw = tx.get("ProductID", "")
+            if pid_raw not in product_numbers:
+                product_numbers[pid_raw] = _product_number(pid_raw)
+
+            batch.append(tx)
+            if len(batch) >= batch_size:
+                yield from flush(client)
+
+        if batch:
+            yield from flush(client)
+
+
+def save_enriched_data(enriched_transactions, filename="data/enriched_sales_data.txt", append=False):
     """
     Saves enriched data in pipe-delimited format.
+    With append=True, rows are added to an existing file (header written only if new).
     """
 
     headers = [
@@ -119,129 +262,31 @@ def save_enriched_data(enriched_transactions, filename="data/enriched_sales_data
         "API_Category", "API_Brand", "API_Rating", "API_Match"
     ]
 
-    with open(filename, "w", encoding="utf-8") as f:
-        f.write("|".join(headers) + "\n")
+    write_header = not (append and os.path.exists(filename) and os.path.getsize(filename) > 0)
+
+    with open(filename, "a" if append else "w", encoding="utf-8") as f:
+        if write_header:
+            f.write("|".join(headers) + "\n")
 
         for tx in enriched_transactions:
             row = [str(tx.get(h, "None")) for h in headers]
             f.write("|".join(row) + "\n")
 
 
-def generate_sales_report(transactions, enriched_transactions, output_file="output/sales_report.txt"):
+@instrumented
+def generate_sales_report(transactions, enriched_transactions, output_file="output/sales_report.txt",
+                          aggregates=None, enrichment=None, formats=("text",)):
     """
-    Same output format, new internal implementation style.
+    Writes the sales report in each of `formats` (text, json, csv; see
+    utils.report). Pass the aggregate_sales result as `aggregates` and a
+    summarize_enrichment result as `enrichment` to avoid rescanning rows;
+    either row list may then be None.
     """
 
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-
-    report = []
-    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    total_tx = len(transactions)
-
-    # HEADER
-    report.append("==============================================")
-    report.append("             SALES ANALYTICS REPORT           ")
-    report.append("==============================================")
-    report.append(f"Generated: {now}")
-    report.append(f"Records Processed: {total_tx}")
-    report.append("==============================================\n")
+    if aggregates is None:
+        aggregates = aggregate_sales(transactions)
+    if enrichment is None:
+        enrichment = summarize_enrichment(enriched_transactions)
 
-    # SUMMARY
-    total_revenue = calculate_total_revenue(transactions)
-    avg_order = total_revenue / total_tx if total_tx else 0
-
-    dates = sorted(t["Date"] for t in transactions)
-    report.append("OVERALL SUMMARY")
-    report.append("----------------------------------------------")
-    report.append(f"Total Revenue: ₹{total_revenue:,.2f}")
-    report.append(f"Total Transactions: {total_tx}")
-    report.append(f"Average Order Value: ₹{avg_order:,.2f}")
-    report.append(f"Date Range: {dates[0]} to {dates[-1]}\n")
-
-    # REGION PERFORMANCE
-    region_stats = region_wise_sales(transactions)
-    report.append("REGION-WISE PERFORMANCE")
-    report.append("----------------------------------------------")
-    report.append(f"{'Region':10} {'Sales':15} {'% of Total':15} {'Transactions'}")
-
-    for region, stats in region_stats.items():
-        report.append(
-            f"{region:10} ₹{stats['total_sales']:,.0f}   {stats['percentage']:.2f}%        {stats['transaction_count']}"
-        )
-    report.append("")
-
-    # TOP PRODUCTS
-    top_products = top_selling_products(transactions)
-    report.append("TOP 5 PRODUCTS")
-    report.append("----------------------------------------------")
-    report.append(f"{'Rank':5} {'Product':20} {'Qty Sold':10} {'Revenue'}")
-
-    for i, (name, qty, rev) in enumerate(top_products, start=1):
-        report.append(f"{i:<5} {name:20} {qty:<10} ₹{rev:,.0f}")
-    report.append("")
-
-    # CUSTOMERS
-    customers = customer_analysis(transactions)
-    report.append("TOP 5 CUSTOMERS")
-    report.append("----------------------------------------------")
-    report.append(f"{'Rank':5} {'Customer':10} {'Total Spent':15} {'Orders'}")
-
-    cust_sorted = sorted(
-        customers.items(),
-        key=lambda x: x[1]["total_spent"],
-        reverse=True
-    )[:5]
-
-    for i, (cid, stats) in enumerate(cust_sorted, start=1):
-        report.append(
-            f"{i:<5} {cid:10} ₹{stats['total_spent']:,.0f}       {stats['purchase_count']}"
-        )
-
-    report.append("")
-
-    # DAILY TREND
-    daily_stats = daily_sales_trend(transactions)
-    report.append("DAILY SALES TREND")
-    report.append("----------------------------------------------")
-    report.append(f"{'Date':12} {'Revenue':12} {'Transactions':12} {'Unique Cust'}")
-
-    for date, stats in daily_stats.items():
-        report.append(
-            f"{date:12} ₹{stats['revenue']:,.0f}      {stats['transaction_count']:10}     {stats['unique_customers']}"
-        )
-    report.append("")
-
-    # PERFORMANCE
-    peak_date, peak_rev, peak_cnt = find_peak_sales_day(transactions)
-    report.append("PRODUCT PERFORMANCE ANALYSIS")
-    report.append("----------------------------------------------")
-    report.append(f"Best Sales Day: {peak_date} (₹{peak_rev:,.0f}, {peak_cnt} transactions)\n")
-
-    low_items = low_performing_products(transactions)
-    report.append("Low Performing Products (Qty < 10):")
-    for name, qty, rev in low_items:
-        report.append(f" - {name}: Qty {qty}, Revenue ₹{rev:,.0f}")
-    report.append("")
-
-    # ENRICHMENT SUMMARY
-    total = len(enriched_transactions)
-    success = sum(tx["API_Match"] for tx in enriched_transactions)
-    percent = (success / total * 100) if total else 0
-
-    report.append("API ENRICHMENT SUMMARY")
-    report.append("----------------------------------------------")
-    report.append(f"Total Products Enriched: {total}")
-    report.append(f"Successful Matches: {success} ({percent:.2f}%)")
-
-    failed = [tx for tx in enriched_transactions if not tx["API_Match"]]
-    if failed:
-        report.append("Products That Could Not Be Enriched:")
-        for tx in failed:
-            report.append(f" - {tx['ProductID']} ({tx['ProductName']})")
-        report.append("")
-
-    # SAVE REPORT
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write("\n".join(report))
-
-    print(f"Sales report saved to: {output_file}")
+    for path in write_report(aggregates, enrichment, output_file, formats):
+        print(f"Sales report saved to: {path}")
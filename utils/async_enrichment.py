@@ -0,0 +1,110 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.api_client import APIUnavailable
+from utils.api_handler import (
+    CATALOG_PAGE_SIZE,
+    create_product_mapping,
+    fetch_all_products,
+    _product_info,
+    _product_number
+)
+
+
+class ProductPrefetcher:
+    """
+    Background product lookups for the overlapped (asyncio) pipeline.
+
+    Use it as an async context manager inside a running event loop. On
+    entry the bulk catalog starts downloading on a worker thread. Each
+    product id passing through tap() is then looked up once in the
+    background (catalog, then cache, then /products/{id}), while parsing
+    and aggregation continue. tap() may run on another thread (e.g. via
+    run_in_executor) so the loop stays free to dispatch lookups.
+    details() waits for whatever is still outstanding.
+    """
+
+    def __init__(self, client, cache=None, page_size=CATALOG_PAGE_SIZE):
+        self.client = client
+        self.cache = cache
+        self.page_size = page_size
+        self.product_numbers = {}
+        self.lookups = {}
+        self._executor = ThreadPoolExecutor(max_workers=client.max_workers)
+        self._catalog = None
+        self._loop = None
+
+    async def __aenter__(self):
+        self._loop = asyncio.get_running_loop()
+        self._catalog = asyncio.ensure_future(self._fetch_catalog())
+        return self
+
+    async def __aexit__(self, *exc):
+        pending = [t for t in (self._catalog, *self.lookups.values()) if not t.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._executor.shutdown()
+
+    async def _fetch_catalog(self):
+        loop = asyncio.get_running_loop()
+        products = await loop.run_in_executor(
+            self._executor, fetch_all_products, self.client, self.page_size
+        )
+        # Built on the loop thread: the cache's SQLite connection belongs to it
+        return create_product_mapping(products, cache=self.cache)
+
+    async def _lookup(self, num_id):
+        catalog = await self._catalog
+        if num_id in catalog:
+            return catalog[num_id]
+
+        if self.cache is not None:
+            cached = self.cache.get_many((num_id,))
+            if num_id in cached:
+                return cached[num_id]
+
+        loop = asyncio.get_running_loop()
+        try:
+            product = await loop.run_in_executor(
+                self._executor, self.client.get_json, f"/products/{num_id}"
+            )
+        except APIUnavailable:
+            return None
+
+        # A 404 is cached as None, like in _lookup_products
+        info = _product_info(product) if product else None
+        if self.cache is not None:
+            self.cache.put_many({num_id: info})
+        return info
+
+    def _start_lookup(self, num_id):
+        if num_id not in self.lookups:
+            self.lookups[num_id] = asyncio.ensure_future(self._lookup(num_id))
+
+    def tap(self, transactions):
+        """
+        Passes transactions through unchanged, starting a lookup for
+        each product id the first time it is seen.
+        """
+        product_numbers = self.product_numbers
+        call_soon = self._loop.call_soon_threadsafe
+
+        for tx in transactions:
+            pid_raw = tx.get("ProductID", "")
+            if pid_raw not in product_numbers:
+                num_id = product_numbers[pid_raw] = _product_number(pid_raw)
+                if num_id is not None:
+                    call_soon(self._start_lookup, num_id)
+            yield tx
+
+    async def details(self):
+        """
+        Waits for the catalog and every lookup.
+        Returns {product id: product info or None}, usable as the
+        product_mapping of enrich_sales_data.
+        """
+        await self._catalog
+        ids = list(self.lookups)
+        results = await asyncio.gather(*self.lookups.values())
+        return dict(zip(ids, results))
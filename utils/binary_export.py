@@ -0,0 +1,480 @@
+import importlib.util
+import json
+import math
+import os
+import struct
+import sys
+from array import array
+from itertools import accumulate, islice
+from operator import itemgetter
+
+# pyarrow (optional) is imported when a Parquet file is first opened
+pyarrow = None
+parquet = None
+
+
+# Same columns as save_enriched_data, with their storage types
+ENRICHED_SCHEMA = (
+    ("TransactionID", "string"),
+    ("Date", "dict"),
+    ("ProductID", "dict"),
+    ("ProductName", "dict"),
+    ("Quantity", "int64"),
+    ("UnitPrice", "float64"),
+    ("CustomerID", "dict"),
+    ("Region", "dict"),
+    ("API_Category", "dict"),
+    ("API_Brand", "dict"),
+    ("API_Rating", "float64"),
+    ("API_Match", "bool"),
+)
+
+DEFAULT_ROW_GROUP_SIZE = 256 * 1024
+
+# File layout: MAGIC, row groups (column buffers back to back), JSON footer,
+# footer length (8 bytes, little-endian), MAGIC
+MAGIC = b"SACOL1\0\0"
+FORMAT_VERSION = 1
+
+_TRAILER = struct.Struct("<Q8s")
+_SWAP = sys.byteorder != "little"  # buffers are stored little-endian
+
+
+def parquet_available():
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _load_pyarrow():
+    global pyarrow, parquet
+    if pyarrow is None:
+        import pyarrow
+        import pyarrow.parquet as parquet
+
+
+def default_binary_path(base="data/enriched_sales_data"):
+    """
+    Returns base + ".parquet" when pyarrow is installed, else base + ".sacol".
+    """
+    return base + (".parquet" if parquet_available() else ".sacol")
+
+
+def _little_endian(values):
+    if _SWAP:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if _SWAP:
+        values.byteswap()
+    return values
+
+
+def _encode_strings(values):
+    # (offsets, utf-8 blob); None is stored as an empty string
+    values = ["" if v is None else v for v in values]
+    text = "".join(values)
+    blob = text.encode("utf-8")
+    if len(blob) == len(text):
+        # ASCII: character lengths are byte lengths
+        lengths = map(len, values)
+    else:
+        lengths = (len(v.encode("utf-8")) for v in values)
+    offsets = array("I", [0])
+    offsets.extend(accumulate(lengths))
+    return [_little_endian(offsets), blob]
+
+
+def _decode_strings(offsets_data, blob):
+    offsets = _from_little_endian("I", offsets_data)
+    text = blob.decode("utf-8")
+    if len(text) == len(blob):
+        # ASCII: byte offsets are character offsets
+        return [text[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+    return [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+
+def _encode_column(kind, values):
+    """
+    Returns (byte buffers, code typecode or None) for one column chunk.
+    """
+
+    if kind == "int64":
+        return [_little_endian(array("q", values))], None
+
+    if kind == "float64":
+        if None in values:
+            values = [math.nan if v is None else v for v in values]
+        return [_little_endian(array("d", values))], None
+
+    if kind == "bool":
+        return [bytes(map(bool, values))], None
+
+    if kind == "string":
+        return _encode_strings(values), None
+
+    # dict: distinct values once, then one code per row; None is coded as
+    # len(dictionary), and codes use the smallest width that fits
+    distinct = dict.fromkeys(values)
+    distinct.pop(None, None)
+    dictionary = list(distinct)
+    index = {value: code for code, value in enumerate(dictionary)}
+    index[None] = len(dictionary)
+
+    typecode = "B" if len(dictionary) < 0xFF else "H" if len(dictionary) < 0xFFFF else "I"
+    codes = array(typecode, map(index.__getitem__, values))
+    return _encode_strings(dictionary) + [_little_endian(codes)], typecode
+
+
+def _decode_column(kind, buffers, typecode=None):
+    if kind == "int64":
+        return _from_little_endian("q", buffers[0])
+
+    if kind == "float64":
+        values = _from_little_endian("d", buffers[0])
+        if any(v != v for v in values):
+            return [None if v != v else v for v in values]
+        return values
+
+    if kind == "bool":
+        return [b == 1 for b in buffers[0]]
+
+    if kind == "string":
+        return _decode_strings(buffers[0], buffers[1])
+
+    dictionary = _decode_strings(buffers[0], buffers[1])
+    dictionary.append(None)  # the null code is len(dictionary)
+    return [dictionary[c] for c in _from_little_endian(typecode, buffers[2])]
+
+
+class ColumnarFileWriter:
+    """
+    Writes rows to a SACOL file in row groups of typed, little-endian column
+    buffers. Each group is assembled in memory and written in one call.
+    """
+
+    def __init__(self, path, schema=ENRICHED_SCHEMA, row_group_size=DEFAULT_ROW_GROUP_SIZE, append=False):
+        self.path = path
+        self.schema = schema
+        self.row_group_size = row_group_size
+        self.row_groups = []
+        self.rows = 0
+        self._pending = []
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if append and os.path.exists(path) and os.path.getsize(path) > 0:
+            reader = ColumnarFileReader(path)
+            reader.close()
+            if [tuple(c) for c in reader.footer["schema"]] != list(schema):
+                raise ValueError(f"Cannot append to '{path}': different schema.")
+            self.row_groups = reader.footer["row_groups"]
+            self.rows = reader.num_rows
+            # Overwrite the old footer; it is rewritten on close
+            self.file = open(path, "r+b")
+            self.file.seek(reader.data_end)
+            self.file.truncate()
+        else:
+            self.file = open(path, "wb")
+            self.file.write(MAGIC)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, row):
+        self._pending.append(row)
+        if len(self._pending) >= self.row_group_size:
+            self._flush()
+
+    def write_rows(self, rows):
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.row_group_size - len(self._pending)))
+            if not chunk:
+                break
+            self._pending.extend(chunk)
+            if len(self._pending) >= self.row_group_size:
+                self._flush()
+
+    def tap(self, rows):
+        """
+        Passes rows through unchanged while writing them, so the binary file
+        can be produced in the same pass as the text file.
+        """
+        for row in rows:
+            self.write(row)
+            yield row
+
+    def _flush(self):
+        rows = self._pending
+        if not rows:
+            return
+
+        offset = self.file.tell()
+        chunks = []
+        columns = {}
+
+        for name, kind in self.schema:
+            try:
+                values = list(map(itemgetter(name), rows))
+            except KeyError:
+                values = [row.get(name) for row in rows]
+            buffers, typecode = _encode_column(kind, values)
+            spans = []
+            for data in buffers:
+                spans.append([offset, len(data)])
+                offset += len(data)
+            chunks.extend(buffers)
+            columns[name] = {"spans": spans}
+            if typecode:
+                columns[name]["codes"] = typecode
+
+        self.file.write(b"".join(chunks))
+        self.row_groups.append({"rows": len(rows), "columns": columns})
+        self.rows += len(rows)
+        self._pending = []
+
+    def close(self):
+        if self.file.closed:
+            return
+
+        self._flush()
+        footer = json.dumps({
+            "version": FORMAT_VERSION,
+            "rows": self.rows,
+            "schema": [list(c) for c in self.schema],
+            "row_groups": self.row_groups,
+        }).encode("utf-8")
+
+        self.file.write(footer + _TRAILER.pack(len(footer), MAGIC))
+        self.file.close()
+
+
+class ColumnarFileReader:
+    """
+    Reads a SACOL file. Only the footer is read on open; column() reads just
+    the buffers of the requested column.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+
+        self.file.seek(0, os.SEEK_END)
+        size = self.file.tell()
+        if size < len(MAGIC) + _TRAILER.size:
+            raise ValueError(f"'{path}' is not a SACOL file.")
+
+        self.file.seek(size - _TRAILER.size)
+        footer_length, magic = _TRAILER.unpack(self.file.read(_TRAILER.size))
+        self.file.seek(0)
+        if magic != MAGIC or self.file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"'{path}' is not a SACOL file.")
+
+        self.data_end = size - _TRAILER.size - footer_length
+        self.file.seek(self.data_end)
+        self.footer = json.loads(self.file.read(footer_length))
+        if self.footer["version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported SACOL version {self.footer['version']}.")
+
+        self.types = dict((name, kind) for name, kind in self.footer["schema"])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    @property
+    def columns(self):
+        return [name for name, _ in self.footer["schema"]]
+
+    @property
+    def num_rows(self):
+        return self.footer["rows"]
+
+    def _read(self, span):
+        offset, length = span
+        self.file.seek(offset)
+        return self.file.read(length)
+
+    def column(self, name):
+        """
+        Returns every value of one column: an array for int64 and non-null
+        float64 columns, otherwise a list.
+        """
+
+        kind = self.types[name]
+        chunks = []
+        for group in self.footer["row_groups"]:
+            chunk = group["columns"][name]
+            chunks.append(_decode_column(kind, [self._read(s) for s in chunk["spans"]], chunk.get("codes")))
+
+        if not chunks:
+            return array("q") if kind == "int64" else []
+
+        # Joined once at the end: a float64 column is a list as soon as one
+        # row group has nulls
+        if all(isinstance(values, array) for values in chunks):
+            result = chunks[0]
+        else:
+            result = list(chunks[0])
+        for values in chunks[1:]:
+            result.extend(values)
+        return result
+
+    def rows(self, columns=None):
+        """
+        Yields row dicts with the given columns (default: all).
+        """
+        names = columns or self.columns
+        data = [self.column(name) for name in names]
+        for values in zip(*data):
+            yield dict(zip(names, values))
+
+
+class ParquetReader:
+    """
+    Same read API as ColumnarFileReader over a Parquet file (needs pyarrow).
+    """
+
+    def __init__(self, path):
+        _load_pyarrow()
+        self.path = path
+        self.file = parquet.ParquetFile(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    @property
+    def columns(self):
+        return self.file.schema_arrow.names
+
+    @property
+    def num_rows(self):
+        return self.file.metadata.num_rows
+
+    def column(self, name):
+        return self.file.read(columns=[name]).column(name).to_pylist()
+
+    def rows(self, columns=None):
+        names = columns or self.columns
+        data = [self.column(name) for name in names]
+        for values in zip(*data):
+            yield dict(zip(names, values))
+
+
+def _parquet_schema(schema):
+    types = {
+        "string": pyarrow.string(),
+        "dict": pyarrow.dictionary(pyarrow.int32(), pyarrow.string()),
+        "int64": pyarrow.int64(),
+        "float64": pyarrow.float64(),
+        "bool": pyarrow.bool_(),
+    }
+    return pyarrow.schema([(name, types[kind]) for name, kind in schema])
+
+
+class ParquetWriter:
+    """
+    ColumnarFileWriter counterpart writing Parquet row groups through pyarrow.
+    """
+
+    def __init__(self, path, schema=ENRICHED_SCHEMA, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        _load_pyarrow()
+        self.schema = schema
+        self.arrow_schema = _parquet_schema(schema)
+        self.row_group_size = row_group_size
+        self.writer = parquet.ParquetWriter(path, self.arrow_schema)
+        self._pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, row):
+        self._pending.append(row)
+        if len(self._pending) >= self.row_group_size:
+            self._flush()
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.write(row)
+
+    def tap(self, rows):
+        for row in rows:
+            self.write(row)
+            yield row
+
+    def _flush(self):
+        if not self._pending:
+            return
+        columns = {name: [row.get(name) for row in self._pending] for name, _ in self.schema}
+        self.writer.write_table(pyarrow.table(columns, schema=self.arrow_schema))
+        self._pending = []
+
+    def close(self):
+        if self.writer is None:
+            return
+        self._flush()
+        self.writer.close()
+        self.writer = None
+
+
+def open_binary_writer(path, append=False, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+    """
+    Returns a Parquet writer for *.parquet paths (needs pyarrow),
+    otherwise a SACOL writer.
+    """
+
+    if path.endswith(".parquet"):
+        if not parquet_available():
+            raise ValueError("Writing Parquet needs pyarrow; use a .sacol path instead.")
+        if append:
+            raise ValueError("Parquet files cannot be appended to; use a .sacol path for incremental runs.")
+        return ParquetWriter(path, row_group_size=row_group_size)
+
+    return ColumnarFileWriter(path, row_group_size=row_group_size, append=append)
+
+
+def open_binary_reader(path):
+    """
+    Opens an exported file for reading (Parquet or SACOL, by extension).
+    """
+    if path.endswith(".parquet"):
+        if not parquet_available():
+            raise ValueError("Reading Parquet needs pyarrow.")
+        return ParquetReader(path)
+    return ColumnarFileReader(path)
+
+
+def save_enriched_binary(enriched_transactions, filename=None, append=False):
+    """
+    Binary counterpart of save_enriched_data.
+    Defaults to data/enriched_sales_data.parquet or .sacol (see default_binary_path).
+    """
+    with open_binary_writer(filename or default_binary_path(), append=append) as writer:
+        writer.write_rows(enriched_transactions)
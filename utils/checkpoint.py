@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+
+from utils.data_processor import new_aggregates
+from utils.sketches import HyperLogLog
+
+
+CHECKPOINT_VERSION = 1
+DEFAULT_CHECKPOINT_FILE = "data/checkpoint.json"
+
+# Bytes just before the saved offset that must still match on the next run
+FINGERPRINT_BYTES = 4096
+
+
+def _distinct_to_json(values):
+    return sorted(values) if isinstance(values, set) else values.to_json()
+
+
+def _distinct_from_json(data):
+    return set(data) if isinstance(data, list) else HyperLogLog.from_json(data)
+
+
+def aggregates_to_json(agg):
+    """
+    Converts an aggregate_sales result into JSON-safe data (sets become
+    sorted lists, HyperLogLog counters their registers).
+    """
+    return {
+        "total_revenue": agg["total_revenue"],
+        "transaction_count": agg["transaction_count"],
+        "distinct_precision": agg.get("distinct_precision"),
+        "regions": agg["regions"],
+        "products": agg["products"],
+        "customers": {
+            cid: {"spent": s["spent"], "count": s["count"], "products": _distinct_to_json(s["products"])}
+            for cid, s in agg["customers"].items()
+        },
+        "daily": {
+            date: {"rev": s["rev"], "count": s["count"], "cust": _distinct_to_json(s["cust"])}
+            for date, s in agg["daily"].items()
+        },
+    }
+
+
+def aggregates_from_json(data):
+    """
+    Inverse of aggregates_to_json.
+    """
+
+    agg = new_aggregates(distinct_precision=data.get("distinct_precision"))
+    agg["total_revenue"] = data["total_revenue"]
+    agg["transaction_count"] = data["transaction_count"]
+    agg["regions"] = data["regions"]
+    agg["products"] = data["products"]
+    agg["customers"] = {
+        cid: {"spent": s["spent"], "count": s["count"], "products": _distinct_from_json(s["products"])}
+        for cid, s in data["customers"].items()
+    }
+    agg["daily"] = {
+        date: {"rev": s["rev"], "count": s["count"], "cust": _distinct_from_json(s["cust"])}
+        for date, s in data["daily"].items()
+    }
+    return agg
+
+
+def enrichment_to_json(summary):
+    return {
+        "total": summary["total"],
+        "matched": summary["matched"],
+        "failed": [[pid, name, count] for (pid, name), count in summary["failed"].items()],
+    }
+
+
+def enrichment_from_json(data):
+    return {
+        "total": data["total"],
+        "matched": data["matched"],
+        "failed": {(pid, name): count for pid, name, count in data["failed"]},
+    }
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_layout(filename):
+    """
+    Returns (header_end, complete_end, header_digest): where the body starts,
+    where the last complete line ends, and a digest of the header line.
+    A trailing line without a newline is left for the next run.
+    """
+
+    size = os.path.getsize(filename)
+
+    with open(filename, "rb") as f:
+        header = f.readline()
+        header_end = f.tell()
+
+        complete_end = header_end
+        if size > header_end:
+            # Scan backwards from the end for the last newline
+            pos = size
+            while pos > header_end:
+                step = min(1 << 16, pos - header_end)
+                f.seek(pos - step)
+                block = f.read(step)
+                nl = block.rfind(b"\n")
+                if nl != -1:
+                    complete_end = pos - step + nl + 1
+                    break
+                pos -= step
+
+    return header_end, complete_end, _digest(header)
+
+
+def _fingerprint(filename, offset):
+    start = max(0, offset - FINGERPRINT_BYTES)
+    with open(filename, "rb") as f:
+        f.seek(start)
+        return _digest(f.read(offset - start))
+
+
+def load_checkpoint(path=DEFAULT_CHECKPOINT_FILE):
+    """
+    Returns the saved checkpoint dict, or None if missing or unreadable.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    if state.get("version") != CHECKPOINT_VERSION:
+        return None
+    return state
+
+
+def resume_offset(state, filename, filters, distinct_precision=None):
+    """
+    Returns the byte offset to resume from, or None if the checkpoint cannot
+    be used (different file, filters or distinct-count mode, truncated file,
+    changed header, or rewritten content before the offset).
+    """
+
+    if state is None:
+        return None
+
+    # Filter keys added since the checkpoint was written count as unset
+    saved_filters = {key: state["filters"].get(key) for key in filters}
+    if state["source"] != os.path.abspath(filename) or saved_filters != filters:
+        return None
+
+    if state["aggregates"].get("distinct_precision") != distinct_precision:
+        return None
+
+    offset = state["offset"]
+    if os.path.getsize(filename) < offset:
+        return None
+
+    _, _, header_digest = file_layout(filename)
+    if header_digest != state["header"]:
+        return None
+
+    if _fingerprint(filename, offset) != state["fingerprint"]:
+        return None
+
+    return offset
+
+
+def save_checkpoint(path, filename, offset, filters, aggregates, validation, enrichment):
+    """
+    Writes the checkpoint atomically (temp file + rename).
+    """
+
+    _, _, header_digest = file_layout(filename)
+
+    state = {
+        "version": CHECKPOINT_VERSION,
+        "source": os.path.abspath(filename),
+        "header": header_digest,
+        "offset": offset,
+        "fingerprint": _fingerprint(filename, offset),
+        "filters": filters,
+        "aggregates": aggregates_to_json(aggregates),
+        "validation": validation,
+        "enrichment": enrichment_to_json(enrichment),
+    }
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
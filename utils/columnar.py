@@ -0,0 +1,188 @@
+from array import array
+
+
+FIELDS = (
+    "TransactionID", "Date", "ProductID", "ProductName",
+    "Quantity", "UnitPrice", "CustomerID", "Region"
+)
+
+# Low-cardinality text columns stored as dictionary codes
+ENCODED_FIELDS = ("Date", "ProductID", "ProductName", "CustomerID", "Region")
+
+
+class StringColumn:
+    """
+    Dictionary-encoded string column.
+    Each distinct value is stored once; rows hold a 4-byte code into `values`.
+    """
+
+    def __init__(self, values=None, index=None):
+        self.values = values if values is not None else []
+        self.index = index if index is not None else {}
+        self.codes = array("I")
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, i):
+        return self.values[self.codes[i]]
+
+    def __iter__(self):
+        values = self.values
+        return (values[c] for c in self.codes)
+
+    def encode(self, value):
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def append(self, value):
+        self.codes.append(self.encode(value))
+
+    def __getstate__(self):
+        # The reverse index is rebuilt on load instead of being pickled
+        return {"values": self.values, "codes": self.codes}
+
+    def __setstate__(self, state):
+        self.values = state["values"]
+        self.codes = state["codes"]
+        self.index = {v: i for i, v in enumerate(self.values)}
+
+    def extend(self, other):
+        """
+        Appends another column's rows, re-encoding them into this dictionary.
+        """
+        remap = [self.encode(v) for v in other.values]
+        self.codes.extend(remap[c] for c in other.codes)
+
+    def empty_like(self):
+        """
+        Returns an empty column sharing this column's dictionary.
+        """
+        return StringColumn(self.values, self.index)
+
+
+class ColumnarTransactions:
+    """
+    Column-oriented container for parsed transactions.
+
+    Quantity, UnitPrice and the derived Amount are typed arrays, and the
+    repeated text fields are dictionary-encoded. Iterating yields the same
+    dicts parse_transactions produces, so row-based code keeps working.
+    """
+
+    def __init__(self, template=None):
+        self.transaction_ids = []
+        self.quantity = array("q")
+        self.unit_price = array("d")
+        self.amount = array("d")
+
+        if template is None:
+            self.strings = {name: StringColumn() for name in ENCODED_FIELDS}
+        else:
+            self.strings = {name: col.empty_like() for name, col in template.strings.items()}
+
+    @classmethod
+    def from_transactions(cls, transactions):
+        columns = cls()
+        columns.extend(transactions)
+        return columns
+
+    def __len__(self):
+        return len(self.quantity)
+
+    def __iter__(self):
+        tids = self.transaction_ids
+        qty = self.quantity
+        price = self.unit_price
+        s = self.strings
+
+        for i, dt, pid, pname, cid, region in zip(
+            range(len(qty)), s["Date"], s["ProductID"], s["ProductName"],
+            s["CustomerID"], s["Region"]
+        ):
+            yield {
+                "TransactionID": tids[i],
+                "Date": dt,
+                "ProductID": pid,
+                "ProductName": pname,
+                "Quantity": qty[i],
+                "UnitPrice": price[i],
+                "CustomerID": cid,
+                "Region": region
+            }
+
+    def __getitem__(self, i):
+        s = self.strings
+        return {
+            "TransactionID": self.transaction_ids[i],
+            "Date": s["Date"][i],
+            "ProductID": s["ProductID"][i],
+            "ProductName": s["ProductName"][i],
+            "Quantity": self.quantity[i],
+            "UnitPrice": self.unit_price[i],
+            "CustomerID": s["CustomerID"][i],
+            "Region": s["Region"][i]
+        }
+
+    def codes(self, field):
+        return self.strings[field].codes
+
+    def values(self, field):
+        return self.strings[field].values
+
+    def append(self, tx):
+        qty = tx["Quantity"]
+        price = tx["UnitPrice"]
+
+        self.transaction_ids.append(tx["TransactionID"])
+        self.quantity.append(qty)
+        self.unit_price.append(price)
+        self.amount.append(qty * price)
+
+        for name, col in self.strings.items():
+            col.append(tx[name])
+
+    def extend(self, transactions):
+        for tx in transactions:
+            self.append(tx)
+
+    def extend_columnar(self, other):
+        """
+        Appends all rows of another ColumnarTransactions
+        (e.g. chunks parsed in parallel).
+        """
+
+        self.transaction_ids.extend(other.transaction_ids)
+        self.quantity.extend(other.quantity)
+        self.unit_price.extend(other.unit_price)
+        self.amount.extend(other.amount)
+
+        for name, col in self.strings.items():
+            col.extend(other.strings[name])
+
+    def take(self, indices):
+        """
+        Returns a new container holding only the given row positions.
+        String dictionaries are shared with this container.
+        """
+
+        subset = ColumnarTransactions(template=self)
+
+        tids = self.transaction_ids
+        qty = self.quantity
+        price = self.unit_price
+        amount = self.amount
+
+        subset.transaction_ids = [tids[i] for i in indices]
+        subset.quantity = array("q", (qty[i] for i in indices))
+        subset.unit_price = array("d", (price[i] for i in indices))
+        subset.amount = array("d", (amount[i] for i in indices))
+
+        for name, col in self.strings.items():
+            codes = col.codes
+            subset.strings[name].codes = array("I", (codes[i] for i in indices))
+
+        return subset
@@ -0,0 +1,244 @@
+import datetime
+import json
+import os
+import sqlite3
+
+
+DEFAULT_CUBE_FILE = "data/sales_cube.sqlite"
+
+DIMENSIONS = ("date", "region", "product", "segment")
+
+# Coarse layer without the product dimension; period and region views only
+# need this, and it is a few thousand cells even for years of data
+SUMMARY_DIMENSIONS = ("date", "region", "segment")
+PERIODS = ("day", "week", "month")
+
+# The input has no customer attributes, so rows are segmented by order value
+SEGMENTS = ((1000, "small"), (10000, "medium"), (float("inf"), "large"))
+
+
+def order_segment(amount):
+    """
+    Returns the segment name for an order amount ("small", "medium", "large").
+    """
+    for upper, name in SEGMENTS:
+        if amount < upper:
+            return name
+    return SEGMENTS[-1][1]
+
+
+def period_key(date, period):
+    """
+    Maps a YYYY-MM-DD date to its day, ISO week (YYYY-Www) or month (YYYY-MM).
+    """
+    if period == "day":
+        return date
+    if period == "month":
+        return date[:7]
+    if period == "week":
+        year, week, _ = datetime.date.fromisoformat(date).isocalendar()
+        return f"{year}-W{week:02d}"
+    raise ValueError(f"Unknown period '{period}' (expected one of {', '.join(PERIODS)}).")
+
+
+class SalesCube:
+    """
+    Materialized aggregate cube keyed by (date, region, product, segment)
+    with revenue, quantity and transaction count per cell.
+
+    Day/week/month and per-region views are rollups over the cells, so they
+    cost O(cells) instead of a rescan of the rows. Rollups without the
+    product dimension read the much smaller (date, region, segment) layer.
+    """
+
+    def __init__(self):
+        self.cells = {}  # (date, region, product, segment) -> [revenue, quantity, count]
+        self._summary = None
+
+    def __len__(self):
+        return len(self.cells) if self.cells is not None else len(self.summary())
+
+    def summary(self):
+        """
+        Returns the (date, region, segment) layer, computing it on first use.
+        """
+        if self._summary is None:
+            summary = {}
+            for (date, region, _, segment), (revenue, quantity, count) in self.cells.items():
+                key = (date, region, segment)
+                cell = summary.get(key)
+                if cell is None:
+                    summary[key] = [revenue, quantity, count]
+                else:
+                    cell[0] += revenue
+                    cell[1] += quantity
+                    cell[2] += count
+            self._summary = summary
+        return self._summary
+
+    def update(self, transactions):
+        """
+        Adds validated transactions to the cube.
+        """
+
+        self._summary = None
+        cells = self.cells
+        for tx in transactions:
+            qty = tx["Quantity"]
+            amount = qty * tx["UnitPrice"]
+            key = (tx["Date"], tx["Region"], tx["ProductName"], order_segment(amount))
+
+            cell = cells.get(key)
+            if cell is None:
+                cells[key] = [amount, qty, 1]
+            else:
+                cell[0] += amount
+                cell[1] += qty
+                cell[2] += 1
+        return self
+
+    def tap(self, transactions):
+        """
+        Passes transactions through unchanged while adding them to the cube.
+        """
+        update = self.update
+        for tx in transactions:
+            update((tx,))
+            yield tx
+
+    def rollup(self, by=("region",), period=None, region=None):
+        """
+        Sums the cells over every dimension not in `by`.
+
+        `by` is any of "region", "product", "segment". With `period`
+        ("day", "week", "month") the period is the first key element.
+        Returns {key tuple: {"revenue", "quantity", "count"}} sorted by key.
+        """
+
+        if "product" in by:
+            if self.cells is None:
+                raise ValueError("Product rollups need the cube loaded with detail=True.")
+            source, dimensions = self.cells, DIMENSIONS
+        else:
+            source, dimensions = self.summary(), SUMMARY_DIMENSIONS
+
+        positions = [dimensions.index(name) for name in by]
+        periods = {}
+        result = {}
+
+        for key, (revenue, quantity, count) in source.items():
+            if region is not None and key[1] != region:
+                continue
+
+            group = tuple(key[i] for i in positions)
+            if period is not None:
+                date = key[0]
+                label = periods.get(date)
+                if label is None:
+                    label = periods[date] = period_key(date, period)
+                group = (label,) + group
+
+            stats = result.get(group)
+            if stats is None:
+                stats = result[group] = {"revenue": 0.0, "quantity": 0, "count": 0}
+            stats["revenue"] += revenue
+            stats["quantity"] += quantity
+            stats["count"] += count
+
+        return dict(sorted(result.items()))
+
+    def period_over_period(self, period="month", region=None):
+        """
+        Returns [(period, revenue, count, change_pct)] in time order, where
+        change_pct is the revenue change against the previous period
+        (None for the first one).
+        """
+
+        rows = []
+        previous = None
+        for (label,), stats in self.rollup(by=(), period=period, region=region).items():
+            revenue = stats["revenue"]
+            change = (revenue - previous) / previous * 100 if previous else None
+            rows.append((label, revenue, stats["count"], change))
+            previous = revenue
+        return rows
+
+    def save(self, path=DEFAULT_CUBE_FILE, meta=None):
+        """
+        Writes the cube and a JSON-safe `meta` dict to SQLite, replacing
+        the previous file atomically (temp file + rename).
+        """
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp = path + ".tmp"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+        conn = sqlite3.connect(tmp)
+        try:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE cells ("
+                    " date TEXT, region TEXT, product TEXT, segment TEXT,"
+                    " revenue REAL, quantity INTEGER, count INTEGER,"
+                    " PRIMARY KEY (date, region, product, segment)) WITHOUT ROWID"
+                )
+                conn.execute(
+                    "CREATE TABLE summary ("
+                    " date TEXT, region TEXT, segment TEXT,"
+                    " revenue REAL, quantity INTEGER, count INTEGER,"
+                    " PRIMARY KEY (date, region, segment)) WITHOUT ROWID"
+                )
+                conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+                conn.executemany(
+                    "INSERT INTO cells VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key + tuple(cell) for key, cell in self.cells.items())
+                )
+                conn.executemany(
+                    "INSERT INTO summary VALUES (?, ?, ?, ?, ?, ?)",
+                    (key + tuple(cell) for key, cell in self.summary().items())
+                )
+                conn.executemany(
+                    "INSERT INTO meta VALUES (?, ?)",
+                    ((k, json.dumps(v)) for k, v in (meta or {}).items())
+                )
+        finally:
+            conn.close()
+
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_CUBE_FILE, detail=True):
+        """
+        Returns (cube, meta), or (None, None) if the file does not exist.
+        With detail=False only the (date, region, segment) layer is read:
+        enough for period and region views, but the cube cannot be updated.
+        """
+
+        if not os.path.exists(path):
+            return None, None
+
+        conn = sqlite3.connect(path)
+        try:
+            cube = cls()
+            if detail:
+                cube.cells = {
+                    (date, region, product, segment): [revenue, quantity, count]
+                    for date, region, product, segment, revenue, quantity, count
+                    in conn.execute("SELECT * FROM cells")
+                }
+            else:
+                cube.cells = None
+                cube._summary = {
+                    (date, region, segment): [revenue, quantity, count]
+                    for date, region, segment, revenue, quantity, count
+                    in conn.execute("SELECT * FROM summary")
+                }
+            meta = {k: json.loads(v) for k, v in conn.execute("SELECT key, value FROM meta")}
+        finally:
+            conn.close()
+
+        return cube, meta
@@ -1,90 +1,463 @@
+import functools
+import heapq
+
+from utils import numpy_backend
+from utils.columnar import ColumnarTransactions
+from utils.metrics import instrumented
+from utils.sketches import SpaceSaving, CountMinSketch, new_distinct
+
+
+def new_aggregates(epsilon=None, delta=0.01, distinct_precision=None):
+    """
+    Returns an empty accumulator set used by aggregate_sales.
+
+    With epsilon set, products and customers are tracked approximately in
+    fixed memory (see new_heavy_hitters) instead of one entry per key.
+    With distinct_precision set, unique customers per day and unique products
+    per customer are HyperLogLog counters instead of sets.
+    """
+    agg = {
+        "total_revenue": 0.0,
+        "transaction_count": 0,
+        "regions": {},
+        "products": {},
+        "customers": {},
+        "daily": {},
+    }
+    if epsilon is not None:
+        agg["heavy_hitters"] = new_heavy_hitters(epsilon, delta)
+    if distinct_precision is not None:
+        agg["distinct_precision"] = distinct_precision
+    return agg
+
+
+
+def _distinct_factory(agg):
+    """
+    Returns the constructor for the aggregates' distinct-value containers.
+    """
+    return functools.partial(new_distinct, agg.get("distinct_precision"))
+
+
+
+def new_heavy_hitters(epsilon=0.001, delta=0.01):
+    """
+    Sketches for approximate top products (by quantity) and customers (by spend).
+
+    Space-Saving ranks the keys: estimates overcount by at most epsilon times
+    the total quantity/revenue. Count-Min supplies the secondary figures
+    (product revenue, customer orders), overcounting by at most epsilon times
+    the total with probability 1 - delta.
+    """
+    return {
+        "products": SpaceSaving.for_error(epsilon),
+        "customers": SpaceSaving.for_error(epsilon),
+        "product_revenue": CountMinSketch(epsilon, delta),
+        "customer_orders": CountMinSketch(epsilon, delta),
+    }
+
+
+
+@instrumented
+def aggregate_sales(transactions, aggregates=None):
+    """
+    Computes every accumulator needed by the analysis functions in one pass.
+    Pass an existing result as `aggregates` to keep adding to it.
+    """
+    return _accumulate(transactions, aggregates if aggregates is not None else new_aggregates())
+
+
+
+def _accumulate(transactions, agg):
+    """
+    Body of aggregate_sales; row-at-a-time callers use it directly so
+    instrumentation adds no per-row cost.
+    """
+
+    if "heavy_hitters" in agg:
+        return _accumulate_approx(transactions, agg)
+
+    if isinstance(transactions, ColumnarTransactions):
+        if numpy_backend.enabled():
+            return numpy_backend.aggregate_columnar(transactions, agg)
+        return _aggregate_columnar(transactions, agg)
+
+    regions = agg["regions"]
+    products = agg["products"]
+    customers = agg["customers"]
+    daily = agg["daily"]
+    new_set = _distinct_factory(agg)
+
+    total = agg["total_revenue"]
+    count = agg["transaction_count"]
+
+    for tx in transactions:
+        qty = tx["Quantity"]
+        amount = qty * tx["UnitPrice"]
+        name = tx["ProductName"]
+        cid = tx["CustomerID"]
+        date = tx["Date"]
+
+        total += amount
+        count += 1
+
+        # Region
+        stats = regions.get(tx["Region"])
+        if stats is None:
+            stats = regions[tx["Region"]] = {"total_sales": 0.0, "transaction_count": 0}
+        stats["total_sales"] += amount
+        stats["transaction_count"] += 1
+
+        # Product
+        stats = products.get(name)
+        if stats is None:
+            stats = products[name] = {"qty": 0, "rev": 0.0}
+        stats["qty"] += qty
+        stats["rev"] += amount
+
+        # Customer
+        stats = customers.get(cid)
+        if stats is None:
+            stats = customers[cid] = {"spent": 0.0, "count": 0, "products": new_set()}
+        stats["spent"] += amount
+        stats["count"] += 1
+        stats["products"].add(name)
+
+        # Day
+        stats = daily.get(date)
+        if stats is None:
+            stats = daily[date] = {"rev": 0.0, "count": 0, "cust": new_set()}
+        stats["rev"] += amount
+        stats["count"] += 1
+        stats["cust"].add(cid)
+
+    agg["total_revenue"] = total
+    agg["transaction_count"] = count
+
+    return agg
+
+
+
+def _accumulate_approx(transactions, agg):
+    """
+    _accumulate for aggregates created with an epsilon: products and
+    customers go into the sketches instead of per-key dicts.
+    """
+
+    hitters = agg["heavy_hitters"]
+    add_product = hitters["products"].add
+    add_customer = hitters["customers"].add
+    add_revenue = hitters["product_revenue"].add
+    add_order = hitters["customer_orders"].add
+
+    regions = agg["regions"]
+    daily = agg["daily"]
+    new_set = _distinct_factory(agg)
+
+    total = agg["total_revenue"]
+    count = agg["transaction_count"]
+
+    for tx in transactions:
+        qty = tx["Quantity"]
+        amount = qty * tx["UnitPrice"]
+        name = tx["ProductName"]
+        cid = tx["CustomerID"]
+        date = tx["Date"]
+
+        total += amount
+        count += 1
+
+        stats = regions.get(tx["Region"])
+        if stats is None:
+            stats = regions[tx["Region"]] = {"total_sales": 0.0, "transaction_count": 0}
+        stats["total_sales"] += amount
+        stats["transaction_count"] += 1
+
+        add_product(name, qty)
+        add_revenue(name, amount)
+        add_customer(cid, amount)
+        add_order(cid)
+
+        stats = daily.get(date)
+        if stats is None:
+            stats = daily[date] = {"rev": 0.0, "count": 0, "cust": new_set()}
+        stats["rev"] += amount
+        stats["count"] += 1
+        stats["cust"].add(cid)
+
+    agg["total_revenue"] = total
+    agg["transaction_count"] = count
+
+    return agg
+
+
+
+def _slot(table, by_code, code, values, factory):
+    """
+    Returns the stats dict for a dictionary code, creating it on first use.
+    """
+    key = values[code]
+    stats = table.get(key)
+    if stats is None:
+        stats = table[key] = factory()
+    by_code[code] = stats
+    return stats
+
+
+
+def _aggregate_columnar(columns, agg):
+    """
+    aggregate_sales for ColumnarTransactions.
+    Groups on dictionary codes, so each row costs list indexing instead of string hashing.
+    """
+
+    region_vals = columns.values("Region")
+    name_vals = columns.values("ProductName")
+    cust_vals = columns.values("CustomerID")
+    date_vals = columns.values("Date")
+
+    by_region = [None] * len(region_vals)
+    by_product = [None] * len(name_vals)
+    by_customer = [None] * len(cust_vals)
+    by_date = [None] * len(date_vals)
+
+    regions = agg["regions"]
+    products = agg["products"]
+    customers = agg["customers"]
+    daily = agg["daily"]
+    new_set = _distinct_factory(agg)
+
+    total = agg["total_revenue"]
+
+    for qty, amount, rc, nc, cc, dc in zip(
+        columns.quantity, columns.amount, columns.codes("Region"),
+        columns.codes("ProductName"), columns.codes("CustomerID"), columns.codes("Date")
+    ):
+        total += amount
+
+        stats = by_region[rc] or _slot(
+            regions, by_region, rc, region_vals,
+            lambda: {"total_sales": 0.0, "transaction_count": 0}
+        )
+        stats["total_sales"] += amount
+        stats["transaction_count"] += 1
+
+        stats = by_product[nc] or _slot(
+            products, by_product, nc, name_vals, lambda: {"qty": 0, "rev": 0.0}
+        )
+        stats["qty"] += qty
+        stats["rev"] += amount
+
+        stats = by_customer[cc] or _slot(
+            customers, by_customer, cc, cust_vals,
+            lambda: {"spent": 0.0, "count": 0, "products": new_set()}
+        )
+        stats["spent"] += amount
+        stats["count"] += 1
+        stats["products"].add(name_vals[nc])
+
+        stats = by_date[dc] or _slot(
+            daily, by_date, dc, date_vals, lambda: {"rev": 0.0, "count": 0, "cust": new_set()}
+        )
+        stats["rev"] += amount
+        stats["count"] += 1
+        stats["cust"].add(cust_vals[cc])
+
+    agg["total_revenue"] = total
+    agg["transaction_count"] += len(columns)
+
+    return agg
+
+
+
+def update_aggregates(aggregates, tx):
+    """
+    Adds a single transaction to an existing aggregate result.
+    """
+    return _accumulate((tx,), aggregates)
+
+
+
+def merge_aggregates(target, other):
+    """
+    Adds the accumulators of `other` into `target` (e.g. partial results
+    from parallel chunks). Keys new to `target` keep `other`'s order.
+    """
+
+    new_set = _distinct_factory(target)
+
+    target["total_revenue"] += other["total_revenue"]
+    target["transaction_count"] += other["transaction_count"]
+
+    for region, s in other["regions"].items():
+        stats = target["regions"].setdefault(region, {"total_sales": 0.0, "transaction_count": 0})
+        stats["total_sales"] += s["total_sales"]
+        stats["transaction_count"] += s["transaction_count"]
+
+    for name, s in other["products"].items():
+        stats = target["products"].setdefault(name, {"qty": 0, "rev": 0.0})
+        stats["qty"] += s["qty"]
+        stats["rev"] += s["rev"]
+
+    for cid, s in other["customers"].items():
+        stats = target["customers"].get(cid)
+        if stats is None:
+            stats = target["customers"][cid] = {"spent": 0.0, "count": 0, "products": new_set()}
+        stats["spent"] += s["spent"]
+        stats["count"] += s["count"]
+        stats["products"] |= s["products"]
+
+    for date, s in other["daily"].items():
+        stats = target["daily"].get(date)
+        if stats is None:
+            stats = target["daily"][date] = {"rev": 0.0, "count": 0, "cust": new_set()}
+        stats["rev"] += s["rev"]
+        stats["count"] += s["count"]
+        stats["cust"] |= s["cust"]
+
+    if "heavy_hitters" in other:
+        for name, sketch in other["heavy_hitters"].items():
+            target["heavy_hitters"][name].merge(sketch)
+
+    return target
+
+
+
+def tap_aggregates(transactions, aggregates):
+    """
+    Passes transactions through unchanged while adding each one to
+    `aggregates`, so metrics can be accumulated inside a streaming pipeline.
+    """
+    for tx in transactions:
+        _accumulate((tx,), aggregates)
+        yield tx
+
+
+
+def _as_aggregates(data):
+    """
+    Accepts either a transaction list or an aggregate_sales result.
+    """
+    if isinstance(data, dict):
+        return data
+    return aggregate_sales(data)
+
+
+
+@instrumented
 def calculate_total_revenue(transactions):
     """
     Computes total revenue across all transactions.
     """
+    if isinstance(transactions, dict):
+        return transactions["total_revenue"]
+    if isinstance(transactions, ColumnarTransactions):
+        return sum(transactions.amount)
     return sum(tx["Quantity"] * tx["UnitPrice"] for tx in transactions)
 
 
 
+@instrumented
 def region_wise_sales(transactions):
     """
     Builds region-level sales summary sorted by total sales (DESC).
     """
 
-    region_stats = {}
-    overall_total = 0.0
-
-    # Aggregate
-    for tx in transactions:
-        region = tx["Region"]
-        amount = tx["Quantity"] * tx["UnitPrice"]
-        overall_total += amount
+    agg = _as_aggregates(transactions)
+    overall_total = agg["total_revenue"]
 
-        stats = region_stats.setdefault(region, {"total_sales": 0.0, "transaction_count": 0})
-        stats["total_sales"] += amount
-        stats["transaction_count"] += 1
+    region_stats = {}
 
     # Add percentages
-    for region, stats in region_stats.items():
-        stats["percentage"] = (stats["total_sales"] / overall_total * 100) if overall_total else 0.0
+    for region, s in agg["regions"].items():
+        region_stats[region] = {
+            "total_sales": s["total_sales"],
+            "transaction_count": s["transaction_count"],
+            "percentage": (s["total_sales"] / overall_total * 100) if overall_total else 0.0
+        }
 
     # Sort by total sales
     return dict(sorted(region_stats.items(), key=lambda x: x[1]["total_sales"], reverse=True))
 
 
 
+@instrumented
 def top_selling_products(transactions, n=5):
     """
     Returns top n products by quantity sold.
     """
 
-    product_stats = {}
+    agg = _as_aggregates(transactions)
 
-    for tx in transactions:
-        name = tx["ProductName"]
-        qty = tx["Quantity"]
-        revenue = qty * tx["UnitPrice"]
+    if "heavy_hitters" in agg:
+        hitters = agg["heavy_hitters"]
+        revenue = hitters["product_revenue"]
+        return [(name, qty, revenue.estimate(name)) for name, qty, _ in hitters["products"].top(n)]
 
-        stats = product_stats.setdefault(name, {"qty": 0, "rev": 0.0})
-        stats["qty"] += qty
-        stats["rev"] += revenue
+    # Heap selection: O(p log n) instead of sorting every product
+    top = heapq.nlargest(n, agg["products"].items(), key=lambda x: x[1]["qty"])
+
+    return [(name, s["qty"], s["rev"]) for name, s in top]
 
-    # Convert to list of tuples
-    products = [(name, s["qty"], s["rev"]) for name, s in product_stats.items()]
 
-    # Sort by qty DESC
-    products.sort(key=lambda x: x[1], reverse=True)
 
-    return products[:n]
+@instrumented
+def top_customers(transactions, n=5):
+    """
+    Returns top n customers as (customer_id, total_spent, purchase_count).
+    """
+
+    agg = _as_aggregates(transactions)
 
+    if "heavy_hitters" in agg:
+        hitters = agg["heavy_hitters"]
+        orders = hitters["customer_orders"]
+        return [(cid, spent, round(orders.estimate(cid))) for cid, spent, _ in hitters["customers"].top(n)]
 
+    top = heapq.nlargest(n, agg["customers"].items(), key=lambda x: x[1]["spent"])
 
+    return [(cid, s["spent"], s["count"]) for cid, s in top]
+
+
+
+@instrumented
 def customer_analysis(transactions):
     """
     Returns spending patterns and behavior for each customer.
+    With approximate aggregates only the monitored heavy hitters are
+    returned, with estimated figures and no products_bought. With
+    HyperLogLog distinct counters, products_bought is empty and
+    unique_products holds the estimate.
     """
 
-    customers = {}
-
-    for tx in transactions:
-        cid = tx["CustomerID"]
-        amount = tx["Quantity"] * tx["UnitPrice"]
-        product = tx["ProductName"]
-
-        stats = customers.setdefault(cid, {"spent": 0.0, "count": 0, "products": set()})
-        stats["spent"] += amount
-        stats["count"] += 1
-        stats["products"].add(product)
+    agg = _as_aggregates(transactions)
+
+    if "heavy_hitters" in agg:
+        hitters = agg["heavy_hitters"]
+        tracked = hitters["customers"]
+        final = {}
+        for cid, spent, _ in tracked.top(len(tracked)):
+            count = round(hitters["customer_orders"].estimate(cid))
+            final[cid] = {
+                "total_spent": spent,
+                "purchase_count": count,
+                "avg_order_value": spent / count if count else 0,
+                "products_bought": [],
+                "unique_products": None
+            }
+        return final
 
     # Final formatting
     final = {}
-    for cid, s in customers.items():
+    for cid, s in agg["customers"].items():
         avg = s["spent"] / s["count"] if s["count"] else 0
+        products = s["products"]
         final[cid] = {
             "total_spent": s["spent"],
             "purchase_count": s["count"],
             "avg_order_value": avg,
-            "products_bought": list(s["products"])
+            "products_bought": list(products) if isinstance(products, set) else [],
+            "unique_products": len(products)
         }
 
     # Sort DESC by spending
@@ -92,23 +465,14 @@ def customer_analysis(transactions):
 
 
 
+@instrumented
 def daily_sales_trend(transactions):
     """
     Summaries revenue and customer activity for each date.
+    unique_customers is an estimate when the aggregates use HyperLogLog.
     """
 
-    daily = {}
-
-    for tx in transactions:
-        date = tx["Date"]
-        amount = tx["Quantity"] * tx["UnitPrice"]
-        cust = tx["CustomerID"]
-
-        stats = daily.setdefault(date, {"rev": 0.0, "count": 0, "cust": set()})
-
-        stats["rev"] += amount
-        stats["count"] += 1
-        stats["cust"].add(cust)
+    agg = _as_aggregates(transactions)
 
     # Convert to final structure
     final = {
@@ -117,7 +481,7 @@ def daily_sales_trend(transactions):
             "transaction_count": stats["count"],
             "unique_customers": len(stats["cust"])
         }
-        for date, stats in daily.items()
+        for date, stats in agg["daily"].items()
     }
 
     # Sort chronologically
@@ -125,49 +489,39 @@ def daily_sales_trend(transactions):
 
 
 
+@instrumented
 def find_peak_sales_day(transactions):
     """
-    Returns (date, revenue, transaction_count) for the highest revenue day.
+    Returns (date, revenue, transaction_count) for the highest revenue day,
+    or (None, 0, 0) when there are no transactions.
     """
 
-    daily = {}
-
-    for tx in transactions:
-        date = tx["Date"]
-        amount = tx["Quantity"] * tx["UnitPrice"]
-
-        stats = daily.setdefault(date, {"rev": 0.0, "count": 0})
-        stats["rev"] += amount
-        stats["count"] += 1
+    agg = _as_aggregates(transactions)
 
     # Select max revenue entry
-    peak_date, stats = max(daily.items(), key=lambda x: x[1]["rev"])
+    peak = max(agg["daily"].items(), key=lambda x: x[1]["rev"], default=None)
+    if peak is None:
+        return None, 0, 0
 
+    peak_date, stats = peak
     return peak_date, stats["rev"], stats["count"]
 
 
 
+@instrumented
 def low_performing_products(transactions, threshold=10):
     """
     Returns all products whose total quantity sold is below threshold.
-    Sorted by quantity ascending.
+    Sorted by quantity ascending. Approximate aggregates do not keep
+    every product, so they return an empty list.
     """
 
-    stats = {}
-
-    for tx in transactions:
-        name = tx["ProductName"]
-        qty = tx["Quantity"]
-        rev = qty * tx["UnitPrice"]
-
-        entry = stats.setdefault(name, {"qty": 0, "rev": 0.0})
-        entry["qty"] += qty
-        entry["rev"] += rev
+    agg = _as_aggregates(transactions)
 
     # Filter + sort
     low = [
         (name, s["qty"], s["rev"])
-        for name, s in stats.items()
+        for name, s in agg["products"].items()
         if s["qty"] < threshold
     ]
 
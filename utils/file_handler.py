@@ -1,3 +1,14 @@
+import codecs
+import gzip
+import mmap
+import os
+
+from utils import numpy_backend
+from utils.columnar import ColumnarTransactions
+from utils.metrics import instrumented
+
+
+@instrumented
 def read_sales_data(filename):
     """
     Reads sales data from a text file.
@@ -25,13 +36,12 @@ def read_sales_data(filename):
 
 
 
-def parse_transactions(raw_lines):
+def iter_transactions(raw_lines):
     """
-    Converts raw pipe-delimited lines into structured transaction dictionaries.
+    Converts raw pipe-delimited lines into structured transaction dictionaries,
+    yielding them one at a time.
     """
 
-    cleaned = []
-
     for line in raw_lines:
         parts = line.split("|")
 
@@ -61,7 +71,7 @@ def parse_transactions(raw_lines):
         except ValueError:
             continue
 
-        cleaned.append({
+        yield {
             "TransactionID": tid,
             "Date": date,
             "ProductID": pid,
@@ -70,22 +80,231 @@ def parse_transactions(raw_lines):
             "UnitPrice": price,
             "CustomerID": cid,
             "Region": region
-        })
+        }
+
+
+
+def detect_encoding_sample(data, encodings=("utf-8", "latin-1", "cp1252"), sample_bytes=1 << 16):
+    """
+    Picks an encoding from the first sample_bytes of `data` only.
+    A multi-byte character cut off at the end of the sample is not an error.
+    """
+
+    sample = data[:sample_bytes]
+
+    for enc in encodings:
+        try:
+            codecs.getincrementaldecoder(enc)().decode(sample, final=False)
+            return enc
+        except UnicodeDecodeError:
+            continue
+
+    return None
+
+
+
+def iter_transactions_mmap(filename, start=None, end=None, encoding=None, stats=None,
+                           block_size=8 << 20):
+    """
+    Memory-mapped reader + parser.
+
+    The mapped file is sliced in large blocks and split into byte lines,
+    then on b"|". Numbers are parsed straight from bytes, and each distinct
+    text value is decoded once and reused, so no per-line str is ever built.
+    Pass start/end byte offsets to read a range; by default the header is skipped.
+    If `stats` is a dict, stats["lines"] counts the non-blank lines seen.
+    """
+
+    try:
+        f = open(filename, "rb")
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found.")
+        return
+
+    with f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from _iter_transactions_buffer(mm, size, start, end, encoding, stats, block_size)
+
+
+
+def iter_transactions_gzip(filename, encoding=None, stats=None, block_size=8 << 20):
+    """
+    iter_transactions_mmap for a gzip-compressed file. The file is
+    decompressed into memory first (partition files are small), then
+    parsed the same way.
+    """
+
+    try:
+        with gzip.open(filename, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found.")
+        return
+
+    if data:
+        yield from _iter_transactions_buffer(data, len(data), None, None, encoding, stats, block_size)
 
-    return cleaned
+
+
+def iter_transactions_file(filename, stats=None):
+    """
+    Parses one input file with the byte reader matching its extension
+    (.gz files are decompressed, others memory-mapped).
+    """
+    if filename.endswith(".gz"):
+        return iter_transactions_gzip(filename, stats=stats)
+    return iter_transactions_mmap(filename, stats=stats)
 
 
 
-def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
+def _iter_transactions_buffer(buf, size, start, end, encoding, stats, block_size):
     """
-    Validates each transaction, then applies optional region and amount filters.
+    The parser behind iter_transactions_mmap, over any bytes-like buffer
+    (an mmap or decompressed bytes) of `size` bytes.
     """
 
-    valid = []
-    invalid = 0
+    if encoding is None:
+        encoding = detect_encoding_sample(buf)
+
+    if start is None:
+        header_end = buf.find(b"\n")
+        start = size if header_end == -1 else header_end + 1
+    if end is None:
+        end = size
+
+    def decode(raw):
+        try:
+            return raw.decode(encoding)
+        except UnicodeDecodeError:
+            return raw.decode("latin-1")
+
+    # Decoded text per distinct raw value
+    dates, pids, names, cids, regions = {}, {}, {}, {}, {}
+
+    lines = 0
+    carry = b""
+    pos = start
+
+    while pos < end:
+        stop = min(pos + block_size, end)
+        chunk = carry + buf[pos:stop]
+        pos = stop
+
+        rows = chunk.split(b"\n")
+        # An unfinished last line is carried into the next block
+        carry = rows.pop() if pos < end else b""
+
+        for line in rows:
+            parts = line.split(b"|")
+
+            # Should have exactly 8 fields
+            if len(parts) != 8:
+                if line.strip():
+                    lines += 1
+                continue
+            lines += 1
+
+            tid, date, pid, pname, qty, price, cid, region = parts
+
+            try:
+                qty = int(qty.replace(b",", b""))
+                price = float(price.replace(b",", b""))
+            except ValueError:
+                continue
+
+            if region.endswith(b"\r"):
+                region = region[:-1]
+
+            d = dates.get(date)
+            if d is None:
+                d = dates[date] = decode(date)
+            p = pids.get(pid)
+            if p is None:
+                p = pids[pid] = decode(pid)
+            n = names.get(pname)
+            if n is None:
+                n = names[pname] = decode(pname.replace(b",", b" "))
+            c = cids.get(cid)
+            if c is None:
+                c = cids[cid] = decode(cid)
+            r = regions.get(region)
+            if r is None:
+                r = regions[region] = decode(region)
+
+            yield {
+                "TransactionID": decode(tid),
+                "Date": d,
+                "ProductID": p,
+                "ProductName": n,
+                "Quantity": qty,
+                "UnitPrice": price,
+                "CustomerID": c,
+                "Region": r
+            }
+
+    if stats is not None:
+        stats["lines"] = stats.get("lines", 0) + lines
+
+
+
+@instrumented
+def parse_transactions(raw_lines, columnar=False):
+    """
+    Converts raw pipe-delimited lines into structured transaction dictionaries.
+    With columnar=True, returns a ColumnarTransactions container instead.
+    """
+    if columnar:
+        return ColumnarTransactions.from_transactions(iter_transactions(raw_lines))
+    return list(iter_transactions(raw_lines))
+
+
+
+def new_validation_summary():
+    """
+    Returns an empty summary in the shape produced by validate_and_filter.
+    """
+    return {
+        "total_input": 0,
+        "invalid": 0,
+        "filtered_by_region": 0,
+        "filtered_by_date": 0,
+        "filtered_by_amount": 0,
+        "final_count": 0,
+    }
+
+
+
+def merge_validation_summaries(target, other):
+    """
+    Adds the counters of one validation summary into another.
+    """
+    for key, value in other.items():
+        target[key] = target.get(key, 0) + value
+    return target
+
+
+
+def iter_valid_transactions(transactions, region=None, min_amount=None, max_amount=None,
+                            from_date=None, to_date=None, summary=None):
+    """
+    Streaming version of validate_and_filter.
+    Yields transactions that pass validation and the optional filters,
+    updating the counters in `summary` as it goes.
+    """
+
+    if summary is None:
+        summary = new_validation_summary()
+
+    check_amount = min_amount is not None or max_amount is not None
 
-    # ---------- VALIDATION ----------
     for tx in transactions:
+        summary["total_input"] += 1
+
+        # ---------- VALIDATION ----------
         quantity = tx["Quantity"]
         price = tx["UnitPrice"]
 
@@ -97,50 +316,128 @@ def validate_and_filter(transactions, region=None, min_amount=None, max_amount=N
             not tx["CustomerID"].startswith("C") or
             not tx["Region"]
         ):
-            invalid += 1
+            summary["invalid"] += 1
             continue
 
-        valid.append(tx)
-
-    # Counters for summary
-    filtered_by_region = 0
-    filtered_by_amount = 0
-
-    # ---------- REGION FILTER ----------
-    if region:
-        filtered = []
-        for tx in valid:
-            if tx["Region"] == region:
-                filtered.append(tx)
-            else:
-                filtered_by_region += 1
-        valid = filtered
+        # ---------- REGION FILTER ----------
+        if region and tx["Region"] != region:
+            summary["filtered_by_region"] += 1
+            continue
 
-    # ---------- AMOUNT FILTER ----------
-    if min_amount is not None or max_amount is not None:
-        filtered = []
+        # ---------- DATE FILTER ----------
+        # ISO dates compare correctly as strings
+        if (from_date and tx["Date"] < from_date) or (to_date and tx["Date"] > to_date):
+            summary["filtered_by_date"] += 1
+            continue
 
-        for tx in valid:
-            amount = tx["Quantity"] * tx["UnitPrice"]
+        # ---------- AMOUNT FILTER ----------
+        if check_amount:
+            amount = quantity * price
 
             if min_amount is not None and amount < min_amount:
-                filtered_by_amount += 1
+                summary["filtered_by_amount"] += 1
                 continue
             if max_amount is not None and amount > max_amount:
-                filtered_by_amount += 1
+                summary["filtered_by_amount"] += 1
                 continue
 
-            filtered.append(tx)
+        summary["final_count"] += 1
+        yield tx
 
-        valid = filtered
 
-    # ---------- SUMMARY ----------
-    summary = {
-        "total_input": len(transactions),
-        "invalid": invalid,
-        "filtered_by_region": filtered_by_region,
-        "filtered_by_amount": filtered_by_amount,
-        "final_count": len(valid),
-    }
 
-    return valid, invalid, summary
+def _validate_columnar(columns, region=None, min_amount=None, max_amount=None,
+                       from_date=None, to_date=None):
+    """
+    validate_and_filter for ColumnarTransactions.
+    Prefix, region and date checks run once per distinct value instead of once per row.
+    """
+
+    summary = new_validation_summary()
+
+    if numpy_backend.enabled():
+        valid = numpy_backend.validate_columnar(
+            columns, summary, region, min_amount, max_amount, from_date, to_date
+        )
+        return valid, summary["invalid"], summary
+
+    summary["total_input"] = len(columns)
+
+    pid_ok = [v.startswith("P") for v in columns.values("ProductID")]
+    cid_ok = [v.startswith("C") for v in columns.values("CustomerID")]
+    region_ok = [bool(v) for v in columns.values("Region")]
+    region_match = [v == region for v in columns.values("Region")] if region else None
+    date_match = [
+        not ((from_date and v < from_date) or (to_date and v > to_date))
+        for v in columns.values("Date")
+    ] if from_date or to_date else None
+
+    keep = []
+
+    for i, (qty, price, amount, tid, pc, cc, rc, dc) in enumerate(zip(
+        columns.quantity, columns.unit_price, columns.amount, columns.transaction_ids,
+        columns.codes("ProductID"), columns.codes("CustomerID"), columns.codes("Region"),
+        columns.codes("Date")
+    )):
+        # ---------- VALIDATION ----------
+        if (
+            qty <= 0 or
+            price <= 0 or
+            not tid.startswith("T") or
+            not pid_ok[pc] or
+            not cid_ok[cc] or
+            not region_ok[rc]
+        ):
+            summary["invalid"] += 1
+            continue
+
+        # ---------- REGION FILTER ----------
+        if region_match is not None and not region_match[rc]:
+            summary["filtered_by_region"] += 1
+            continue
+
+        # ---------- DATE FILTER ----------
+        if date_match is not None and not date_match[dc]:
+            summary["filtered_by_date"] += 1
+            continue
+
+        # ---------- AMOUNT FILTER ----------
+        if (min_amount is not None and amount < min_amount) or \
+                (max_amount is not None and amount > max_amount):
+            summary["filtered_by_amount"] += 1
+            continue
+
+        keep.append(i)
+
+    summary["final_count"] = len(keep)
+
+    return columns.take(keep), summary["invalid"], summary
+
+
+
+@instrumented
+def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None,
+                        from_date=None, to_date=None):
+    """
+    Validates each transaction, then applies optional region, date
+    (YYYY-MM-DD, inclusive) and amount filters.
+    Accepts a transaction list or a ColumnarTransactions container
+    (and returns the same kind).
+    """
+
+    if isinstance(transactions, ColumnarTransactions):
+        return _validate_columnar(transactions, region, min_amount, max_amount, from_date, to_date)
+
+    summary = new_validation_summary()
+
+    valid = list(iter_valid_transactions(
+        transactions,
+        region=region,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        from_date=from_date,
+        to_date=to_date,
+        summary=summary
+    ))
+
+    return valid, summary["invalid"], summary
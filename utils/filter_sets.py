@@ -0,0 +1,135 @@
+import json
+import os
+
+from utils.file_handler import new_validation_summary
+from utils.data_processor import new_aggregates, update_aggregates
+from utils.api_handler import new_enrichment_summary, summarize_enrichment
+from utils.partitions import parse_date
+
+
+FILTER_KEYS = ("region", "min_amount", "max_amount", "from_date", "to_date")
+
+
+def load_config(path):
+    """
+    Reads a JSON run configuration, e.g.
+
+        {
+          "input": "data/sales_data.txt",
+          "filters": {"region": "North", "min_amount": 1000, "from_date": "2024-12-01"},
+          "filter_sets": [
+            {"name": "north", "region": "North"},
+            {"name": "large", "min_amount": 50000, "report": "output/large.txt"}
+          ]
+        }
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _amount(value):
+    return None if value in (None, "") else float(value)
+
+
+def _date(value):
+    return None if value in (None, "") else parse_date(value)
+
+
+def normalize_filters(entry):
+    """
+    Returns {"region", "min_amount", "max_amount", "from_date", "to_date"}
+    with missing keys as None (dates as YYYY-MM-DD).
+    """
+    entry = entry or {}
+    return {
+        "region": entry.get("region") or None,
+        "min_amount": _amount(entry.get("min_amount")),
+        "max_amount": _amount(entry.get("max_amount")),
+        "from_date": _date(entry.get("from_date")),
+        "to_date": _date(entry.get("to_date")),
+    }
+
+
+def normalize_filter_set(entry, index, report_dir="output"):
+    """
+    Adds defaults to one filter_sets entry: a name and a report path.
+    """
+
+    name = entry.get("name") or f"set{index + 1}"
+
+    filter_set = normalize_filters(entry)
+    filter_set["name"] = name
+    filter_set["report"] = entry.get("report") or os.path.join(report_dir, f"sales_report_{name}.txt")
+    return filter_set
+
+
+def filter_rejection(tx, region=None, min_amount=None, max_amount=None, from_date=None, to_date=None):
+    """
+    Returns None if a validated transaction passes the filters, otherwise
+    "region", "date" or "amount" (the same order validate_and_filter uses).
+    """
+
+    if region and tx["Region"] != region:
+        return "region"
+
+    if (from_date and tx["Date"] < from_date) or (to_date and tx["Date"] > to_date):
+        return "date"
+
+    if min_amount is not None or max_amount is not None:
+        amount = tx["Quantity"] * tx["UnitPrice"]
+        if min_amount is not None and amount < min_amount:
+            return "amount"
+        if max_amount is not None and amount > max_amount:
+            return "amount"
+
+    return None
+
+
+def new_filter_set_states(filter_sets, epsilon=None, distinct_precision=None):
+    """
+    One accumulator bundle (validation summary, aggregates, enrichment summary)
+    per filter set. epsilon and distinct_precision are passed to new_aggregates.
+    """
+    return [
+        {
+            "filter": fs,
+            "summary": new_validation_summary(),
+            "aggregates": new_aggregates(epsilon=epsilon, distinct_precision=distinct_precision),
+            "enrichment": new_enrichment_summary(),
+        }
+        for fs in filter_sets
+    ]
+
+
+def tap_filter_sets(rows, states):
+    """
+    Passes validated (optionally enriched) rows through unchanged while
+    updating every filter set's accumulators, so N reports cost one pass.
+    """
+
+    for tx in rows:
+        for state in states:
+            fs = state["filter"]
+            summary = state["summary"]
+
+            reason = filter_rejection(tx, *(fs[key] for key in FILTER_KEYS))
+            if reason is not None:
+                summary["filtered_by_" + reason] += 1
+                continue
+
+            summary["final_count"] += 1
+            update_aggregates(state["aggregates"], tx)
+            if "API_Match" in tx:
+                summarize_enrichment((tx,), state["enrichment"])
+
+        yield tx
+
+
+def finish_filter_set_states(states, validation):
+    """
+    Copies the shared input/invalid counts into every filter set's summary.
+    """
+    for state in states:
+        state["summary"]["total_input"] = validation["total_input"]
+        state["summary"]["invalid"] = validation["invalid"]
+    return states
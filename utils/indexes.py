@@ -0,0 +1,181 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+from utils.columnar import ColumnarTransactions, StringColumn
+from utils.metrics import instrumented
+
+
+# Fields with an equality (hash) index; Date also supports ranges
+HASH_FIELDS = ("Region", "CustomerID", "ProductID", "Date")
+
+
+class TransactionIndex:
+    """
+    Secondary indexes over validated transactions, built once so repeated
+    filter queries do not rescan every row.
+
+    - Region, CustomerID, ProductID, Date: value -> ascending row positions
+    - amount: row positions sorted by Quantity * UnitPrice (range queries)
+    - Date ranges: distinct dates kept sorted with cumulative row counts
+
+    A query starts from the most selective predicate and checks the others
+    per candidate row, so it costs about O(smallest candidate set) instead of
+    O(all rows). Results keep the original row order.
+    """
+
+    def __init__(self, transactions):
+        self.transactions = transactions
+
+        if isinstance(transactions, ColumnarTransactions):
+            # Reuse the existing dictionary codes
+            self.columns = {field: transactions.strings[field] for field in HASH_FIELDS}
+            self.amounts = transactions.amount
+        else:
+            self.columns = {field: StringColumn() for field in HASH_FIELDS}
+            self.amounts = array("d")
+            for tx in transactions:
+                for field, col in self.columns.items():
+                    col.append(tx[field])
+                self.amounts.append(tx["Quantity"] * tx["UnitPrice"])
+
+        # value code -> ascending row positions
+        self.postings = {}
+        for field, col in self.columns.items():
+            postings = [array("I") for _ in col.values]
+            for i, code in enumerate(col.codes):
+                postings[code].append(i)
+            self.postings[field] = postings
+
+        amounts = self.amounts
+        self.amount_order = array("I", sorted(range(len(amounts)), key=amounts.__getitem__))
+        self.sorted_amounts = array("d", (amounts[i] for i in self.amount_order))
+
+        # Date codes in date order, plus running row counts for range sizes
+        date_col = self.columns["Date"]
+        date_postings = self.postings["Date"]
+        self.date_codes = sorted(range(len(date_col.values)), key=date_col.values.__getitem__)
+        self.sorted_dates = [date_col.values[c] for c in self.date_codes]
+        self.date_offsets = [0]
+        for code in self.date_codes:
+            self.date_offsets.append(self.date_offsets[-1] + len(date_postings[code]))
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def _code(self, field, value):
+        return self.columns[field].index.get(value)
+
+    def _date_span(self, start_date, end_date):
+        lo = bisect_left(self.sorted_dates, start_date) if start_date else 0
+        hi = bisect_right(self.sorted_dates, end_date) if end_date else len(self.sorted_dates)
+        return lo, max(lo, hi)
+
+    def _amount_span(self, min_amount, max_amount):
+        lo = bisect_left(self.sorted_amounts, min_amount) if min_amount is not None else 0
+        hi = bisect_right(self.sorted_amounts, max_amount) if max_amount is not None else len(self.sorted_amounts)
+        return lo, max(lo, hi)
+
+    @instrumented
+    def positions(self, region=None, min_amount=None, max_amount=None, customer=None,
+                  product=None, start_date=None, end_date=None):
+        """
+        Returns the ascending row positions matching every given filter.
+        Region, amount bounds and dates are inclusive, like validate_and_filter.
+        """
+
+        equal = {}
+        for field, value in (("Region", region), ("CustomerID", customer), ("ProductID", product)):
+            if value:
+                code = self._code(field, value)
+                if code is None:
+                    return []
+                equal[field] = code
+
+        # (candidate count, kind) for every usable access path
+        plans = [(len(self.postings[field][code]), field) for field, code in equal.items()]
+
+        check_amount = min_amount is not None or max_amount is not None
+        if check_amount:
+            lo, hi = self._amount_span(min_amount, max_amount)
+            plans.append((hi - lo, "amount"))
+
+        check_dates = bool(start_date or end_date)
+        if check_dates:
+            dlo, dhi = self._date_span(start_date, end_date)
+            plans.append((self.date_offsets[dhi] - self.date_offsets[dlo], "date"))
+
+        if not plans:
+            return list(range(len(self)))
+
+        size, best = min(plans)
+        if not size:
+            return []
+
+        if best == "amount":
+            candidates = sorted(self.amount_order[lo:hi])
+            check_amount = False
+        elif best == "date":
+            postings = self.postings["Date"]
+            candidates = sorted(i for c in self.date_codes[dlo:dhi] for i in postings[c])
+            check_dates = False
+        else:
+            candidates = self.postings[best][equal.pop(best)]
+
+        # One pass per remaining predicate; each pass only sees the survivors
+        for field, code in equal.items():
+            codes = self.columns[field].codes
+            candidates = [i for i in candidates if codes[i] == code]
+
+        if check_amount:
+            amounts = self.amounts
+            if min_amount is not None:
+                candidates = [i for i in candidates if amounts[i] >= min_amount]
+            if max_amount is not None:
+                candidates = [i for i in candidates if amounts[i] <= max_amount]
+
+        if check_dates:
+            allowed = set(self.date_codes[dlo:dhi])
+            date_codes = self.columns["Date"].codes
+            candidates = [i for i in candidates if date_codes[i] in allowed]
+
+        return list(candidates)
+
+    def select(self, **filters):
+        """
+        Returns the matching transactions in the input's own type
+        (a list, or a ColumnarTransactions sharing this one's dictionaries).
+        """
+        positions = self.positions(**filters)
+        if isinstance(self.transactions, ColumnarTransactions):
+            return self.transactions.take(positions)
+        transactions = self.transactions
+        return [transactions[i] for i in positions]
+
+
+# Query-string keys accepted by parse_query -> TransactionIndex.positions arguments
+QUERY_KEYS = {
+    "region": "region",
+    "min": "min_amount",
+    "max": "max_amount",
+    "customer": "customer",
+    "product": "product",
+    "from": "start_date",
+    "to": "end_date",
+}
+
+
+def parse_query(text):
+    """
+    Parses "region=North min=5000 max=50000" into positions() keyword arguments.
+    """
+
+    query = {}
+    for term in text.split():
+        key, sep, value = term.partition("=")
+        name = QUERY_KEYS.get(key.lower())
+        if not sep or name is None:
+            raise ValueError(f"Unknown query term '{term}' (use {', '.join(k + '=' for k in QUERY_KEYS)}).")
+        if name in ("min_amount", "max_amount"):
+            value = float(value.replace(",", ""))
+        query[name] = value
+    return query
@@ -0,0 +1,233 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from utils.columnar import ColumnarTransactions
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+# The active Metrics collector; None means instrumentation is off and every
+# hook below returns after a single global lookup.
+_active = None
+
+
+class Metrics:
+    """
+    Collects per-stage and per-function timings, memory and row/HTTP counts.
+    With trace_memory, peak_traced_bytes is the tracemalloc peak since the
+    most recent stage/function started (nested calls reset it).
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.records = []
+        self.counters = {"http_calls": 0}
+        self.lock = threading.Lock()
+        self.started = time.time()
+
+    def increment(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_dict(self):
+        return {
+            "started": self.started,
+            "records": self.records,
+            "counters": dict(self.counters),
+        }
+
+    def write_json(self, path):
+        _ensure_dir(path)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def write_prometheus(self, path):
+        """
+        Writes the records in Prometheus text exposition format, one series
+        per stage/function: repeated calls are summed (peaks take the maximum)
+        and times are summaries with _sum and _count.
+        """
+
+        totals = {}
+        for r in self.records:
+            entry = totals.setdefault((r["kind"], r["name"]), {"calls": 0})
+            entry["calls"] += 1
+            for field in ("wall_seconds", "cpu_seconds", "rows_in", "rows_out", "http_calls"):
+                if r.get(field) is not None:
+                    entry[field] = entry.get(field, 0) + r[field]
+            for field in ("peak_rss_bytes", "peak_traced_bytes"):
+                if r.get(field) is not None:
+                    entry[field] = max(entry.get(field, 0), r[field])
+
+        series = [
+            ("wall_seconds", "Wall-clock time", "summary"),
+            ("cpu_seconds", "Process CPU time", "summary"),
+            ("rows_in", "Rows consumed", "gauge"),
+            ("rows_out", "Rows produced", "gauge"),
+            ("http_calls", "HTTP requests made", "gauge"),
+            ("peak_rss_bytes", "Process peak resident set size", "gauge"),
+            ("peak_traced_bytes", "Peak Python allocations (tracemalloc)", "gauge"),
+        ]
+
+        lines = []
+        for field, help_text, kind in series:
+            metric = f"sales_pipeline_{field}"
+            samples = [(key, entry) for key, entry in totals.items() if field in entry]
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric} {help_text} per stage or function.")
+            lines.append(f"# TYPE {metric} {kind}")
+            for (record_kind, name), entry in samples:
+                labels = f'{{kind="{record_kind}",name="{name}"}}'
+                value = round(entry[field], 6) if isinstance(entry[field], float) else entry[field]
+                if kind == "summary":
+                    lines.append(f"{metric}_sum{labels} {value}")
+                    lines.append(f"{metric}_count{labels} {entry['calls']}")
+                else:
+                    lines.append(f"{metric}{labels} {value}")
+
+        for name, value in self.counters.items():
+            lines.append(f"# TYPE sales_pipeline_{name}_total counter")
+            lines.append(f"sales_pipeline_{name}_total {value}")
+
+        _ensure_dir(path)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+def _ensure_dir(path):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+
+def _peak_rss():
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _row_count(value):
+    """
+    Rows held by a call's argument or result: transactions (a list of
+    dicts or ColumnarTransactions), raw lines, or aggregates. A tuple
+    result counts its first element. Anything else has no row count.
+    """
+    if isinstance(value, tuple):
+        value = value[0] if value else None
+    if isinstance(value, ColumnarTransactions):
+        return len(value)
+    if isinstance(value, list) and (not value or isinstance(value[0], (dict, str))):
+        return len(value)
+    if isinstance(value, dict) and "transaction_count" in value:
+        return value["transaction_count"]
+    return None
+
+
+def enable(trace_memory=False):
+    """
+    Turns instrumentation on and returns the collector.
+    """
+    global _active
+    _active = Metrics(trace_memory=trace_memory)
+    if trace_memory:
+        tracemalloc.start()
+    return _active
+
+
+def disable():
+    """
+    Turns instrumentation off and returns the collector that was active.
+    """
+    global _active
+    collector, _active = _active, None
+    if collector is not None and collector.trace_memory:
+        tracemalloc.stop()
+    return collector
+
+
+def count_http(n=1):
+    collector = _active
+    if collector is not None:
+        collector.increment("http_calls", n)
+
+
+class _NullRecord(dict):
+    # Swallows writes like record["rows_out"] = n while metrics are off
+    def __setitem__(self, key, value):
+        pass
+
+
+_NULL_RECORD = _NullRecord()
+
+
+@contextmanager
+def _measure(collector, kind, name, rows_in):
+    record = {"kind": kind, "name": name, "rows_in": rows_in, "rows_out": None}
+
+    if collector.trace_memory:
+        tracemalloc.reset_peak()
+    http_before = collector.counters["http_calls"]
+    wall = time.perf_counter()
+    cpu = time.process_time()
+
+    try:
+        yield record
+    finally:
+        record["wall_seconds"] = round(time.perf_counter() - wall, 6)
+        record["cpu_seconds"] = round(time.process_time() - cpu, 6)
+        record["http_calls"] = collector.counters["http_calls"] - http_before
+        record["peak_rss_bytes"] = _peak_rss()
+        if collector.trace_memory:
+            record["peak_traced_bytes"] = tracemalloc.get_traced_memory()[1]
+        collector.records.append(record)
+
+
+@contextmanager
+def _noop():
+    yield _NULL_RECORD
+
+
+def stage(name, rows_in=None):
+    """
+    Context manager timing one pipeline stage. Set record["rows_out"] inside it.
+
+        with stage("parse", rows_in=len(lines)) as record:
+            ...
+            record["rows_out"] = len(transactions)
+    """
+    collector = _active
+    if collector is None:
+        return _noop()
+    return _measure(collector, "stage", name, rows_in)
+
+
+def instrumented(func):
+    """
+    Decorator recording a function call like a stage (rows from the first
+    argument and the result, see _row_count).
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        collector = _active
+        if collector is None:
+            return func(*args, **kwargs)
+
+        rows_in = _row_count(args[0]) if args else None
+        with _measure(collector, "function", func.__name__, rows_in) as record:
+            result = func(*args, **kwargs)
+            record["rows_out"] = _row_count(result)
+        return result
+
+    return wrapper
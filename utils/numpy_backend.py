@@ -0,0 +1,226 @@
+from array import array
+
+from utils.sketches import new_distinct
+
+# NumPy (optional) is imported on first use: runs that never reach a
+# columnar path do not pay for it at startup
+np = None
+_available = None
+
+
+# Vectorized paths are used automatically for ColumnarTransactions when NumPy
+# is installed. Set to False to force the pure-Python implementation.
+ENABLED = True
+
+
+def available():
+    """
+    True if NumPy can be imported (imports it on the first call).
+    """
+    global np, _available
+    if _available is None:
+        try:
+            import numpy
+        except ImportError:  # optional dependency
+            _available = False
+        else:
+            np = numpy
+            _available = True
+    return _available
+
+
+def enabled():
+    return ENABLED and available()
+
+
+def _column(buffer, dtype):
+    # Zero-copy view over an array.array buffer
+    return np.frombuffer(buffer, dtype=dtype) if len(buffer) else np.zeros(0, dtype=dtype)
+
+
+def _lookup(flags, codes):
+    # Per-distinct-value boolean flags broadcast to rows via dictionary codes
+    return np.asarray(flags, dtype=bool)[codes] if len(codes) else np.zeros(0, dtype=bool)
+
+
+def take(columns, keep):
+    """
+    Row subset of a ColumnarTransactions using NumPy fancy indexing.
+    """
+
+    subset = type(columns)(template=columns)
+
+    subset.transaction_ids = [columns.transaction_ids[i] for i in keep.tolist()]
+    subset.quantity = array("q", _column(columns.quantity, np.int64)[keep].tobytes())
+    subset.unit_price = array("d", _column(columns.unit_price, np.float64)[keep].tobytes())
+    subset.amount = array("d", _column(columns.amount, np.float64)[keep].tobytes())
+
+    for name, col in columns.strings.items():
+        codes = _column(col.codes, np.uint32)[keep]
+        subset.strings[name].codes = array("I", codes.tobytes())
+
+    return subset
+
+
+def validate_columnar(columns, summary, region=None, min_amount=None, max_amount=None,
+                      from_date=None, to_date=None):
+    """
+    Vectorized validate_and_filter: every rule is a boolean mask.
+    Fills `summary` and returns the filtered container.
+    """
+
+    n = len(columns)
+    qty = _column(columns.quantity, np.int64)
+    price = _column(columns.unit_price, np.float64)
+    amount = _column(columns.amount, np.float64)
+
+    pcodes = _column(columns.codes("ProductID"), np.uint32)
+    ccodes = _column(columns.codes("CustomerID"), np.uint32)
+    rcodes = _column(columns.codes("Region"), np.uint32)
+
+    tid_ok = np.fromiter((t.startswith("T") for t in columns.transaction_ids), dtype=bool, count=n)
+
+    # Written as negations of the row-by-row rejections so NaN behaves identically
+    valid = (
+        ~(qty <= 0) &
+        ~(price <= 0) &
+        tid_ok &
+        _lookup([v.startswith("P") for v in columns.values("ProductID")], pcodes) &
+        _lookup([v.startswith("C") for v in columns.values("CustomerID")], ccodes) &
+        _lookup([bool(v) for v in columns.values("Region")], rcodes)
+    )
+
+    summary["total_input"] = n
+    summary["invalid"] = int(n - np.count_nonzero(valid))
+
+    if region:
+        in_region = _lookup([v == region for v in columns.values("Region")], rcodes)
+        summary["filtered_by_region"] = int(np.count_nonzero(valid & ~in_region))
+        valid &= in_region
+
+    if from_date or to_date:
+        in_dates = _lookup([
+            not ((from_date and v < from_date) or (to_date and v > to_date))
+            for v in columns.values("Date")
+        ], _column(columns.codes("Date"), np.uint32))
+        summary["filtered_by_date"] = int(np.count_nonzero(valid & ~in_dates))
+        valid &= in_dates
+
+    if min_amount is not None or max_amount is not None:
+        in_range = np.ones(n, dtype=bool)
+        if min_amount is not None:
+            in_range &= ~(amount < min_amount)
+        if max_amount is not None:
+            in_range &= ~(amount > max_amount)
+        summary["filtered_by_amount"] = int(np.count_nonzero(valid & ~in_range))
+        valid &= in_range
+
+    keep = np.flatnonzero(valid)
+    summary["final_count"] = len(keep)
+
+    return take(columns, keep)
+
+
+def _groups(codes):
+    """
+    Distinct codes in order of first appearance (matches dict insertion order
+    of the row-by-row path).
+    """
+    uniq, first = np.unique(codes, return_index=True)
+    return uniq[np.argsort(first, kind="stable")]
+
+
+def _pair_sets(outer, inner, outer_vals, inner_vals, table, field):
+    """
+    Adds every distinct (outer, inner) value pair into table[outer][field].
+    """
+
+    pairs = np.sort((outer.astype(np.uint64) << np.uint64(32)) | inner.astype(np.uint64))
+    pairs = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))]
+
+    owners = (pairs >> np.uint64(32)).astype(np.intp)
+    members = (pairs & np.uint64(0xFFFFFFFF)).astype(np.intp)
+
+    # Pairs are sorted by owner, so each owner's members form one run
+    starts = np.flatnonzero(np.concatenate(([True], owners[1:] != owners[:-1])))
+    bounds = np.append(starts, len(owners)).tolist()
+    members = members.tolist()
+
+    for k, o in enumerate(owners[starts].tolist()):
+        table[outer_vals[o]][field].update(
+            [inner_vals[i] for i in members[bounds[k]:bounds[k + 1]]]
+        )
+
+
+def aggregate_columnar(columns, agg):
+    """
+    Vectorized aggregate_sales for ColumnarTransactions.
+
+    Group sums use np.bincount, which adds weights in row order, so totals
+    are bit-for-bit identical to the pure-Python loop.
+    """
+
+    n = len(columns)
+    if not n:
+        return agg
+
+    qty = _column(columns.quantity, np.int64)
+    amount = _column(columns.amount, np.float64)
+
+    rcodes = _column(columns.codes("Region"), np.uint32)
+    ncodes = _column(columns.codes("ProductName"), np.uint32)
+    ccodes = _column(columns.codes("CustomerID"), np.uint32)
+    dcodes = _column(columns.codes("Date"), np.uint32)
+
+    region_vals = columns.values("Region")
+    name_vals = columns.values("ProductName")
+    cust_vals = columns.values("CustomerID")
+    date_vals = columns.values("Date")
+
+    precision = agg.get("distinct_precision")
+
+    total = np.bincount(np.zeros(n, dtype=np.intp), weights=amount)[0]
+    agg["total_revenue"] += float(total)
+    agg["transaction_count"] += n
+
+    # Region
+    sums = np.bincount(rcodes, weights=amount)
+    counts = np.bincount(rcodes)
+    for code in _groups(rcodes).tolist():
+        stats = agg["regions"].setdefault(region_vals[code], {"total_sales": 0.0, "transaction_count": 0})
+        stats["total_sales"] += float(sums[code])
+        stats["transaction_count"] += int(counts[code])
+
+    # Product
+    sums = np.bincount(ncodes, weights=amount)
+    qtys = np.bincount(ncodes, weights=qty)
+    for code in _groups(ncodes).tolist():
+        stats = agg["products"].setdefault(name_vals[code], {"qty": 0, "rev": 0.0})
+        stats["qty"] += int(qtys[code])
+        stats["rev"] += float(sums[code])
+
+    # Customer
+    sums = np.bincount(ccodes, weights=amount)
+    counts = np.bincount(ccodes)
+    for code in _groups(ccodes).tolist():
+        stats = agg["customers"].get(cust_vals[code])
+        if stats is None:
+            stats = agg["customers"][cust_vals[code]] = {
+                "spent": 0.0, "count": 0, "products": new_distinct(precision)
+            }
+        stats["spent"] += float(sums[code])
+        stats["count"] += int(counts[code])
+    _pair_sets(ccodes, ncodes, cust_vals, name_vals, agg["customers"], "products")
+
+    # Day
+    sums = np.bincount(dcodes, weights=amount)
+    counts = np.bincount(dcodes)
+    for code in _groups(dcodes).tolist():
+        stats = agg["daily"].get(date_vals[code])
+        if stats is None:
+            stats = agg["daily"][date_vals[code]] = {"rev": 0.0, "count": 0, "cust": new_distinct(precision)}
+        stats["rev"] += float(sums[code])
+        stats["count"] += int(counts[code])
+    _pair_sets(dcodes, ccodes, date_vals, cust_vals, agg["daily"], "cust")
+
+    return agg
@@ -0,0 +1,249 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+
+from utils.columnar import ColumnarTransactions
+from utils.data_processor import aggregate_sales, merge_aggregates, new_aggregates
+from utils.file_handler import (
+    detect_encoding_sample,
+    iter_transactions_mmap,
+    iter_transactions_file,
+    validate_and_filter,
+    new_validation_summary,
+    merge_validation_summaries
+)
+
+
+MIN_CHUNK_BYTES = 1 << 20
+MAX_CHUNK_BYTES = 64 << 20
+
+
+def split_byte_ranges(filename, workers, chunk_bytes=None):
+    """
+    Splits the file body (after the header line) into newline-aligned
+    (start, end) byte ranges. Produces a few ranges per worker so uneven
+    chunks still balance out.
+    """
+
+    size = os.path.getsize(filename)
+
+    with open(filename, "rb") as f:
+        f.readline()  # header
+        start = f.tell()
+
+        if chunk_bytes is None:
+            chunk_bytes = (size - start) // (workers * 4) + 1
+            chunk_bytes = max(MIN_CHUNK_BYTES, min(MAX_CHUNK_BYTES, chunk_bytes))
+
+        ranges = []
+        while start < size:
+            end = start + chunk_bytes
+            if end < size:
+                f.seek(end)
+                f.readline()  # move to the next line boundary
+                end = f.tell()
+            else:
+                end = size
+
+            ranges.append((start, end))
+            start = end
+
+    return ranges
+
+
+def split_partitions(partitions, workers, batch_bytes=None):
+    """
+    Groups consecutive partitions into batches of roughly equal size, a few
+    per worker, so thousands of small files do not each cost a task and a
+    merge, and one large file does not hold up the rest.
+    """
+
+    total = sum(p["size"] for p in partitions)
+    if batch_bytes is None:
+        batch_bytes = max(MIN_CHUNK_BYTES, min(MAX_CHUNK_BYTES, total // (workers * 4) + 1))
+
+    batches = []
+    batch, size = [], 0
+    for p in partitions:
+        batch.append(p["path"])
+        size += p["size"]
+        if size >= batch_bytes:
+            batches.append(batch)
+            batch, size = [], 0
+    if batch:
+        batches.append(batch)
+
+    return batches
+
+
+def _parse_range(task):
+    """
+    Worker: parses (and optionally validates) one byte range into a
+    ColumnarTransactions chunk.
+    """
+
+    filename, start, end, encoding, filters = task
+
+    stats = {"lines": 0}
+    columns = ColumnarTransactions.from_transactions(
+        iter_transactions_mmap(filename, start, end, encoding, stats=stats)
+    )
+
+    summary = None
+    if filters is not None:
+        columns, _, summary = validate_and_filter(columns, **filters)
+
+    return stats["lines"], columns, summary
+
+
+def _aggregate_range(task):
+    """
+    Worker: parses, validates and aggregates one byte range.
+    Only the small aggregate result is sent back to the parent.
+    """
+
+    *task, distinct_precision = task
+    lines, columns, summary = _parse_range(task)
+    return lines, aggregate_sales(columns, new_aggregates(distinct_precision=distinct_precision)), summary
+
+
+def _aggregate_partitions(task):
+    """
+    Worker: parses, validates and aggregates a batch of partition files.
+    Sends back the valid rows only when keep_rows is set.
+    """
+
+    paths, filters, epsilon, distinct_precision, keep_rows = task
+
+    stats = {"lines": 0}
+    columns = ColumnarTransactions.from_transactions(
+        chain.from_iterable(iter_transactions_file(path, stats=stats) for path in paths)
+    )
+    valid, _, summary = validate_and_filter(columns, **filters)
+    aggregates = aggregate_sales(valid, new_aggregates(epsilon=epsilon, distinct_precision=distinct_precision))
+
+    return stats["lines"], valid if keep_rows else None, aggregates, summary
+
+
+def _run(worker, filename, workers, filters, chunk_bytes, extra=()):
+    workers = workers or os.cpu_count() or 1
+
+    with open(filename, "rb") as f:
+        encoding = detect_encoding_sample(f.read(1 << 16))
+    if encoding is None:
+        raise ValueError(f"Could not decode '{filename}' using available encodings.")
+
+    tasks = [
+        (filename, start, end, encoding, filters, *extra)
+        for start, end in split_byte_ranges(filename, workers, chunk_bytes)
+    ]
+
+    if workers == 1:
+        return list(map(worker, tasks))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() yields in submission order, so merges are deterministic
+        return list(pool.map(worker, tasks))
+
+
+def parse_file_parallel(filename, workers=None, validate=False, region=None,
+                        min_amount=None, max_amount=None, from_date=None, to_date=None,
+                        chunk_bytes=None):
+    """
+    Parses a sales file across worker processes.
+
+    Returns (line_count, ColumnarTransactions, summary). With validate=True the
+    workers also apply validate_and_filter and `summary` holds the merged
+    counters; otherwise it is None.
+    """
+
+    filters = None
+    if validate:
+        filters = {"region": region, "min_amount": min_amount, "max_amount": max_amount,
+                   "from_date": from_date, "to_date": to_date}
+
+    results = _run(_parse_range, filename, workers, filters, chunk_bytes)
+
+    line_count = 0
+    columns = ColumnarTransactions()
+    summary = new_validation_summary() if validate else None
+
+    for lines, chunk, chunk_summary in results:
+        line_count += lines
+        columns.extend_columnar(chunk)
+        if summary is not None:
+            merge_validation_summaries(summary, chunk_summary)
+
+    return line_count, columns, summary
+
+
+def aggregate_file_parallel(filename, workers=None, region=None, min_amount=None,
+                            max_amount=None, from_date=None, to_date=None, chunk_bytes=None,
+                            distinct_precision=None):
+    """
+    Parses, validates and aggregates a sales file across worker processes.
+    Returns (aggregates, summary) merged in file order. With distinct_precision,
+    each chunk counts unique values with HyperLogLog and the sketches are merged.
+    """
+
+    filters = {"region": region, "min_amount": min_amount, "max_amount": max_amount,
+               "from_date": from_date, "to_date": to_date}
+    results = _run(_aggregate_range, filename, workers, filters, chunk_bytes, (distinct_precision,))
+
+    aggregates = new_aggregates(distinct_precision=distinct_precision)
+    summary = new_validation_summary()
+
+    for _, chunk_aggregates, chunk_summary in results:
+        merge_aggregates(aggregates, chunk_aggregates)
+        merge_validation_summaries(summary, chunk_summary)
+
+    return aggregates, summary
+
+
+def aggregate_partitions_parallel(partitions, workers=None, region=None, min_amount=None,
+                                  max_amount=None, from_date=None, to_date=None, epsilon=None,
+                                  distinct_precision=None, keep_rows=True, batch_bytes=None):
+    """
+    Parses, validates and aggregates partition files (find_partitions
+    output) across worker processes and merges the results in path order.
+
+    Returns (line_count, valid rows, aggregates, summary). The valid rows are
+    one ColumnarTransactions, or None with keep_rows=False (only the small
+    per-batch aggregates then leave the workers).
+    """
+
+    workers = workers or os.cpu_count() or 1
+    filters = {"region": region, "min_amount": min_amount, "max_amount": max_amount,
+               "from_date": from_date, "to_date": to_date}
+
+    tasks = [
+        (paths, filters, epsilon, distinct_precision, keep_rows)
+        for paths in split_partitions(partitions, workers, batch_bytes)
+    ]
+
+    if workers == 1 or len(tasks) == 1:
+        results = map(_aggregate_partitions, tasks)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(tasks)))
+        # map() yields in submission order, so merges are deterministic
+        results = pool.map(_aggregate_partitions, tasks)
+
+    line_count = 0
+    columns = ColumnarTransactions() if keep_rows else None
+    aggregates = new_aggregates(epsilon=epsilon, distinct_precision=distinct_precision)
+    summary = new_validation_summary()
+
+    try:
+        # Batches are merged as they arrive while later ones are still running
+        for lines, chunk, chunk_aggregates, chunk_summary in results:
+            line_count += lines
+            if columns is not None:
+                columns.extend_columnar(chunk)
+            merge_aggregates(aggregates, chunk_aggregates)
+            merge_validation_summaries(summary, chunk_summary)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return line_count, columns, aggregates, summary
@@ -0,0 +1,137 @@
+import hashlib
+import os
+import pickle
+
+from utils.columnar import ColumnarTransactions
+from utils.file_handler import validate_and_filter
+
+
+PARSE_CACHE_VERSION = 1
+DEFAULT_PARSE_CACHE_FILE = "data/parse_cache.pickle"
+
+_MAGIC = b"SAPC"
+
+
+def input_key(filename):
+    """
+    Returns what a cache entry is keyed by: the input's absolute path,
+    size and mtime (ns). Only a stat call; the content hash stored next
+    to it is computed by save_parse_cache and checked by load_parse_cache.
+    """
+
+    stat = os.stat(filename)
+    return {
+        "version": PARSE_CACHE_VERSION,
+        "source": os.path.abspath(filename),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def _content_hash(filename, chunk_size=1 << 20):
+    digest = hashlib.blake2b(digest_size=32)
+    with open(filename, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def unchanged_since(filename, key):
+    """
+    True if the file's size and mtime still match `key` (checked after
+    parsing, so a file rewritten mid-run is never cached).
+    """
+    stat = os.stat(filename)
+    return stat.st_size == key["size"] and stat.st_mtime_ns == key["mtime_ns"]
+
+
+def load_parse_cache(path, key):
+    """
+    Returns the cached entry for `key`, or None if the cache is missing,
+    unreadable or was built from different input.
+
+    The file holds two pickles: the key with the content hash, then the
+    entry, so a stale cache is rejected without loading the rows. The input
+    is only hashed when its path, size and mtime all match, so a changed
+    input costs no extra read. Only load caches this program wrote.
+    """
+
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                return None
+            saved = pickle.load(f)
+            saved_hash = saved.pop("hash", None)
+            if saved != key or saved_hash != _content_hash(key["source"]):
+                return None
+            entry = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # Truncated or corrupt cache: treat as a miss, it is rewritten later
+        return None
+
+    if not isinstance(entry, dict) or not isinstance(entry.get("valid"), ColumnarTransactions):
+        return None
+    return entry
+
+
+def save_parse_cache(path, key, entry):
+    """
+    Writes the key, the input's content hash and the entry atomically
+    (temp file + rename).
+    """
+
+    key = dict(key, hash=_content_hash(key["source"]))
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_MAGIC)
+        pickle.dump(key, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def new_parse_cache_entry(valid, summary, lines, parsed, regions, amount_range):
+    """
+    Builds a cache entry: the rows that passed validation without filters
+    (stored columnar), their validation counters, the raw line and parsed
+    row counts, and the region list / amount range shown as filter options.
+    """
+    if not isinstance(valid, ColumnarTransactions):
+        valid = ColumnarTransactions.from_transactions(valid)
+
+    return {
+        "valid": valid,
+        "summary": dict(summary),
+        "lines": lines,
+        "parsed": parsed,
+        "regions": list(regions),
+        "amount_range": tuple(amount_range),
+    }
+
+
+def filter_valid(valid, summary, region=None, min_amount=None, max_amount=None,
+                 from_date=None, to_date=None):
+    """
+    Applies region/date/amount filters to already validated rows.
+    Returns (rows, invalid_count, summary) like validate_and_filter on the
+    original input.
+    """
+
+    summary = dict(summary)
+    if region or from_date or to_date or min_amount is not None or max_amount is not None:
+        valid, _, filtered = validate_and_filter(
+            valid, region=region, min_amount=min_amount, max_amount=max_amount,
+            from_date=from_date, to_date=to_date
+        )
+        for name in ("filtered_by_region", "filtered_by_date", "filtered_by_amount", "final_count"):
+            summary[name] = filtered[name]
+    return valid, summary["invalid"], summary
@@ -0,0 +1,112 @@
+import glob
+import os
+import re
+
+
+# Files read from a directory input (anything matching a glob input is read)
+PARTITION_EXTENSIONS = (".txt", ".gz")
+
+# Hive-style "key=value" path parts, e.g. data/sales/region=North/date=2024-12-01/store_12.txt.gz
+_KEY_VALUE = re.compile(r"([A-Za-z]+)=([^/\\_]+)")
+_DATE = re.compile(r"(?<!\d)(\d{4})-?(\d{2})-?(\d{2})(?!\d)")
+_DATE_KEYS = ("date", "dt", "day")
+
+
+def is_partitioned_input(path):
+    """
+    True if `path` names several files or a compressed one: a directory,
+    a glob pattern or a .gz file.
+    """
+    return os.path.isdir(path) or any(c in path for c in "*?[") or path.endswith(".gz")
+
+
+def parse_date(value):
+    """
+    Normalizes YYYY-MM-DD or YYYYMMDD to YYYY-MM-DD; raises ValueError otherwise.
+    """
+    match = _DATE.fullmatch(str(value).strip())
+    if match is None:
+        raise ValueError(f"'{value}' is not a date (YYYY-MM-DD)")
+    return "-".join(match.groups())
+
+
+def partition_keys(path):
+    """
+    Reads the partition a file belongs to from its path: every "key=value"
+    directory or file-name part (keys lowercased, the part nearest the file
+    wins), plus "date" from a date= / dt= / day= part or else the last date
+    in the path.
+    """
+
+    path = path.replace(os.sep, "/")
+    name = path.rsplit("/", 1)[-1]
+    # Extensions are not part of a value: "date=2024-12-01.txt.gz"
+    stem = path[:len(path) - len(name)] + name.split(".", 1)[0]
+
+    keys = {key.lower(): value for key, value in _KEY_VALUE.findall(stem)}
+
+    date = next((keys.pop(key) for key in _DATE_KEYS if key in keys), None)
+    dates = _DATE.findall(date if date is not None else stem)
+    keys["date"] = "-".join(dates[-1]) if dates else None
+
+    return keys
+
+
+def _matching_files(path):
+    """
+    The files named by a directory or glob `path`.
+    """
+
+    if os.path.isdir(path):
+        files = []
+        for folder, dirs, names in os.walk(path):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            files.extend(
+                os.path.join(folder, name) for name in names
+                if not name.startswith(".") and name.endswith(PARTITION_EXTENSIONS)
+            )
+        return files
+
+    return [f for f in glob.glob(path, recursive=True) if os.path.isfile(f)]
+
+
+def find_partitions(path, region=None, from_date=None, to_date=None):
+    """
+    Lists the input files under a directory or glob `path` in path order.
+
+    Files whose path names another region (region=...) or a date outside
+    from_date..to_date are skipped without being opened. Files without
+    that key are kept; validate_and_filter then drops their rows outside
+    the region or date range.
+    Returns (partitions, skipped count); each partition is a dict with
+    "path", "size", "region" and "date".
+    """
+
+    files = _matching_files(path)
+    if not files:
+        raise ValueError(f"No input files found for '{path}'")
+
+    partitions = []
+    skipped = 0
+
+    for filename in sorted(files):
+        keys = partition_keys(filename)
+        part_region = keys.get("region")
+        part_date = keys["date"]
+
+        if (
+            (region and part_region is not None and part_region != region) or
+            (from_date and part_date is not None and part_date < from_date) or
+            (to_date and part_date is not None and part_date > to_date)
+        ):
+            skipped += 1
+            continue
+
+        partitions.append({
+            "path": filename,
+            "size": os.path.getsize(filename),
+            "region": part_region,
+            "date": part_date,
+        })
+
+    return partitions, skipped
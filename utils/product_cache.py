@@ -0,0 +1,140 @@
+import json
+import os
+import sqlite3
+import time
+
+
+DEFAULT_CACHE_FILE = "data/product_cache.sqlite"
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 10000
+
+# SQLite limits the number of "?" placeholders per statement
+_BATCH = 500
+
+
+class ProductCache:
+    """
+    Persistent product cache backed by SQLite.
+
+    Each entry has its own fetch time (TTL) and last-access time (LRU).
+    An entry of None records a product the API does not know (404).
+    Every write runs inside a single transaction, so a crash never leaves
+    a half-written cache behind.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_FILE, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS products ("
+                " id INTEGER PRIMARY KEY,"
+                " data TEXT NOT NULL,"
+                " fetched_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS products_accessed ON products (accessed_at)"
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+    def get_many(self, product_ids):
+        """
+        Returns {id: product_info} for ids that are cached and not stale
+        (product_info is None for a cached 404).
+        """
+
+        ids = list(dict.fromkeys(product_ids))
+        now = time.time()
+        oldest = now - self.ttl
+        found = {}
+
+        with self.conn:
+            for i in range(0, len(ids), _BATCH):
+                chunk = ids[i:i + _BATCH]
+                marks = ",".join("?" * len(chunk))
+
+                rows = self.conn.execute(
+                    f"SELECT id, data FROM products WHERE id IN ({marks}) AND fetched_at >= ?",
+                    (*chunk, oldest)
+                ).fetchall()
+
+                for pid, data in rows:
+                    found[pid] = json.loads(data)
+
+                self.conn.execute(
+                    f"UPDATE products SET accessed_at = ? WHERE id IN ({marks}) AND fetched_at >= ?",
+                    (now, *chunk, oldest)
+                )
+
+        return found
+
+    def put_many(self, products):
+        """
+        Stores {id: product_info}, drops entries older than the TTL and
+        evicts least recently used entries beyond max_entries.
+        """
+
+        if not products:
+            return
+
+        now = time.time()
+        rows = [(pid, json.dumps(info), now, now) for pid, info in products.items()]
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO products (id, data, fetched_at, accessed_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            # Stale entries are never served, so they must not hold LRU slots
+            self.conn.execute("DELETE FROM products WHERE fetched_at < ?", (now - self.ttl,))
+            self.conn.execute(
+                "DELETE FROM products WHERE id IN ("
+                " SELECT id FROM products ORDER BY accessed_at DESC, id LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def put_changed(self, products):
+        """
+        put_many for the entries of {id: product_info} that are new,
+        changed or stale; fresh identical entries are not rewritten.
+        Returns the number of entries written.
+        """
+
+        ids = list(products)
+        oldest = time.time() - self.ttl
+        stored = {}
+
+        for i in range(0, len(ids), _BATCH):
+            chunk = ids[i:i + _BATCH]
+            marks = ",".join("?" * len(chunk))
+            stored.update(self.conn.execute(
+                f"SELECT id, data FROM products WHERE id IN ({marks}) AND fetched_at >= ?",
+                (*chunk, oldest)
+            ))
+
+        changed = {
+            pid: info for pid, info in products.items()
+            if stored.get(pid) != json.dumps(info)
+        }
+        self.put_many(changed)
+        return len(changed)
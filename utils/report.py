@@ -0,0 +1,278 @@
+import csv
+import datetime
+import json
+import os
+
+from utils.data_processor import (
+    calculate_total_revenue,
+    region_wise_sales,
+    top_selling_products,
+    top_customers,
+    daily_sales_trend,
+    find_peak_sales_day,
+    low_performing_products
+)
+
+
+REPORT_FORMATS = ("text", "json", "csv")
+REPORT_EXTENSIONS = {"text": ".txt", "json": ".json", "csv": ".csv"}
+
+# Written through a buffered stream instead of one joined string
+REPORT_BUFFER_SIZE = 1 << 16
+
+
+def build_report_data(aggregates, enrichment, generated=None):
+    """
+    Computes everything a report shows, once, from aggregate_sales output
+    and a summarize_enrichment result. Every renderer reads this dict, so
+    the cost depends on the number of regions/products/customers/dates
+    and failed products, never on the number of rows.
+    """
+
+    total_tx = aggregates["transaction_count"]
+    total_revenue = calculate_total_revenue(aggregates)
+    daily = daily_sales_trend(aggregates)
+    peak_date, peak_rev, peak_cnt = find_peak_sales_day(aggregates)
+
+    total = enrichment["total"]
+    matched = enrichment["matched"]
+
+    # One entry per product that could not be enriched, most affected rows first
+    failed = sorted(enrichment["failed"].items(), key=lambda x: x[1], reverse=True)
+
+    return {
+        "generated": generated or datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "approximate": "heavy_hitters" in aggregates,
+        "summary": {
+            "total_revenue": total_revenue,
+            "total_transactions": total_tx,
+            "average_order_value": total_revenue / total_tx if total_tx else 0,
+            # daily_sales_trend is sorted by date
+            "first_date": next(iter(daily), None),
+            "last_date": next(reversed(daily), None),
+        },
+        "regions": region_wise_sales(aggregates),
+        "top_products": top_selling_products(aggregates),
+        "top_customers": top_customers(aggregates),
+        "daily": daily,
+        "peak_day": {"date": peak_date, "revenue": peak_rev, "transaction_count": peak_cnt},
+        "low_performing": low_performing_products(aggregates),
+        "enrichment": {
+            "total": total,
+            "matched": matched,
+            "match_rate": (matched / total * 100) if total else 0,
+            "failed": [(pid, name, count) for (pid, name), count in failed],
+        },
+    }
+
+
+def render_text(data, out):
+    """
+    Writes the human-readable report (the original sales_report.txt layout).
+    """
+
+    summary = data["summary"]
+    approx = " (approx.)" if data["approximate"] else ""
+
+    def lines():
+        # HEADER
+        yield "=============================================="
+        yield "             SALES ANALYTICS REPORT           "
+        yield "=============================================="
+        yield f"Generated: {data['generated']}"
+        yield f"Records Processed: {summary['total_transactions']}"
+        yield "==============================================\n"
+
+        # SUMMARY
+        yield "OVERALL SUMMARY"
+        yield "----------------------------------------------"
+        yield f"Total Revenue: ₹{summary['total_revenue']:,.2f}"
+        yield f"Total Transactions: {summary['total_transactions']}"
+        yield f"Average Order Value: ₹{summary['average_order_value']:,.2f}"
+        yield f"Date Range: {summary['first_date']} to {summary['last_date']}\n"
+
+        # REGION PERFORMANCE
+        yield "REGION-WISE PERFORMANCE"
+        yield "----------------------------------------------"
+        yield f"{'Region':10} {'Sales':15} {'% of Total':15} {'Transactions'}"
+        for region, stats in data["regions"].items():
+            yield (f"{region:10} ₹{stats['total_sales']:,.0f}   {stats['percentage']:.2f}%        "
+                   f"{stats['transaction_count']}")
+        yield ""
+
+        # TOP PRODUCTS
+        yield f"TOP 5 PRODUCTS{approx}"
+        yield "----------------------------------------------"
+        yield f"{'Rank':5} {'Product':20} {'Qty Sold':10} {'Revenue'}"
+        for i, (name, qty, rev) in enumerate(data["top_products"], start=1):
+            yield f"{i:<5} {name:20} {qty:<10} ₹{rev:,.0f}"
+        yield ""
+
+        # CUSTOMERS
+        yield f"TOP 5 CUSTOMERS{approx}"
+        yield "----------------------------------------------"
+        yield f"{'Rank':5} {'Customer':10} {'Total Spent':15} {'Orders'}"
+        for i, (cid, spent, orders) in enumerate(data["top_customers"], start=1):
+            yield f"{i:<5} {cid:10} ₹{spent:,.0f}       {orders}"
+        yield ""
+
+        # DAILY TREND
+        yield "DAILY SALES TREND"
+        yield "----------------------------------------------"
+        yield f"{'Date':12} {'Revenue':12} {'Transactions':12} {'Unique Cust'}"
+        for date, stats in data["daily"].items():
+            yield (f"{date:12} ₹{stats['revenue']:,.0f}      {stats['transaction_count']:10}     "
+                   f"{stats['unique_customers']}")
+        yield ""
+
+        # PERFORMANCE
+        peak = data["peak_day"]
+        yield "PRODUCT PERFORMANCE ANALYSIS"
+        yield "----------------------------------------------"
+        yield f"Best Sales Day: {peak['date']} (₹{peak['revenue']:,.0f}, {peak['transaction_count']} transactions)\n"
+
+        yield "Low Performing Products (Qty < 10):"
+        if approx:
+            yield " - not tracked with approximate top-K"
+        for name, qty, rev in data["low_performing"]:
+            yield f" - {name}: Qty {qty}, Revenue ₹{rev:,.0f}"
+        yield ""
+
+        # ENRICHMENT SUMMARY
+        enrichment = data["enrichment"]
+        yield "API ENRICHMENT SUMMARY"
+        yield "----------------------------------------------"
+        yield f"Total Products Enriched: {enrichment['total']}"
+        yield f"Successful Matches: {enrichment['matched']} ({enrichment['match_rate']:.2f}%)"
+
+        if enrichment["failed"]:
+            yield "Products That Could Not Be Enriched:"
+            for pid, name, count in enrichment["failed"]:
+                yield f" - {pid} ({name}) x{count}"
+            yield ""
+
+    write = out.write
+    for i, line in enumerate(lines()):
+        if i:
+            write("\n")
+        write(line)
+
+
+def render_json(data, out):
+    """
+    Writes the report data as one JSON document.
+    """
+
+    summary = data["summary"]
+    enrichment = data["enrichment"]
+
+    document = {
+        "generated": data["generated"],
+        "approximate": data["approximate"],
+        "summary": summary,
+        "regions": [{"region": region, **stats} for region, stats in data["regions"].items()],
+        "top_products": [
+            {"rank": i, "product": name, "quantity": qty, "revenue": rev}
+            for i, (name, qty, rev) in enumerate(data["top_products"], start=1)
+        ],
+        "top_customers": [
+            {"rank": i, "customer_id": cid, "total_spent": spent, "orders": orders}
+            for i, (cid, spent, orders) in enumerate(data["top_customers"], start=1)
+        ],
+        "daily": [{"date": date, **stats} for date, stats in data["daily"].items()],
+        "peak_day": data["peak_day"],
+        "low_performing": [
+            {"product": name, "quantity": qty, "revenue": rev}
+            for name, qty, rev in data["low_performing"]
+        ],
+        "enrichment": {
+            "total": enrichment["total"],
+            "matched": enrichment["matched"],
+            "match_rate": enrichment["match_rate"],
+            "failed": [
+                {"product_id": pid, "product_name": name, "transactions": count}
+                for pid, name, count in enrichment["failed"]
+            ],
+        },
+    }
+
+    json.dump(document, out, indent=2, ensure_ascii=False)
+    out.write("\n")
+
+
+def render_csv(data, out):
+    """
+    Writes the report as one long-format table: section, key, metric, value.
+    """
+
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(("section", "key", "metric", "value"))
+
+    writer.writerow(("report", "", "generated", data["generated"]))
+    writer.writerow(("report", "", "approximate", data["approximate"]))
+    writer.writerows(("summary", "", metric, value) for metric, value in data["summary"].items())
+
+    for region, stats in data["regions"].items():
+        writer.writerows(("region", region, metric, value) for metric, value in stats.items())
+    for name, qty, rev in data["top_products"]:
+        writer.writerows((("top_product", name, "quantity", qty), ("top_product", name, "revenue", rev)))
+    for cid, spent, orders in data["top_customers"]:
+        writer.writerows((("top_customer", cid, "total_spent", spent), ("top_customer", cid, "orders", orders)))
+    for date, stats in data["daily"].items():
+        writer.writerows(("daily", date, metric, value) for metric, value in stats.items())
+
+    peak = data["peak_day"]
+    writer.writerows((
+        ("peak_day", peak["date"], "revenue", peak["revenue"]),
+        ("peak_day", peak["date"], "transaction_count", peak["transaction_count"]),
+    ))
+    for name, qty, rev in data["low_performing"]:
+        writer.writerows((("low_performing", name, "quantity", qty), ("low_performing", name, "revenue", rev)))
+
+    enrichment = data["enrichment"]
+    for metric in ("total", "matched", "match_rate"):
+        writer.writerow(("enrichment", "", metric, enrichment[metric]))
+    writer.writerows(
+        ("enrichment_failed", f"{pid} ({name})", "transactions", count)
+        for pid, name, count in enrichment["failed"]
+    )
+
+
+RENDERERS = {"text": render_text, "json": render_json, "csv": render_csv}
+
+
+def report_paths(output_file, formats):
+    """
+    Maps each format to its file: output_file itself for the first format,
+    and output_file with that format's extension for the others
+    (output/sales_report.txt → output/sales_report.json, .csv).
+    """
+
+    base = os.path.splitext(output_file)[0]
+    paths = {}
+    for i, fmt in enumerate(dict.fromkeys(formats)):
+        paths[fmt] = output_file if i == 0 else base + REPORT_EXTENSIONS[fmt]
+    return paths
+
+
+def write_report(aggregates, enrichment, output_file, formats=("text",), buffer_size=REPORT_BUFFER_SIZE):
+    """
+    Builds the report data once and writes it in every requested format.
+    Returns the paths written.
+    """
+
+    unknown = [fmt for fmt in formats if fmt not in RENDERERS]
+    if unknown:
+        raise ValueError(f"Unknown report format(s): {', '.join(unknown)}")
+
+    data = build_report_data(aggregates, enrichment)
+    paths = report_paths(output_file, formats)
+
+    for fmt, path in paths.items():
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        newline = "" if fmt == "csv" else None
+        with open(path, "w", encoding="utf-8", newline=newline, buffering=buffer_size) as f:
+            RENDERERS[fmt](data, f)
+
+    return list(paths.values())
@@ -0,0 +1,380 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse, parse_qsl
+
+from utils.file_handler import read_sales_data, parse_transactions, validate_and_filter
+from utils.data_processor import (
+    aggregate_sales,
+    region_wise_sales,
+    top_selling_products,
+    top_customers,
+    customer_analysis,
+    daily_sales_trend
+)
+from utils.indexes import TransactionIndex, QUERY_KEYS
+from utils.parse_cache import (
+    input_key,
+    unchanged_since,
+    load_parse_cache,
+    save_parse_cache,
+    new_parse_cache_entry
+)
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+DEFAULT_RELOAD_INTERVAL = 2.0
+
+# Per dataset: aggregates of recent filters (can be large) and encoded responses
+AGGREGATE_CACHE_SIZE = 32
+RESPONSE_CACHE_SIZE = 2048
+
+
+class MemoCache:
+    """
+    Thread-safe LRU of computed values. Concurrent misses on one key
+    compute it once; the other callers wait for that result.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def get(self, key, compute):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+                return value
+            pending = self.pending.get(key)
+            owner = pending is None
+            if owner:
+                # Deferred: concurrent.futures imports logging
+                from concurrent.futures import Future
+                pending = self.pending[key] = Future()
+
+        if not owner:
+            return pending.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self.lock:
+                del self.pending[key]
+            pending.set_exception(e)
+            raise
+
+        with self.lock:
+            del self.pending[key]
+            self.entries[key] = value
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        pending.set_result(value)
+        return value
+
+
+class Dataset:
+    """
+    One loaded snapshot of the input: validated rows (columnar), their
+    index and the aggregates over all of them. The data is never modified
+    after construction, so request threads share it without locking; a
+    reload builds a new Dataset and swaps the reference.
+    """
+
+    def __init__(self, filename, valid, invalid_count, stat, version, source):
+        self.filename = filename
+        self.valid = valid
+        self.invalid_count = invalid_count
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        self.version = version
+        self.source = source
+        self.loaded_at = time.time()
+
+        self.index = TransactionIndex(valid)
+        self.aggregates = aggregate_sales(valid)
+
+        # The data never changes, so cached entries stay valid for this dataset's lifetime
+        self.aggregate_cache = MemoCache(AGGREGATE_CACHE_SIZE)
+        self.response_cache = MemoCache(RESPONSE_CACHE_SIZE)
+
+    def matches_file(self, stat):
+        return stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns
+
+    def aggregates_for(self, filters):
+        """
+        Returns aggregate_sales over the rows matching `filters`
+        (TransactionIndex.positions arguments).
+        """
+        if not filters:
+            return self.aggregates
+        return self.aggregate_cache.get(
+            tuple(sorted(filters.items())),
+            lambda: aggregate_sales(self.index.select(**filters))
+        )
+
+
+def load_dataset(filename, parse_cache=None, version=1):
+    """
+    Reads, parses and validates `filename` (or loads it from the parse
+    cache when the file is unchanged) and returns a Dataset.
+    """
+
+    stat = os.stat(filename)
+    key = input_key(filename) if parse_cache else None
+    cached = load_parse_cache(parse_cache, key) if parse_cache else None
+
+    if cached is not None:
+        valid = cached["valid"]
+        invalid_count = cached["summary"]["invalid"]
+        source = "parse cache"
+    else:
+        raw_lines = read_sales_data(filename)
+        transactions = parse_transactions(raw_lines, columnar=True)
+        valid, invalid_count, summary = validate_and_filter(transactions)
+        source = "file"
+
+        if parse_cache and unchanged_since(filename, key):
+            amounts = transactions.amount
+            amount_range = (min(amounts), max(amounts)) if amounts else (0, 0)
+            save_parse_cache(parse_cache, key, new_parse_cache_entry(
+                valid, summary, len(raw_lines), len(transactions),
+                sorted(transactions.values("Region")), amount_range
+            ))
+
+    return Dataset(filename, valid, invalid_count, stat, version, source)
+
+
+class AnalyticsService:
+    """
+    Keeps the validated transactions of one input file in memory and
+    answers analytics queries from them.
+
+    The file is polled every `reload_interval` seconds; when its size or
+    mtime changes, a new Dataset is built in the background and swapped in
+    atomically. Requests keep using the snapshot they started with, and a
+    failed reload leaves the previous data in place.
+    """
+
+    def __init__(self, filename, parse_cache=None, reload_interval=DEFAULT_RELOAD_INTERVAL):
+        self.filename = filename
+        self.parse_cache = parse_cache
+        self.reload_interval = reload_interval
+        self.dataset = load_dataset(filename, parse_cache)
+        self.last_error = None
+
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+
+    def reload(self, force=False):
+        """
+        Reloads the file if it changed (always with force).
+        Returns True if a new dataset was swapped in.
+        """
+
+        with self._reload_lock:
+            current = self.dataset
+            try:
+                if not force and current.matches_file(os.stat(self.filename)):
+                    return False
+                dataset = load_dataset(self.filename, self.parse_cache, current.version + 1)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                return False
+
+            # Still being written: keep the old data and try again on the next poll
+            if not dataset.matches_file(os.stat(self.filename)):
+                return False
+
+            self.dataset = dataset
+            self.last_error = None
+            return True
+
+    def start_watching(self):
+        def watch():
+            while not self._stop.wait(self.reload_interval):
+                self.reload()
+
+        if self.reload_interval and self._watcher is None:
+            self._watcher = threading.Thread(target=watch, daemon=True)
+            self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+
+    # Endpoint handlers: (dataset, filters, params) -> JSON-serializable result
+
+    def status(self, dataset, filters, params):
+        return {
+            "file": dataset.filename,
+            "version": dataset.version,
+            "rows": len(dataset.valid),
+            "invalid": dataset.invalid_count,
+            "loaded_from": dataset.source,
+            "loaded_at": dataset.loaded_at,
+            "last_reload_error": self.last_error,
+        }
+
+    def regions(self, dataset, filters, params):
+        return region_wise_sales(dataset.aggregates_for(filters))
+
+    def top_products(self, dataset, filters, params):
+        top = top_selling_products(dataset.aggregates_for(filters), n=_int_param(params, "n", 5))
+        return [{"product": name, "quantity": qty, "revenue": rev} for name, qty, rev in top]
+
+    def top_customers(self, dataset, filters, params):
+        top = top_customers(dataset.aggregates_for(filters), n=_int_param(params, "n", 5))
+        return [{"customer_id": cid, "total_spent": spent, "orders": orders} for cid, spent, orders in top]
+
+    def customers(self, dataset, filters, params):
+        # Sorted by spending; `limit` keeps responses small on large inputs
+        limit = _int_param(params, "limit", 100)
+        analysis = customer_analysis(dataset.aggregates_for(filters))
+        return dict(list(analysis.items())[:limit])
+
+    def daily(self, dataset, filters, params):
+        return daily_sales_trend(dataset.aggregates_for(filters))
+
+    def query(self, dataset, filters, params):
+        aggregates = dataset.aggregates_for(filters)
+        return {
+            "filters": filters,
+            "transactions": aggregates["transaction_count"],
+            "total_revenue": aggregates["total_revenue"],
+            "regions": region_wise_sales(aggregates),
+            "top_products": self.top_products(dataset, filters, params),
+            "top_customers": self.top_customers(dataset, filters, params),
+        }
+
+    def handle(self, method, path, query_string):
+        """
+        Answers one request. Returns (status, UTF-8 JSON payload).
+        Analytics responses are cached per dataset by path and parameters.
+        """
+
+        if path == "/reload":
+            if method != "POST":
+                return 405, _encode({"error": "use POST /reload"})
+            return 200, _encode({"reloaded": self.reload(force=True), "version": self.dataset.version})
+
+        handler = self.routes().get(path)
+        if handler is None:
+            return 404, _encode({"error": f"unknown endpoint {path}", "endpoints": sorted(self.routes())})
+
+        # One snapshot per request, even if a reload swaps it meanwhile
+        dataset = self.dataset
+        params = dict(parse_qsl(query_string))
+        try:
+            filters = parse_filters(params)
+            if path == "/status":
+                return 200, _encode(handler(dataset, filters, params))
+            return 200, dataset.response_cache.get(
+                (path, tuple(sorted(params.items()))),
+                lambda: _encode(handler(dataset, filters, params))
+            )
+        except ValueError as e:
+            return 400, _encode({"error": str(e)})
+
+    def routes(self):
+        return {
+            "/status": self.status,
+            "/regions": self.regions,
+            "/products/top": self.top_products,
+            "/customers/top": self.top_customers,
+            "/customers": self.customers,
+            "/daily": self.daily,
+            "/query": self.query,
+        }
+
+
+def _encode(body):
+    return json.dumps(body, ensure_ascii=False).encode("utf-8")
+
+
+def _int_param(params, name, default):
+    try:
+        return max(0, int(params.get(name, default)))
+    except ValueError:
+        raise ValueError(f"'{name}' must be an integer") from None
+
+
+def parse_filters(params):
+    """
+    Turns query-string parameters (region, min, max, customer, product,
+    from, to; see utils.indexes.QUERY_KEYS) into positions() arguments.
+    Other parameters (n, limit) are ignored here.
+    """
+
+    filters = {}
+    for key, value in params.items():
+        name = QUERY_KEYS.get(key)
+        if name is None or value == "":
+            continue
+        if name in ("min_amount", "max_amount"):
+            try:
+                value = float(value.replace(",", ""))
+            except ValueError:
+                raise ValueError(f"'{key}' must be a number") from None
+        filters[name] = value
+    return filters
+
+
+class ServiceHandler:
+    """
+    Request handling, mixed into http.server's BaseHTTPRequestHandler by
+    start_service (http.server is only imported when a service starts).
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._respond("GET")
+
+    def do_POST(self):
+        # Bodies are not used; drain one so the connection can be reused
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        self._respond("POST")
+
+    def _respond(self, method):
+        url = urlparse(self.path)
+        status, payload = self.server.service.handle(method, url.path.rstrip("/") or "/", url.query)
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_service(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """
+    Serves `service` on a thread per connection, in a background thread.
+    Returns (server, base_url); call server.shutdown() when done.
+    """
+
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    handler = type("ServiceHandler", (ServiceHandler, BaseHTTPRequestHandler), {})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.service = service
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    return server, f"http://{host}:{server.server_address[1]}"
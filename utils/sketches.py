@@ -0,0 +1,269 @@
+import base64
+import hashlib
+import heapq
+import math
+from array import array
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitter summary over positively weighted keys.
+
+    Monitors at most `capacity` keys. Every estimate overcounts the true
+    weight by at most total / capacity (the per-key bound is kept in `error`),
+    and any key heavier than total / capacity is guaranteed to be monitored.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counters = {}  # key -> [weight, error]
+        self.total = 0
+        # (weight, key) for every monitored key; weights only grow, so an
+        # entry is refreshed lazily when it reaches the top
+        self._heap = []
+
+    @classmethod
+    def for_error(cls, epsilon):
+        """
+        Returns a summary whose overcount is at most epsilon * total.
+        """
+        return cls(math.ceil(1 / epsilon))
+
+    def __len__(self):
+        return len(self.counters)
+
+    def add(self, key, weight=1):
+        self.total += weight
+
+        counter = self.counters.get(key)
+        if counter is not None:
+            counter[0] += weight
+            return
+
+        if len(self.counters) < self.capacity:
+            self.counters[key] = [weight, 0]
+            heapq.heappush(self._heap, (weight, key))
+            return
+
+        # Replace the lightest key; the newcomer inherits its weight as error
+        min_key, min_weight = self._pop_min()
+        del self.counters[min_key]
+        self.counters[key] = [min_weight + weight, min_weight]
+        heapq.heappush(self._heap, (min_weight + weight, key))
+
+    def _pop_min(self):
+        heap = self._heap
+        counters = self.counters
+        while True:
+            weight, key = heap[0]
+            current = counters[key][0]
+            if current == weight:
+                heapq.heappop(heap)
+                return key, weight
+            heapq.heapreplace(heap, (current, key))
+
+    def min_weight(self):
+        """
+        Weight an unmonitored key may have at most (0 until the summary is full).
+        """
+        if len(self.counters) < self.capacity:
+            return 0
+        return min(c[0] for c in self.counters.values())
+
+    def estimate(self, key):
+        counter = self.counters.get(key)
+        return counter[0] if counter is not None else self.min_weight()
+
+    def top(self, n):
+        """
+        Returns up to n (key, weight, error) tuples, heaviest first.
+        """
+        best = heapq.nlargest(n, self.counters.items(), key=lambda x: x[1][0])
+        return [(key, weight, error) for key, (weight, error) in best]
+
+    def merge(self, other):
+        """
+        Adds another summary's counts into this one (mergeable summaries:
+        keys missing on one side are charged that side's minimum as error).
+        """
+
+        mine = self.min_weight()
+        theirs = other.min_weight()
+
+        combined = {}
+        for key in self.counters.keys() | other.counters.keys():
+            a = self.counters.get(key) or (mine, mine)
+            b = other.counters.get(key) or (theirs, theirs)
+            combined[key] = [a[0] + b[0], a[1] + b[1]]
+
+        kept = heapq.nlargest(self.capacity, combined.items(), key=lambda x: x[1][0])
+        self.counters = dict(kept)
+        self._heap = [(c[0], key) for key, c in kept]
+        heapq.heapify(self._heap)
+        self.total += other.total
+        return self
+
+
+class CountMinSketch:
+    """
+    Count-Min sketch for approximate per-key sums in fixed memory.
+
+    Estimates never undercount, and overcount by at most epsilon * total
+    with probability 1 - delta. Sketches with the same epsilon/delta merge
+    by adding their tables, so they combine across processes.
+    """
+
+    def __init__(self, epsilon=0.001, delta=0.01):
+        self.epsilon = epsilon
+        self.delta = delta
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        # One flat table; row i occupies [i * width, (i + 1) * width)
+        self.table = array("d", bytes(8 * self.width * self.depth))
+        self._offsets = [i * self.width for i in range(self.depth)]
+        self.total = 0
+
+    def _cells(self, key):
+        # One stable 128-bit hash split into two (Python's hash() differs per process)
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        width = self.width
+        return [offset + (h1 + i * h2) % width for i, offset in enumerate(self._offsets)]
+
+    def add(self, key, weight=1):
+        self.total += weight
+        table = self.table
+        for cell in self._cells(key):
+            table[cell] += weight
+
+    def estimate(self, key):
+        table = self.table
+        return min(table[cell] for cell in self._cells(key))
+
+    def merge(self, other):
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Count-Min sketches must have the same epsilon and delta to merge.")
+
+        table = self.table
+        for i, value in enumerate(other.table):
+            if value:
+                table[i] += value
+        self.total += other.total
+        return self
+
+
+# 2 ** -rank for every possible register value
+_INVERSE_POWERS = [2.0 ** -i for i in range(65)]
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct counter with 2 ** precision registers
+    (relative standard error about 1.04 / sqrt(2 ** precision)).
+
+    Behaves like a set for the aggregates: add(), update(), len() and |=
+    (merge). Small counters keep the exact keys (so they cost no more than a
+    set and count exactly) and switch to registers once those are smaller.
+    """
+
+    # One counter per customer and per day, so keep instances small
+    __slots__ = ("precision", "exact", "registers")
+
+    def __init__(self, precision=12):
+        if not 4 <= precision <= 16:
+            raise ValueError("HyperLogLog precision must be between 4 and 16.")
+        self.precision = precision
+        self.exact = set()
+        self.registers = None
+
+    def _limit(self):
+        # Roughly where a set of shared key references outgrows the registers
+        return (1 << self.precision) >> 5
+
+    def add(self, key):
+        exact = self.exact
+        if exact is not None:
+            exact.add(key)
+            if len(exact) > self._limit():
+                self._densify()
+            return
+
+        x = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+        p = self.precision
+        index = x & ((1 << p) - 1)
+        rank = 65 - p - (x >> p).bit_length()
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, keys):
+        for key in keys:
+            self.add(key)
+
+    def _densify(self):
+        keys = self.exact
+        self.exact = None
+        self.registers = bytearray(1 << self.precision)
+        self.update(keys)
+
+    def count(self):
+        if self.exact is not None:
+            return len(self.exact)
+
+        m = 1 << self.precision
+        zeros = self.registers.count(0)
+        total = sum(map(_INVERSE_POWERS.__getitem__, self.registers))
+
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        estimate = alpha * m * m / total
+
+        # Linear counting is more accurate while many registers are empty
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return estimate
+
+    def __len__(self):
+        return round(self.count())
+
+    def merge(self, other):
+        if self.precision != other.precision:
+            raise ValueError("HyperLogLog counters must have the same precision to merge.")
+
+        if other.exact is not None:
+            self.update(other.exact)
+            return self
+
+        if self.exact is not None:
+            keys = self.exact
+            self.exact = None
+            self.registers = bytearray(other.registers)
+            self.update(keys)
+            return self
+
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def __ior__(self, other):
+        return self.merge(other)
+
+    def to_json(self):
+        if self.exact is not None:
+            return {"precision": self.precision, "keys": sorted(self.exact)}
+        return {"precision": self.precision, "registers": base64.b64encode(self.registers).decode("ascii")}
+
+    @classmethod
+    def from_json(cls, data):
+        hll = cls(data["precision"])
+        if "keys" in data:
+            hll.exact = set(data["keys"])
+        else:
+            hll.exact = None
+            hll.registers = bytearray(base64.b64decode(data["registers"]))
+        return hll
+
+
+def new_distinct(precision=None):
+    """
+    Returns an exact set, or a HyperLogLog counter when precision is given.
+    """
+    return set() if precision is None else HyperLogLog(precision)